@@ -0,0 +1,293 @@
+"""
+Run each crawler end to end against the local site stand-in and compare the results with a
+stored baseline.
+
+Every crawler runs in its own process against a fresh database, so CPU time and peak RSS
+are its own. Runs offline; MongoDB is a local server, or in memory with mongomock installed:
+    python -m benchmarks.crawl_benchmark --in-memory
+    python -m benchmarks.crawl_benchmark --mongo-uri mongodb://localhost:27017 --latency 0.05 --throttle-rate 0.02
+    python -m benchmarks.crawl_benchmark --in-memory --save-baseline
+
+Each crawler runs --repeat times and the median of every metric is compared. Exits with
+status 1 when a metric is worse than the baseline by more than --tolerance, or by more than
+--timing-tolerance for the metrics that depend on CPU time.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import statistics
+import sys
+import tempfile
+import time
+from benchmarks.site_standin import SiteStandIn, StandInAdapter
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "crawl_benchmark.json")
+CRAWLERS = ("dcinside", "nate", "fmkorea")
+
+# Metric, whether higher is better, whether it varies with CPU time between runs, and its column format
+METRICS = (
+    ("posts_per_sec", True, True, "{:>10.1f}"),
+    ("requests_per_post", False, False, "{:>10.2f}"),
+    ("kib_per_post", False, False, "{:>10.1f}"),
+    ("cpu_ms_per_post", False, True, "{:>10.2f}"),
+    ("peak_rss_mib", False, False, "{:>10.1f}"),
+)
+# Settings that change the results, recorded with the baseline
+CONFIG_KEYS = ("pages", "latency", "throttle_rate", "media", "media_kib", "video_kib", "mongo")
+
+
+def run_crawler(args):
+    """
+    Crawl one site in this process and write its measurements to args.result.
+    """
+    from src.config.settings import Settings
+    from src.crawlers.dcinside_crawler import DCInsideCrawler
+    from src.crawlers.fm_korea_crawler import FMKoreaCrawler
+    from src.crawlers.media_store import close_media_store, configure_media_store, get_media_store
+    from src.crawlers.media_worker import MediaWorker
+    from src.crawlers.nate_crawler import NateCrawler
+    from src.crawlers.parse_pool import close_parse_pool, configure_parse_pool
+    from src.crawlers.parsing import configure_parser
+    from src.crawlers.transport import close_transport, configure_transport
+    from src.db import mongo_client
+    from src.db.seen_index import get_seen_index
+
+    if args.in_memory:
+        import mongomock
+        mongo_client.MongoClient = mongomock.MongoClient
+    media_root = tempfile.mkdtemp(prefix="crawl-benchmark-media-")
+    settings = Settings(
+        _env_file=args.env_file,
+        mongodb_uri=args.mongo_uri,
+        mongodb_name=args.mongo_db,
+        dcinside_fetch_mode="static",
+        http_rate=args.rate,
+        http_burst=max(int(args.rate), 1),
+        http_host_rates={},
+        media_root=media_root,
+    )
+
+    transport = configure_transport(settings)
+    transport.session.mount("https://", StandInAdapter(
+        args.standin, pool_connections=settings.http_pool_connections,
+        pool_maxsize=max(settings.http_pool_maxsize, settings.http_max_per_host), max_retries=transport.retry,
+    ))
+    configure_parser(settings.html_parser)
+    configure_parse_pool(settings)
+    db_client = mongo_client.MongoDBClient(
+        uri=settings.mongodb_uri,
+        db_name=settings.mongodb_name,
+        bulk_max_docs=settings.mongodb_bulk_max_docs,
+        bulk_max_bytes=settings.mongodb_bulk_max_bytes,
+        bulk_flush_interval=settings.mongodb_bulk_flush_interval,
+    )
+    db_client.client.drop_database(settings.mongodb_name)
+    if args.in_memory:
+        # mongomock has no query planner to explain the hot queries with
+        for collection_name, indexes in mongo_client.INDEXES.items():
+            for keys, options in indexes:
+                db_client.db[collection_name].create_index(keys, **options)
+    else:
+        db_client.ensure_schema()
+    get_seen_index(db_client)
+    configure_media_store(db_client, settings)
+
+    if args.crawler == "dcinside":
+        crawler = DCInsideCrawler(db_client, max_per_host=settings.http_max_per_host, fetch_mode="static",
+                                  comment_fanout=settings.comment_fanout, comment_max_pages=settings.comment_max_pages)
+        crawl = lambda: crawler.fetch_posts("bench", max_pages=args.pages)
+    elif args.crawler == "nate":
+        crawler = NateCrawler(db_client, max_per_host=settings.http_max_per_host,
+                              comment_fanout=settings.comment_fanout, comment_max_pages=settings.comment_max_pages)
+        crawl = lambda: crawler.fetch_posts("bench", start_page=1, end_page=args.pages)
+    else:
+        crawler = FMKoreaCrawler(db_client)
+        crawl = lambda: crawler.fetch_posts("bench", max_pages=args.pages)
+
+    cpu_started = os.times()
+    started = time.perf_counter()
+    crawl()
+    db_client.flush_writes()
+    seconds = time.perf_counter() - started
+    # Parser processes are only counted in the children's usage once they have exited
+    close_parse_pool()
+    cpu = os.times()
+
+    media_started = time.perf_counter()
+    if args.media:
+        worker = MediaWorker(db_client, get_media_store(db_client), max_bytes=settings.media_max_bytes)
+        worker.drain()
+    media_seconds = time.perf_counter() - media_started
+
+    posts = db_client.db[args.crawler].count_documents({})
+    media_files = db_client.db["media"].count_documents({})
+    close_media_store()
+    close_transport()
+    db_client.client.drop_database(settings.mongodb_name)
+    db_client.close_connection()
+    shutil.rmtree(media_root, ignore_errors=True)
+
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result = {
+        "posts": posts,
+        "seconds": seconds,
+        "media_seconds": media_seconds,
+        "media_files": media_files,
+        "cpu_seconds": sum(cpu[:4]) - sum(cpu_started[:4]),
+        # ru_maxrss is in KiB on Linux; the largest parser process stands in for the pool
+        "peak_rss_mib": (own + children) / 1024,
+    }
+    with open(args.result, "w", encoding="utf-8") as file:
+        json.dump(result, file)
+
+
+def measure(crawler, standin, args):
+    """
+    Run one crawler in a child process and combine its measurements with the stand-in's.
+    """
+    standin.reset_stats()
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+        result_path = result_file.name
+    command = [
+        sys.executable, "-m", "benchmarks.crawl_benchmark", "--run", crawler, "--result", result_path,
+        "--standin", standin.url, "--pages", str(args.pages), "--rate", str(args.rate),
+        "--mongo-uri", args.mongo_uri, "--mongo-db", f"{args.mongo_db}_{crawler}", "--env-file", args.env_file,
+    ] + (["--in-memory"] if args.in_memory else []) + ([] if args.media else ["--no-media"])
+    try:
+        subprocess.run(command, check=True, stdout=None if args.verbose else subprocess.DEVNULL)
+        with open(result_path, encoding="utf-8") as file:
+            result = json.load(file)
+    finally:
+        os.remove(result_path)
+
+    served = standin.stats()
+    posts = max(result["posts"], 1)
+    return {
+        "posts": result["posts"],
+        "posts_per_sec": result["posts"] / result["seconds"],
+        "requests_per_post": sum(host["requests"] for host in served.values()) / posts,
+        "kib_per_post": sum(host["bytes"] for host in served.values()) / 1024 / posts,
+        "cpu_ms_per_post": result["cpu_seconds"] * 1000 / posts,
+        "peak_rss_mib": result["peak_rss_mib"],
+        "throttled": sum(host["throttled"] for host in served.values()),
+        "media_files": result["media_files"],
+        "media_seconds": result["media_seconds"],
+    }
+
+
+def measure_median(crawler, standin, args):
+    """
+    Run one crawler args.repeat times and keep the median of each measurement.
+    """
+    runs = [measure(crawler, standin, args) for _ in range(args.repeat)]
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def compare(results, baseline, tolerance, timing_tolerance):
+    """
+    Print each metric next to its baseline value.
+
+    :param timing_tolerance: Allowed regression of the metrics that depend on CPU time.
+    :return: List of "crawler metric" names worse than the baseline by more than their tolerance.
+    """
+    regressions = []
+    print(f"{'crawler':<10} {'metric':<18} {'current':>10} {'baseline':>10} {'change':>8}")
+    for crawler, result in results.items():
+        expected = baseline.get("results", {}).get(crawler, {})
+        for metric, higher_is_better, timing, column in METRICS:
+            current = result[metric]
+            previous = expected.get(metric)
+            if not previous:
+                print(f"{crawler:<10} {metric:<18} {column.format(current)} {'-':>10} {'':>8}")
+                continue
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > (timing_tolerance if timing else tolerance):
+                regressions.append(f"{crawler} {metric}")
+                flag = "  REGRESSION"
+            print(f"{crawler:<10} {metric:<18} {column.format(current)} {column.format(previous)} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crawlers", nargs="+", choices=CRAWLERS, default=list(CRAWLERS))
+    parser.add_argument("--pages", type=int, default=2, help="List pages crawled per site")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of page requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--media-kib", type=int, default=256, help="Size of each image")
+    parser.add_argument("--video-kib", type=int, default=2048, help="Size of each video")
+    parser.add_argument("--no-media", dest="media", action="store_false", help="Skip downloading the queued media")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Requests per second allowed per host")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--mongo-db", default="crawl_benchmark")
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock instead of a MongoDB server")
+    parser.add_argument("--env-file", default=".env" if os.path.exists(".env") else ".env_sample",
+                        help="Settings file for everything the benchmark does not override")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per crawler; the median of each metric is kept")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression per metric")
+    parser.add_argument("--timing-tolerance", type=float, default=0.35,
+                        help="Allowed relative regression of posts_per_sec and cpu_ms_per_post")
+    parser.add_argument("--verbose", action="store_true", help="Show crawler output")
+    parser.add_argument("--run", choices=CRAWLERS, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--standin", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        args.crawler = args.run
+        run_crawler(args)
+        return
+
+    standin = SiteStandIn(
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        media_size=args.media_kib * 1024,
+        video_size=args.video_kib * 1024,
+    ).start()
+    try:
+        results = {crawler: measure_median(crawler, standin, args) for crawler in args.crawlers}
+    finally:
+        standin.close()
+
+    print(f"{'crawler':<10} {'posts':>6} {'429s':>6} {'media':>6} {'media s':>8}")
+    for crawler, result in results.items():
+        print(f"{crawler:<10} {result['posts']:>6} {result['throttled']:>6} {result['media_files']:>6} {result['media_seconds']:>8.2f}")
+    print()
+
+    config = {
+        "pages": args.pages, "latency": args.latency, "throttle_rate": args.throttle_rate, "media": args.media,
+        "media_kib": args.media_kib, "video_kib": args.video_kib, "mongo": "memory" if args.in_memory else "server",
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"config": config, "results": results}, file, indent=2)
+            file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        differing = [key for key in CONFIG_KEYS if baseline.get("config", {}).get(key) != config[key]]
+        if differing:
+            print(f"Warning: baseline was recorded with different {', '.join(differing)}\n")
+    regressions = compare(results, baseline, args.tolerance, args.timing_tolerance)
+    if regressions:
+        print(f"\nRegressed beyond {args.tolerance:.0%} ({args.timing_tolerance:.0%} for timings): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measure how parse throughput scales with the number of parser processes.
+
+Runs offline against the saved pages in benchmarks/fixtures:
+    python -m benchmarks.parse_pool_benchmark --pages 400 --workers 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import time
+from src.crawlers import parsing
+from src.crawlers.parse_pool import ParsePool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+PARSERS = {
+    "dcinside_list": (parsing.parse_dcinside_list, ("bench",)),
+    "dcinside_post": (parsing.parse_dcinside_post, ()),
+    "nate_list": (parsing.parse_nate_list, ()),
+    "nate_post": (parsing.parse_nate_post, ()),
+}
+
+
+def load_jobs(count):
+    pages = []
+    for name, (func, args) in PARSERS.items():
+        with open(os.path.join(FIXTURES, name + ".html"), "rb") as file:
+            pages.append((func, file.read(), args))
+    return [pages[i % len(pages)] for i in range(count)]
+
+
+async def run_pool(pool, jobs):
+    return await asyncio.gather(*(pool.parse(func, html, *args) for func, html, args in jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Pages parsed per run, cycling over the fixtures")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+    jobs = load_jobs(args.pages)
+
+    started = time.perf_counter()
+    expected = [func(html, *extra) for func, html, extra in jobs]
+    inline_rate = len(jobs) / (time.perf_counter() - started)
+    print(f"{'mode':<12} {'pages/s':>9} {'scaling':>8}")
+    print(f"{'inline':<12} {inline_rate:>9.1f} {1:>7.1f}x")
+
+    for workers in args.workers:
+        pool = ParsePool(max_workers=workers)
+        # Start the processes outside the timed run
+        asyncio.run(run_pool(pool, jobs[:workers]))
+        started = time.perf_counter()
+        results = asyncio.run(run_pool(pool, jobs))
+        rate = len(jobs) / (time.perf_counter() - started)
+        pool.close()
+        assert results == expected, "Pool results should match inline parsing"
+        print(f"{f'{workers} workers':<12} {rate:>9.1f} {rate / inline_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare parse time and peak memory per page for each tree builder, with and without
+restricting the tree to the subtrees the crawlers read.
+
+Runs offline against the saved pages in benchmarks/fixtures:
+    python -m benchmarks.parser_benchmark --iterations 50
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from src.crawlers import parsing
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Page fixture, strainer, and the selectors the crawlers evaluate on that page
+PAGES = {
+    "dcinside_list": (parsing.DCINSIDE_LIST, ["tbody tr.ub-content"]),
+    "dcinside_post": (parsing.DCINSIDE_POST, [".title_subject", ".gall_count", ".gall_recommend", ".writing_view_box img"]),
+    "nate_list": (parsing.NATE_LIST, ["tbody tr h2 a"]),
+    "nate_post": (parsing.NATE_POST, ["div.post-tit-info h1", "div#contentArea img", "div.cmt_best dl.cmt_item"]),
+}
+
+
+def extract(soup, selectors):
+    return [[el.get_text(strip=True) or el.get("src") for el in soup.select(selector)] for selector in selectors]
+
+
+def measure(html, parser, strainer, selectors, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = extract(parsing.make_soup(html, strainer, parser=parser), selectors)
+    seconds = (time.perf_counter() - started) / iterations
+
+    tracemalloc.start()
+    soup = parsing.make_soup(html, strainer, parser=parser)
+    extract(soup, selectors)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="Parses per page and mode")
+    args = parser.parse_args()
+
+    print(f"{'page':<15} {'mode':<22} {'ms/page':>9} {'peak KiB':>9} {'speedup':>8}")
+    for name, (strainer, selectors) in PAGES.items():
+        with open(os.path.join(FIXTURES, name + ".html"), "rb") as file:
+            html = file.read()
+
+        baseline_seconds, _, baseline_result = measure(html, "html.parser", None, selectors, args.iterations)
+        for builder in parsing.available_parsers():
+            for label, restrict in (("full", None), ("strained", strainer)):
+                seconds, peak, result = measure(html, builder, restrict, selectors, args.iterations)
+                assert result == baseline_result, f"{builder} {label} disagrees with html.parser on {name}"
+                print(f"{name:<15} {builder + ' ' + label:<22} {seconds * 1000:>9.2f} {peak / 1024:>9.0f} "
+                      f"{baseline_seconds / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Replay post arrival logs against fixed-interval and adaptive board revisits.
+
+Reports list page requests and the mean delay from a post appearing to the visit that
+finds it, for the fixed interval setting, for the adaptive planner, and for the fixed
+interval giving the same mean delay as the adaptive planner.
+
+Arrival logs are JSON lines with a "board" and a "ts" in epoch seconds. Without --log a
+synthetic log is generated, with board rates spread over three orders of magnitude, a
+daily cycle and occasional bursts:
+    python -m benchmarks.revisit_benchmark --boards 60 --days 7
+    python -m benchmarks.revisit_benchmark --log arrivals.jsonl
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from src.scheduler.revisit import RevisitPlanner
+
+EPOCH = datetime(2024, 1, 1)
+
+
+def synthetic_log(boards, days, seed):
+    """
+    Generate {board: sorted arrival times in seconds} from inhomogeneous Poisson processes.
+    """
+    rng = random.Random(seed)
+    duration = days * 86400
+    arrivals = {}
+    for board in range(boards):
+        base = 10 ** rng.uniform(-1, 2) / 3600  # 0.1 to 100 posts per hour
+        bursts = [(rng.uniform(0, duration), rng.uniform(1800, 4 * 3600)) for _ in range(rng.randint(0, days))]
+        peak = base * 2 * 8  # upper bound of rate() for thinning
+        times, t = [], 0.0
+        while True:
+            t += rng.expovariate(peak)
+            if t >= duration:
+                break
+            rate = base * (1 + 0.8 * math.sin(2 * math.pi * t / 86400))
+            if any(start <= t < start + length for start, length in bursts):
+                rate *= 8
+            if rng.random() < rate / peak:
+                times.append(t)
+        arrivals[f"board{board}"] = times
+    return arrivals, duration
+
+
+def load_log(path):
+    arrivals = defaultdict(list)
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                record = json.loads(line)
+                arrivals[str(record["board"])].append(float(record["ts"]))
+    start = min(times[0] for times in arrivals.values() if times)
+    end = max(times[-1] for times in arrivals.values() if times)
+    return {board: sorted(t - start for t in times) for board, times in arrivals.items()}, end - start
+
+
+class Replay:
+    def __init__(self, arrivals, duration, page_size):
+        self.arrivals = arrivals
+        self.duration = duration
+        self.page_size = page_size
+        self.requests = 0
+        self.delay = 0.0
+        self.found = 0
+        self.cursor = {board: 0 for board in arrivals}
+
+    def visit(self, board, t):
+        """
+        Visit a board at time t and return the number of new posts it lists.
+        """
+        times = self.arrivals[board]
+        start, end = self.cursor[board], bisect_right(times, t)
+        self.cursor[board] = end
+        new = end - start
+        # One list page per page_size new posts, and one to see there is nothing new
+        self.requests += max(math.ceil(new / self.page_size), 1)
+        self.delay += sum(t - arrival for arrival in times[start:end])
+        self.found += new
+        return new
+
+    def result(self):
+        # Posts no visit reached before the log ended count as delayed until the end
+        for board, times in self.arrivals.items():
+            pending = times[self.cursor[board]:]
+            self.delay += sum(self.duration - arrival for arrival in pending)
+            self.found += len(pending)
+        return {"requests": self.requests, "mean_delay": self.delay / max(self.found, 1)}
+
+
+def fixed(arrivals, duration, interval, page_size, seed):
+    replay = Replay(arrivals, duration, page_size)
+    rng = random.Random(seed)
+    for board in arrivals:
+        t = rng.uniform(0, interval)
+        while t < duration:
+            replay.visit(board, t)
+            t += interval
+    return replay.result()
+
+
+def adaptive(arrivals, duration, default, page_size, seed, **planner_options):
+    replay = Replay(arrivals, duration, page_size)
+    planner = RevisitPlanner(**planner_options)
+    rng = random.Random(seed)
+    visits = [(rng.uniform(0, default), board) for board in arrivals]
+    heapq.heapify(visits)
+    while visits:
+        t, board = heapq.heappop(visits)
+        if t >= duration:
+            continue
+        new = replay.visit(board, t)
+        planner.observe("replay", board, new, now=EPOCH + timedelta(seconds=t))
+        heapq.heappush(visits, (t + planner.interval("replay", board, default), board))
+    return replay.result()
+
+
+def matching_interval(arrivals, duration, mean_delay, page_size, seed, low=60.0, high=86400.0):
+    """
+    Find the fixed interval whose mean delay equals mean_delay, by bisection.
+    """
+    for _ in range(30):
+        middle = (low + high) / 2
+        if fixed(arrivals, duration, middle, page_size, seed)["mean_delay"] > mean_delay:
+            high = middle
+        else:
+            low = middle
+    return low
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="JSON lines arrival log, synthetic if omitted")
+    parser.add_argument("--boards", type=int, default=60, help="Synthetic boards")
+    parser.add_argument("--days", type=int, default=7, help="Synthetic log length")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=10, help="Fixed interval, in minutes")
+    parser.add_argument("--page-size", type=int, default=20, help="Posts per list page")
+    parser.add_argument("--target-new", type=float, default=5.0)
+    parser.add_argument("--min-interval", type=float, default=2, help="In minutes")
+    parser.add_argument("--max-interval", type=float, default=360, help="In minutes")
+    parser.add_argument("--horizon", type=float, default=360, help="In minutes")
+    parser.add_argument("--budget", type=float, default=0, help="Board visits per hour, 0 for unlimited")
+    args = parser.parse_args()
+
+    if args.log:
+        arrivals, duration = load_log(args.log)
+    else:
+        arrivals, duration = synthetic_log(args.boards, args.days, args.seed)
+    default = args.interval * 60
+
+    baseline = fixed(arrivals, duration, default, args.page_size, args.seed)
+    planned = adaptive(
+        arrivals, duration, default, args.page_size, args.seed,
+        target_new=args.target_new,
+        min_interval=args.min_interval * 60,
+        max_interval=args.max_interval * 60,
+        horizon=args.horizon * 60,
+        budget=args.budget,
+    )
+    interval = matching_interval(arrivals, duration, planned["mean_delay"], args.page_size, args.seed)
+    matched = fixed(arrivals, duration, interval, args.page_size, args.seed)
+
+    posts = sum(len(times) for times in arrivals.values())
+    print(f"Boards: {len(arrivals)}, posts: {posts}, span: {duration / 86400:.1f} days")
+    rows = [
+        (f"Fixed {args.interval:g} min", baseline),
+        ("Adaptive", planned),
+        (f"Fixed {interval / 60:.1f} min (same delay)", matched),
+    ]
+    for name, result in rows:
+        print(f"{name:<32} {result['requests']:>9} requests  {result['mean_delay'] / 60:7.1f} min mean delay")
+    print(f"Requests saved at equal freshness: {1 - planned['requests'] / matched['requests']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare the columnar scoring engine with the per-item assign_scores loop, and argpartition
+top-k with a full sort.
+
+Runs offline on generated posts:
+    python -m benchmarks.scoring_benchmark --items 1000000 --keywords 50 --k 20
+"""
+import argparse
+import copy
+import random
+import time
+from src.data_preprocessing.scoring import ScoringEngine, assign_scores, columns_of
+
+SOURCES = ("dcinside", "nate", "fmkorea", "twitter", "reddit")
+
+
+def generate(items, keywords, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            "view_count": int(rng.lognormvariate(6, 2)),
+            "comment_count": int(rng.lognormvariate(2, 1.5)),
+            "sentiment_score": rng.uniform(-1, 1),
+            "source": rng.choice(SOURCES),
+            "keyword": f"keyword-{rng.randrange(keywords)}",
+        }
+        for _ in range(items)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20, help="Posts selected per keyword")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = generate(args.items, args.keywords, args.seed)
+    looped = copy.deepcopy(data)
+    engine = ScoringEngine()
+
+    started = time.perf_counter()
+    assign_scores(looped)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.assign_scores(data, batch_size=args.batch_size)
+    engine_seconds = time.perf_counter() - started
+
+    assert all(a["score"] == b["score"] for a, b in zip(looped, data)), "Engine and loop should agree"
+
+    columns = columns_of(data)
+    started = time.perf_counter()
+    scores = engine.score(columns, columns["source"])
+    score_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ranked = {}
+    for item in sorted(looped, key=lambda item: -item["score"]):
+        best = ranked.setdefault(item["keyword"], [])
+        if len(best) < args.k:
+            best.append(item["score"])
+    sort_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    selected = engine.top_k(scores, columns["keyword"], args.k)
+    top_k_seconds = time.perf_counter() - started
+
+    for keyword, rows in selected.items():
+        assert scores[rows].tolist() == ranked[keyword], f"Top {args.k} of {keyword} should agree"
+
+    print(f"Items:                  {args.items}, {args.keywords} keywords")
+    print(f"assign_scores loop:     {loop_seconds:.2f}s")
+    print(f"Engine assign_scores:   {engine_seconds:.2f}s ({loop_seconds / engine_seconds:.1f}x)")
+    print(f"Engine on columns:      {score_seconds * 1000:.1f}ms ({loop_seconds / score_seconds:.0f}x)")
+    print(f"Full sort top {args.k:<3}:      {sort_seconds:.2f}s")
+    print(f"argpartition top {args.k:<3}:   {top_k_seconds * 1000:.1f}ms ({sort_seconds / top_k_seconds:.0f}x)")
+    print(f"Column memory:          {sum(column.nbytes for column in columns.values()) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
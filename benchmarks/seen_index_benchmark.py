@@ -0,0 +1,62 @@
+"""
+Compare the in-memory seen-URL index with a per-URL find_one round trip.
+
+Requires a local mongod:
+    python -m benchmarks.seen_index_benchmark --uri mongodb://localhost:27017 --urls 200000
+"""
+import argparse
+import time
+from src.db.mongo_client import MongoDBClient
+from src.db.seen_index import SeenUrlIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="bench_seen_index")
+    parser.add_argument("--urls", type=int, default=200_000, help="URLs stored before lookups")
+    parser.add_argument("--lookups", type=int, default=5_000, help="Lookups per method, half of them hits")
+    args = parser.parse_args()
+
+    db_client = MongoDBClient(uri=args.uri, db_name=args.db)
+    collection = db_client.db["dcinside"]
+    collection.drop()
+    collection.create_index("url", unique=True)
+
+    urls = [f"https://gall.dcinside.com/mgallery/board/view/?id=bench&no={no}" for no in range(args.urls)]
+    for start in range(0, len(urls), 10_000):
+        collection.insert_many([{"url": url} for url in urls[start:start + 10_000]])
+
+    lookups = [urls[i * 2 % len(urls)] if i % 2 == 0 else f"https://example.com/missing/{i}" for i in range(args.lookups)]
+
+    started = time.perf_counter()
+    index = SeenUrlIndex.from_mongo(db_client, collections=("dcinside",))
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    round_trip_hits = sum(1 for url in lookups if collection.find_one({"url": url}, {"_id": 1}))
+    round_trip_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index_hits = sum(1 for url in lookups if url in index)
+    index_seconds = time.perf_counter() - started
+
+    assert round_trip_hits == index_hits, "Index and find_one should agree"
+
+    # Memory per URL at scale is dominated by the sorted digest array and the Bloom filter
+    projected = SeenUrlIndex(capacity=20_000_000)
+    projected_bytes = len(projected.bloom.bits) + 8 * 20_000_000
+
+    print(f"URLs stored:          {args.urls}")
+    print(f"Index load:           {load_seconds:.2f}s, {index.memory_bytes() / 2**20:.1f} MiB")
+    print(f"find_one round trips: {round_trip_seconds / args.lookups * 1e6:.1f} us/lookup")
+    print(f"Seen-URL index:       {index_seconds / args.lookups * 1e6:.1f} us/lookup")
+    print(f"Speedup:              {round_trip_seconds / index_seconds:.0f}x")
+    print(f"Projected 20M URLs:   {projected_bytes / 2**20:.0f} MiB")
+
+    db_client.client.drop_database(args.db)
+    db_client.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Local stand-in for the crawled sites, serving the saved pages in benchmarks/fixtures.
+
+Requests reach it through StandInAdapter, mounted on the shared transport's session, which
+sends every https URL to the stand-in with the original host as the first path segment.
+The crawlers, rate limiter and metrics still see the real hosts.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from requests.adapters import HTTPAdapter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Post numbers of consecutive list pages are this far apart, so every page lists new posts
+PAGE_STRIDE = 1000
+
+DCINSIDE_LIST_NO = re.compile(rb"(no=)(\d+)")
+NATE_LIST_NO = re.compile(rb'(href="/talk/)(\d+)')
+FMKOREA_LIST_NO = re.compile(rb"(fmkorea\.com/)(\d+)")
+NATE_COMMENT_NO = re.compile(rb"(cmt_)(\d+)")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as file:
+        return file.read()
+
+
+def _shift(pattern, body, offset):
+    return pattern.sub(lambda match: match.group(1) + str(int(match.group(2)) - offset).encode(), body)
+
+
+class SiteStandIn:
+    def __init__(self, latency=0.0, throttle_rate=0.0, retry_after=1, media_size=256 * 1024,
+                 video_size=8 * 1024 * 1024, host="127.0.0.1", port=0, seed=0):
+        """
+        Serve DCInside, Nate Pann and FM Korea list, post and comment pages, and media files.
+
+        :param latency: Seconds each response is delayed.
+        :param throttle_rate: Fraction of page requests answered with 429 and Retry-After.
+        :param retry_after: Retry-After seconds sent with a 429.
+        :param media_size: Bytes served per image.
+        :param video_size: Bytes served per video.
+        :param seed: Seed of the throttling draws, so runs throttle the same requests.
+        """
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.media_size = media_size
+        self.video_size = video_size
+        self.random = random.Random(seed)
+        self.pages = {
+            "dcinside_list": _fixture("dcinside_list.html"),
+            "dcinside_post": _fixture("dcinside_post.html"),
+            "dcinside_comments": json.loads(_fixture("dcinside_comments.json")),
+            "nate_list": _fixture("nate_list.html"),
+            "nate_post": _fixture("nate_post.html"),
+            "nate_comments": _fixture("nate_comments.html"),
+            "fmkorea_list": _fixture("fmkorea_list.html"),
+        }
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="site-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def stats(self):
+        """
+        :return: Dict of host -> {"requests", "bytes", "throttled"} served since the last reset.
+        """
+        with self._lock:
+            return {host: dict(counts) for host, counts in self._stats.items()}
+
+    def _count(self, host, size, throttled=False):
+        with self._lock:
+            counts = self._stats.setdefault(host, {"requests": 0, "bytes": 0, "throttled": 0})
+            counts["requests"] += 1
+            counts["bytes"] += size
+            counts["throttled"] += int(throttled)
+
+    def _throttled(self):
+        with self._lock:
+            return self.throttle_rate > 0 and self.random.random() < self.throttle_rate
+
+    def route(self, method, host, path, query, form):
+        """
+        Build the response to a request for host and path.
+
+        :return: Tuple of status, content type, and the body as bytes or a media size in bytes.
+        """
+        page = int((query.get("page") or form.get("comment_page") or ["1"])[0] or 1)
+        offset = (page - 1) * PAGE_STRIDE
+
+        if host == "gall.dcinside.com":
+            if path.startswith("/mgallery/board/lists"):
+                return 200, "text/html; charset=UTF-8", _shift(DCINSIDE_LIST_NO, self.pages["dcinside_list"], offset)
+            if path.startswith("/mgallery/board/view"):
+                # Every post links its own media, as on the site
+                post_no = (query.get("no") or ["0"])[0]
+                body = self.pages["dcinside_post"].replace(b"&no=", f"&no={post_no}_".encode())
+                return 200, "text/html; charset=UTF-8", body
+            if path.startswith("/board/comment") and method == "POST":
+                data = dict(self.pages["dcinside_comments"])
+                data["comments"] = [
+                    dict(comment, no=str(int(comment["no"]) - offset)) if comment.get("no") else comment
+                    for comment in data["comments"]
+                ]
+                return 200, "application/json", json.dumps(data, ensure_ascii=False).encode()
+        elif host == "pann.nate.com":
+            if path.startswith("/talk/reply/view"):
+                return 200, "text/html; charset=UTF-8", _shift(NATE_COMMENT_NO, self.pages["nate_comments"], (page - 1) * 100)
+            post = path.rsplit("/", 1)[-1]
+            if post.isdigit():
+                body = self.pages["nate_post"].replace(b"/new/imgs/", f"/new/imgs/{post}_".encode())
+                return 200, "text/html; charset=UTF-8", body
+            if path.startswith("/talk/"):
+                return 200, "text/html; charset=UTF-8", _shift(NATE_LIST_NO, self.pages["nate_list"], offset)
+        elif host == "www.fmkorea.com":
+            return 200, "text/html; charset=UTF-8", _shift(FMKOREA_LIST_NO, self.pages["fmkorea_list"], offset)
+        elif "viewmovie" in path or path.endswith((".mp4", ".webm")):
+            return 200, "video/mp4", self.video_size
+        elif host.startswith(("dcimg", "pimg")) or path.endswith((".jpg", ".png", ".gif")):
+            return 200, "image/jpeg", self.media_size
+        return 404, "text/plain", b"not found"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.respond("GET")
+
+            def do_POST(self):
+                self.respond("POST")
+
+            def respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode()) if length else {}
+                _, host, rest = self.path.split("/", 2)
+                target = urlsplit("/" + rest)
+                if standin.latency:
+                    time.sleep(standin.latency)
+
+                status, content_type, body = standin.route(method, host, target.path, parse_qs(target.query), form)
+                media = isinstance(body, int)
+                if not media and status == 200 and standin._throttled():
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(standin.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    standin._count(host, 0, throttled=True)
+                    return
+
+                size = body if media else len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                if media:
+                    self.write_media(self.path, size)
+                else:
+                    self.wfile.write(body)
+                standin._count(host, size)
+
+            def write_media(self, url, size):
+                # Files differ per URL so content addressing stores each one
+                chunk = hashlib.sha256(url.encode()).digest() * 2048
+                remaining = size
+                while remaining > 0:
+                    self.wfile.write(chunk[:remaining])
+                    remaining -= len(chunk)
+
+        return Handler
+
+
+class StandInAdapter(HTTPAdapter):
+    def __init__(self, base_url, **kwargs):
+        """
+        Transport adapter sending requests to the stand-in at base_url instead of their host.
+        """
+        self.base_url = base_url.rstrip("/")
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
@@ -1,18 +1,26 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # MongoDB Settings
     mongodb_uri: str
     mongodb_name: str
+    mongodb_bulk_max_docs: int = 500  # buffered documents per collection
+    mongodb_bulk_max_bytes: int = 4 * 1024 * 1024  # buffered BSON bytes per collection
+    mongodb_bulk_flush_interval: float = 5.0  # in seconds
 
     # DCInside Settings
     dcinside_gallery_id: str
     dcinside_interval: int = 10  # in minutes
+    dcinside_fetch_mode: str = "auto"  # auto, static or selenium
 
     # FM Korea Settings
     fm_korea_board_id: str
     fm_korea_interval: int = 10  # in minutes
 
+    # Nate Pann Settings
+    nate_interval: int = 10  # in minutes
+
     # X (Twitter) Settings
     x_api_key: str
     x_api_secret: str
@@ -28,5 +36,85 @@ class Settings(BaseSettings):
     reddit_subreddit: str
     reddit_interval: int = 15  # in minutes
 
+    # Scheduler Settings
+    scheduler_max_workers: int = 8  # crawl jobs running at once
+    scheduler_jitter: int = 30  # random delay added to each run, in seconds
+    scheduler_start_spread: int = 120  # first runs are spread over this many seconds
+    keyword_poll_interval: int = 30  # keyword reload delay without a change stream, in seconds
+
+    # Revisit Settings
+    revisit_mode: str = "adaptive"  # adaptive plans board visits from post velocity, fixed uses the *_interval settings
+    revisit_target_new: float = 5.0  # new posts a board visit should find on average
+    revisit_min_interval: int = 2  # in minutes
+    revisit_max_interval: int = 360  # in minutes
+    revisit_horizon: int = 360  # time constant of the post rate average, in minutes
+    revisit_budget: int = 0  # board visits per hour across all boards, 0 for unlimited
+
+    # Crawl Frontier Settings
+    crawl_mode: str = "local"  # local crawls in the scheduler, frontier queues work for src.worker processes
+    frontier_lease_seconds: int = 300  # leases not renewed for this long return to the queue
+    frontier_max_attempts: int = 5
+    frontier_worker_threads: int = 2  # items crawled at once per worker process
+
+    # Process Settings
+    shutdown_timeout: int = 60  # running crawls are waited on this long at shutdown, in seconds
+    health_port: int = 8081  # liveness and readiness probes on localhost, 0 to disable
+    worker_health_port: int = 8082  # probes of src.worker, 0 to disable
+
+    # HTTP Settings
+    http_max_per_host: int = 4  # concurrent requests per host
+    http_connect_timeout: float = 5.0  # in seconds
+    http_read_timeout: float = 30.0  # in seconds
+    http_max_retries: int = 3
+    http_backoff_factor: float = 0.5  # in seconds, doubled on each retry
+    http_pool_connections: int = 10  # hosts kept alive
+    http_pool_maxsize: int = 8  # keep-alive connections per host
+    http_rate: float = 4.0  # requests per second per host
+    http_burst: int = 8  # requests a host may receive at once after being idle
+    http_host_rates: Dict[str, float] = {}  # per-host rate overrides, e.g. {"gall.dcinside.com": 2}
+    http_min_rate: float = 0.1  # rate floor when backing off, in requests per second
+    http_rate_increase: float = 0.05  # requests per second regained per successful response
+    http_rate_decrease: float = 0.5  # rate factor applied on 429, 5xx and connection errors
+    http_breaker_failures: int = 5  # failures in a row that pause a host
+    http_breaker_cooldown: float = 60.0  # in seconds
+    http_max_wait: float = 30.0  # longer waits for a host fail fast, in seconds
+
+    # Parser Settings
+    html_parser: str = "auto"  # auto, lxml or html.parser
+    parse_workers: int = 0  # parser processes, 0 for one per core
+
+    # Preprocessing Settings
+    preprocess_batch_size: int = 500  # posts cleaned and written per batch
+    preprocess_workers: int = 0  # cleaning processes, 0 for one per core
+
+    # Comment Settings
+    comment_fanout: int = 4  # comment pages of one post requested at once
+    comment_max_pages: int = 50  # comment pages fetched per post at most
+
+    # Archive Settings
+    archive_pages: bool = True  # keep every fetched page for re-parsing
+    archive_root: Optional[str] = None  # defaults to data/archive in the project root
+    archive_segment_bytes: int = 256 * 1024 * 1024  # compressed bytes per segment file
+    archive_level: int = 3  # zstd compression level
+
+    # Tracing Settings
+    trace_sample_rate: float = 0.0  # fraction of list crawls and posts traced, 0 to disable
+    trace_path: Optional[str] = None  # defaults to data/traces.jsonl in the project root
+
+    # Selenium Settings
+    selenium_pool_size: int = 2  # headless drivers alive at once
+    selenium_max_pages_per_driver: int = 50  # pages before a driver is recycled
+    selenium_page_timeout: float = 10.0  # in seconds
+
+    # Media Settings
+    media_root: Optional[str] = None  # defaults to data/media in the project root
+    media_download_workers: int = 8  # concurrent media downloads
+    media_chunk_size: int = 256 * 1024  # in bytes
+    media_worker_interval: int = 30  # in seconds
+    media_bandwidth_limit: int = 0  # in bytes per second, 0 for unlimited
+    media_max_bytes: int = 50 * 1024 * 1024  # larger files are skipped
+    media_max_attempts: int = 5
+    media_retry_delay: float = 60.0  # in seconds, doubled on each retry
+
     class Config:
         env_file = ".env"
@@ -1,19 +1,103 @@
 import requests
+from src.crawlers.fetcher import AsyncFetcher
+from src.crawlers.parse_pool import get_parse_pool
+from src.crawlers.transport import get_transport
 
 class BaseCrawler:
-    def __init__(self):
+    def __init__(self, max_per_host=4):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
         }
+        self.fetcher = AsyncFetcher(max_per_host=max_per_host)
+        self.parse_pool = get_parse_pool()
+
+    def request(self, method, url, **kwargs):
+        """
+        Perform an HTTP request through the shared transport and return the response,
+        raising on HTTP errors.
+        """
+        kwargs.setdefault("headers", self.headers)
+        response = get_transport().request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
 
     def get_html(self, url):
         """
         Fetch HTML content from a URL.
         """
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.text
+            return self.request("GET", url).text
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    def get_content(self, url):
+        """
+        Fetch the raw body of a URL. Parsers detect the encoding themselves, so the page
+        reaches the parse pool without being decoded on the fetch thread.
+        """
+        try:
+            return self.request("GET", url).content
         except requests.exceptions.RequestException as e:
             print(f"Error fetching {url}: {e}")
             return None
+
+    def post(self, url, data=None, headers=None):
+        """
+        Send a form POST request and return the response.
+        """
+        try:
+            return self.request("POST", url, data=data, headers=headers or self.headers)
+        except requests.exceptions.RequestException as e:
+            print(f"Error posting to {url}: {e}")
+            return None
+
+    def stream(self, url, headers=None):
+        """
+        Open a streaming GET request and return the response.
+        """
+        try:
+            return self.request("GET", url, headers=headers or self.headers, stream=True)
+        except requests.exceptions.RequestException as e:
+            print(f"Error streaming {url}: {e}")
+            return None
+
+    async def get_html_async(self, url):
+        """
+        Fetch HTML content from a URL without blocking the event loop.
+        """
+        return await self.fetcher.submit(url, self.get_html, url)
+
+    async def get_content_async(self, url):
+        """
+        Fetch the raw body of a URL without blocking the event loop.
+        """
+        return await self.fetcher.submit(url, self.get_content, url)
+
+    async def post_async(self, url, data=None, headers=None):
+        """
+        Send a form POST request without blocking the event loop.
+        """
+        return await self.fetcher.submit(url, self.post, url, data=data, headers=headers)
+
+    async def stream_async(self, url, handler, headers=None):
+        """
+        Open a streaming GET request and pass the response to handler on a worker thread.
+        The host slot is held until handler returns, so the body is read within the limit.
+
+        :return: The handler result, or None if the request failed.
+        """
+        def consume():
+            response = self.stream(url, headers=headers)
+            if response is None:
+                return None
+            with response:
+                return handler(response)
+
+        return await self.fetcher.submit(url, consume)
+
+    def run_async(self, coro):
+        """
+        Run a crawl coroutine from synchronous code.
+        """
+        return self.fetcher.run(coro)
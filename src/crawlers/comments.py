@@ -0,0 +1,64 @@
+import asyncio
+
+
+async def collect_comments(fetch_page, known_ids=(), fanout=4, max_pages=50, newest_first=True):
+    """
+    Collect a paginated comment thread with a bounded number of concurrent page requests.
+
+    The first page tells how many comments and pages the thread has. The remaining pages are
+    fetched fanout at a time, starting from the newest end of the thread. Collection stops once
+    every comment the first page counted as new has been seen, or when a page holds only
+    known comments, since everything past it is already stored.
+
+    :param fetch_page: Coroutine function taking a 1-based page number and returning a dict with
+        "comments" (each with an "id"), "total" (comment count, or None if unknown) and "pages"
+        (last page number known from that response), or None if the request failed.
+    :param known_ids: Ids of comments already stored. Only comments not in it are returned.
+    :param fanout: Maximum number of comment pages requested at once.
+    :param max_pages: Upper bound on the number of pages fetched for one thread.
+    :param newest_first: Whether page 1 holds the newest comments. Otherwise pages are
+        walked from the last page back.
+    :return: New comments, deduplicated by id, in the order the site lists them.
+    """
+    known = set(known_ids)
+    first = await fetch_page(1)
+    if not first:
+        return []
+
+    pages = {1: first["comments"]}
+    total, last_page = first["total"], min(first["pages"], max_pages)
+    expected = None if total is None else max(total - len(known), 0)
+    first_ids = {comment["id"] for comment in first["comments"]}
+    new_ids = first_ids - known
+
+    remaining = list(range(2, last_page + 1))
+    if not newest_first:
+        remaining.reverse()
+    elif known and first_ids and first_ids <= known:
+        remaining = []
+    while remaining and (expected is None or len(new_ids) < expected):
+        wave, remaining = remaining[:fanout], remaining[fanout:]
+        results = await asyncio.gather(*(fetch_page(page) for page in wave))
+
+        reached_known = False
+        for page, result in zip(wave, results):
+            if not result:
+                continue
+            pages[page] = result["comments"]
+            ids = {comment["id"] for comment in result["comments"]}
+            new_ids |= ids - known
+            reached_known = reached_known or bool(known and ids and ids <= known)
+            # Page links are often shown a block at a time, so later pages can reveal more
+            if newest_first and result["pages"] > last_page:
+                remaining.extend(range(last_page + 1, min(result["pages"], max_pages) + 1))
+                last_page = min(result["pages"], max_pages)
+        if reached_known:
+            break
+
+    comments, seen = [], set(known)
+    for page in sorted(pages):
+        for comment in pages[page]:
+            if comment["id"] not in seen:
+                seen.add(comment["id"])
+                comments.append(comment)
+    return comments
@@ -1,28 +1,46 @@
-import os
-import time
-import hashlib
-import requests
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+import asyncio
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from src.crawlers.base_crawler import BaseCrawler
+from src.crawlers.comments import collect_comments
+from src.crawlers.driver_pool import get_driver_pool
+from src.crawlers.page_archive import get_page_archive
+from src.crawlers.rate_limiter import HostUnavailable
+from src.crawlers.transport import get_transport
+from src.crawlers.parsing import normalize_url, parse_dcinside_comments, parse_dcinside_list, parse_dcinside_post
+from src.db.crawl_state import CrawlStateStore, stored_high_water
+from src.db.media_queue import MediaQueue
+from src.db.seen_index import get_seen_index
+from src.metrics import DEDUPE_HITS
+from src.tracing import span, trace
+
+
+FETCH_MODES = ("auto", "static", "selenium")
 
 
 class DCInsideCrawler(BaseCrawler):
-    def __init__(self, db_client):
-        super().__init__()
+    def __init__(self, db_client, max_per_host=4, driver_pool=None, fetch_mode="auto", comment_fanout=4,
+                 comment_max_pages=50):
+        """
+        :param fetch_mode: How post pages are fetched. "static" uses plain HTTP only,
+            "selenium" always renders, and "auto" uses plain HTTP and falls back to
+            Selenium when the static page is incomplete.
+        :param comment_fanout: Comment pages of one post requested at once.
+        :param comment_max_pages: Comment pages fetched per post at most.
+        """
+        super().__init__(max_per_host=max_per_host)
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown DCInside fetch mode: {fetch_mode}")
         self.db_client = db_client
-        self.collection = self.db_client.db["dcinside"]
-
-        # Configure Selenium for headless mode
-        self.chrome_options = Options()
-        self.chrome_options.add_argument("--headless")
-        self.chrome_options.add_argument("--disable-gpu")
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
+        self.crawl_state = CrawlStateStore(db_client)
+        self.seen_index = get_seen_index(db_client)
+        self.media_queue = MediaQueue(db_client)
+        self.fetch_mode = fetch_mode
+        self.fetch_stats = {"static": 0, "selenium": 0, "fallback": 0}
+        self.comment_fanout = comment_fanout
+        self.comment_max_pages = comment_max_pages
+
+        # Headless drivers are shared across crawler instances
+        self.driver_pool = driver_pool or get_driver_pool()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
             "Referer": "https://gall.dcinside.com/",
@@ -30,130 +48,215 @@ class DCInsideCrawler(BaseCrawler):
 
     def get_selenium_html(self, url):
         """
-        Fetch HTML content using Selenium.
+        Fetch HTML content using a pooled Selenium driver, paced by the host's rate limiter.
+        Rendered pages are archived like fetched ones.
         """
+        limiter = get_transport().limiter
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(url)
-            time.sleep(3)  # Wait for page to load
-            html = driver.page_source
-            driver.quit()
-            return html
+            limiter.acquire(url)
+            html = self.driver_pool.fetch(url, wait_selector=".writing_view_box")
+        except HostUnavailable as e:
+            print(f"[DCInside] Skipping Selenium fetch of {url}: {e}")
+            return None
         except Exception as e:
+            limiter.record(url, error=True)
             print(f"[DCInside] Error fetching HTML with Selenium for URL: {url} -> {e}")
             return None
+        limiter.record(url, 200)
+        archive = get_page_archive()
+        if archive is not None and html:
+            archive.append(url, html.encode("utf-8"), "text/html; charset=utf-8; rendered")
+        return html
+
+    async def fetch_post_page_async(self, post_url):
+        """
+        Fetch a post page according to the fetch mode and parse it on the parse pool.
+        """
+        if self.fetch_mode != "selenium":
+            with span("detail_fetch"):
+                html = await self.get_content_async(post_url)
+            with span("parse_post"):
+                page = await self.parse_pool.parse(parse_dcinside_post, html) if html else None
+            if page and (self.fetch_mode == "static" or page["complete"]):
+                self.fetch_stats["static"] += 1
+                return page
+            if self.fetch_mode == "static":
+                return None
+            self.fetch_stats["fallback"] += 1
+            print(f"[DCInside] Static page incomplete, falling back to Selenium: {post_url}")
+
+        # Selenium renders take a host slot too, which bounds the number of live browsers
+        with span("selenium_render"):
+            html = await self.fetcher.submit(post_url, self.get_selenium_html, post_url)
+        if not html:
+            return None
+        self.fetch_stats["selenium"] += 1
+        with span("parse_post"):
+            return await self.parse_pool.parse(parse_dcinside_post, html)
 
-    def fetch_posts(self, gallery_id, max_pages=1):
+    def fetch_posts(self, gallery_id, max_pages=1, frontier=None):
         """
         Fetch posts from the specified number of pages in a gallery.
+
+        :return: Number of new posts found.
         """
-        for page in range(1, max_pages + 1):
-            url = f"https://gall.dcinside.com/mgallery/board/lists/?id={gallery_id}&page={page}&exception_mode=recommend"
-            html = self.get_html(url)
-            if html:
-                post_urls = self.parse_post_urls(html, gallery_id)
-                for post_url in post_urls:
-                    post_details = self.parse_post_details(post_url, gallery_id)
-                    if post_details:
-                        self.store_post(post_details)
+        with trace("cycle", "dcinside", gallery_id):
+            return self.run_async(self.fetch_posts_async(gallery_id, max_pages, frontier))
 
-    def parse_post_urls(self, html, gallery_id):
+    async def fetch_posts_async(self, gallery_id, max_pages=1, frontier=None):
         """
-        Extract URLs of posts with required conditions and construct the post URLs.
+        Walk list pages until one holds only already-seen posts, or none above the gallery's
+        high-water mark, fetching and storing the new posts of each page concurrently. Posts
+        already in the seen-URL index are dropped before any detail fetch. The list is ranked
+        by recommendations, so an older post may join it late: the mark only ends the walk and
+        never drops a post. It moves up only over posts whose documents were written.
+
+        :param frontier: CrawlFrontier to queue new posts on for any worker, instead of fetching them here.
+        :return: Number of new posts found.
         """
-        soup = BeautifulSoup(html, "html.parser")
-        rows = soup.select("tbody tr.ub-content")
-        post_urls = []
+        high_water = await self.fetcher.run_blocking(self.crawl_state.get_high_water, "dcinside", gallery_id)
+        tried = []
+        stored = set()
+        found = 0
 
-        for row in rows:
-            category_el = row.select_one(".gall_subject")
-            if not category_el or category_el.text.strip() != "일반":
+        for page in range(1, max_pages + 1):
+            url = f"https://gall.dcinside.com/mgallery/board/lists/?id={gallery_id}&page={page}&exception_mode=recommend"
+            with span("list_fetch"):
+                html = await self.get_content_async(url)
+            if not html:
                 continue
 
-            # Extract views, recommendations, and comments
-            views_text = row.select_one(".gall_count")
-            recommend_text = row.select_one(".gall_recommend")
-            comments_el = row.select_one(".reply_numbox")
-
-            views = int(views_text.text.strip().replace(",", "")) if views_text and views_text.text.strip().replace(",", "").isdigit() else 0
-            recommend = int(recommend_text.text.strip().replace(",", "")) if recommend_text and recommend_text.text.strip().replace(",", "").isdigit() else 0
-            comments = int(comments_el.text.strip("[]")) if comments_el and comments_el.text.strip("[]").isdigit() else 0
-
-            # Apply filters
-            if views < 500 or recommend < 10 or comments < 5:
-                continue
+            with span("parse_list"):
+                post_urls = await self.parse_pool.parse(parse_dcinside_list, html, gallery_id)
+            new_urls = [post_url for post_url in post_urls if post_url not in self.seen_index]
+            DEDUPE_HITS.inc(len(post_urls) - len(new_urls), ("dcinside", "list"))
+            if post_urls and not new_urls:
+                print(f"[DCInside] No new posts on page {page} for gallery {gallery_id}, stopping")
+                break
+            # Later pages hold older posts; unseen ones on this page are still fetched
+            last_page = all(self.post_number(post_url) <= high_water for post_url in post_urls)
+            found += len(new_urls)
+
+            with span("posts"):
+                if frontier:
+                    # Queued posts are the frontier's to retry
+                    await self.fetcher.run_blocking(frontier.enqueue_posts, "dcinside", gallery_id, new_urls)
+                    stored.update(self.post_number(post_url) for post_url in new_urls)
+                else:
+                    await asyncio.gather(*(
+                        self.process_post_async(post_url, gallery_id, lambda url: stored.add(self.post_number(url)))
+                        for post_url in new_urls
+                    ))
+            tried.extend(self.post_number(post_url) for post_url in new_urls)
+            if last_page:
+                print(f"[DCInside] No posts above the high-water mark on page {page} for gallery {gallery_id}, stopping")
+                break
+
+        # The mark may only cover posts already in MongoDB, or a crash would lose buffered ones
+        await self.fetcher.run_blocking(self.db_client.flush_writes)
+        newest = stored_high_water(high_water, tried, stored)
+        if newest > high_water:
+            await self.fetcher.run_blocking(self.crawl_state.update_high_water, "dcinside", gallery_id, newest)
+        return found
+
+    def process_post(self, post_url, gallery_id):
+        """
+        Fetch the details of a single post and store them.
+        """
+        return self.run_async(self.process_post_async(post_url, gallery_id))
 
-            # Construct post URL using id and no
-            post_el = row.select_one(".gall_tit a")
-            if post_el:
-                post_no = post_el["href"].split("no=")[1].split("&")[0]
-                post_url = f"https://gall.dcinside.com/mgallery/board/view/?id={gallery_id}&no={post_no}&exception_mode=recommend"
-                post_urls.append(post_url)
+    async def process_post_async(self, post_url, gallery_id, on_written=None):
+        """
+        Fetch the details of a single post and store them.
 
-        return post_urls
+        :param on_written: Called with the post URL once the post is stored, as in store_post.
+        :return: True if the post was fetched and handed to store_post.
+        """
+        with trace("post", "dcinside", post_url):
+            post_details = await self.parse_post_details_async(post_url, gallery_id)
+            if not post_details:
+                return False
+            with span("store"):
+                await self.fetcher.run_blocking(self.store_post, post_details, on_written)
+            return True
 
     @staticmethod
-    def sanitize_filename(url):
+    def post_number(post_url):
         """
-        Sanitize a filename extracted from a URL.
-        Use a hash if the filename is invalid or contains query parameters.
+        Extract the numeric post number from a post URL.
         """
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        if "?" in filename or "&" in filename or not filename:
-            # Use hash for filenames with query parameters or invalid names
-            filename = hashlib.md5(url.encode()).hexdigest()
-        return filename
+        post_no = post_url.split("no=")[1].split("&")[0]
+        return int(post_no) if post_no.isdigit() else 0
+
+    def parse_post_urls(self, html, gallery_id):
+        """
+        Extract URLs of posts with required conditions and construct the post URLs.
+        """
+        return parse_dcinside_list(html, gallery_id)
 
     def normalize_url(self, url):
         """
         Normalize a URL to ensure it has a valid scheme.
         """
-        if url.startswith("//"):
-            return f"https:{url}"  # Add HTTPS scheme
-        elif not url.startswith("http"):
-            return None  # Skip invalid URLs
-        return url
+        return normalize_url(url)
 
-    def download_file(self, url, save_path):
+    def fetch_comments(self, post_id, post_no, known_ids=()):
         """
-        Download a file from the given URL and save it to the specified path with the correct extension.
+        Fetch the full comment thread of a post from DCInside.
         """
-        try:
-            response = requests.get(url, headers=self.headers, stream=True)
-            response.raise_for_status()
-
-            # Get Content-Type to determine the file extension
-            content_type = response.headers.get("Content-Type", "")
-            if "image/jpeg" in content_type:
-                extension = ".jpg"
-            elif "image/png" in content_type:
-                extension = ".png"
-            elif "image/gif" in content_type:
-                extension = ".gif"
-            else:
-                extension = ".jpg"
-
-            # Sanitize file name and apply extension
-            sanitized_filename = self.sanitize_filename(url) + extension
-            save_path = os.path.join(os.path.dirname(save_path), sanitized_filename)
-
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-            # Save the file
-            with open(save_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    file.write(chunk)
-            print(f"[Image Test] Saved file: {save_path}")
-            return save_path
-        except Exception as e:
-            print(f"[Image Test] Error downloading file: {url} -> {e}")
-            return None
+        return self.run_async(self.fetch_comments_async(post_id, post_no, known_ids))
+
+    async def fetch_comments_async(self, post_id, post_no, known_ids=()):
+        """
+        Fetch every comment page of a post concurrently, skipping comments in known_ids.
+        Comments are listed oldest first, so new comments are looked for from the last page back.
+        """
+        async def fetch_page(page):
+            url, headers, data = self.comment_request(post_id, post_no, page)
+            return self.parse_comments(await self.post_async(url, data=data, headers=headers))
+
+        return await collect_comments(
+            fetch_page,
+            known_ids=known_ids,
+            fanout=self.comment_fanout,
+            max_pages=self.comment_max_pages,
+            newest_first=False,
+        )
+
+    def refresh_comments(self, post_url):
+        """
+        Append comments posted since a stored post was crawled.
+        """
+        return self.run_async(self.refresh_comments_async(post_url))
 
-    def fetch_comments(self, post_id, post_no, page=1):
+    async def refresh_comments_async(self, post_url):
         """
-        Fetch comments from DCInside using a POST request.
+        Fetch only the comments a stored post does not have yet and append them.
+
+        :return: Number of comments added.
+        """
+        collection = self.db_client.db["dcinside"]
+        post = await self.fetcher.run_blocking(
+            collection.find_one, {"url": post_url}, {"name": 1, "no": 1, "comments.id": 1}
+        )
+        if not post:
+            return 0
+        stored = post.get("comments", [])
+        known_ids = [comment["id"] for comment in stored if "id" in comment]
+        if len(known_ids) < len(stored):
+            # Posts stored before comments had ids are refetched whole
+            comments = await self.fetch_comments_async(post["name"], post["no"])
+            update = {"$set": {"comments": comments}}
+        else:
+            comments = await self.fetch_comments_async(post["name"], post["no"], known_ids)
+            update = {"$push": {"comments": {"$each": comments}}}
+        update.setdefault("$set", {})["comments_refreshed_at"] = datetime.now()
+        await self.fetcher.run_blocking(collection.update_one, {"_id": post["_id"]}, update)
+        return len(comments)
+
+    def comment_request(self, post_id, post_no, page=1):
+        """
+        Build the URL, headers and form data of a comment page request.
         """
         url = "https://gall.dcinside.com/board/comment/"
         headers = {
@@ -179,121 +282,84 @@ class DCInsideCrawler(BaseCrawler):
             "board_type": "",
             "_GALLTYPE_": "M",
         }
+        return url, headers, data
 
+    def parse_comments(self, response):
+        """
+        Extract one page of comments from a comment endpoint response.
+
+        :return: Dict with "comments", "total" and "pages", or None if the response is unusable.
+        """
+        if response is None:
+            return None
         try:
-            response = requests.post(url, headers=headers, data=data)
-            response.raise_for_status()
-
-            json_data = response.json()
-            if "comments" in json_data:
-                return [
-                    {
-                        "author": comment.get("name", "Unknown"),
-                        "content": comment.get("memo", "No Content"),
-                        "date": comment.get("reg_date", "Unknown"),
-                    }
-                    for comment in json_data["comments"]
-                ]
-            else:
-                print("[DCInside] No comments found in the response.")
-                return []
-        except requests.exceptions.RequestException as e:
+            return parse_dcinside_comments(response.json())
+        except ValueError as e:
             print(f"[DCInside] Error fetching comments: {e}")
-            return []
+            return None
 
     def parse_post_details(self, post_url, keyword):
         """
-        Fetch detailed content, media (images/videos), and comments.
+        Fetch detailed content, media URLs (images/videos), and comments.
         """
-        html = self.get_selenium_html(post_url)  # Fetch HTML using Selenium
-        if not html:
-            print(f"[DCInside] Failed to fetch HTML for URL: {post_url}")
-            return None
+        return self.run_async(self.parse_post_details_async(post_url, keyword))
 
-        soup = BeautifulSoup(html, "html.parser")
+    async def parse_post_details_async(self, post_url, keyword):
+        """
+        Fetch detailed content and comments. Media URLs are stored as pending.
+        """
         try:
-            post_no = post_url.split("no=")[1].split("&")[0]
-            title_el = soup.select_one(".title_subject")
-            title = title_el.text.strip() if title_el else "No Title"
-
-            # Extract views
-            views_el = soup.select_one(".gall_count")
-            views_text = views_el.text.strip().replace("조회 ", "").replace(",", "") if views_el else "0"
-            views = int(views_text) if views_text.isdigit() else 0
-
-            # Extract recommendations
-            recommend_el = soup.select_one(".gall_recommend")
-            recommend_text = recommend_el.text.strip().replace("추천 ", "").replace(",", "") if recommend_el else "0"
-            recommendations = int(recommend_text) if recommend_text.isdigit() else 0
-
-            # Extract content
-            content_el = soup.select_one(".writing_view_box")
-            content = content_el.text.strip() if content_el else "No Content"
-
-            # Media initialization
-            media = {"images": [], "videos": []}
-
-            # Extract images
-            image_elements = soup.select(".writing_view_box img")
-            if image_elements:
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                media_dir = os.path.join(current_dir, f"../../data/dcinside/{keyword}_{post_no}")
-                images_dir = os.path.join(media_dir, "images")
-
-                # Ensure directories exist
-                os.makedirs(images_dir, exist_ok=True)
-
-                for img_el in image_elements:
-                    img_url = img_el["src"]
-                    if img_url:
-                        image_path = os.path.join(images_dir, self.sanitize_filename(img_url))
-                        downloaded_path = self.download_file(img_url, image_path)
-                        if downloaded_path:
-                            media["images"].append(downloaded_path)
-
-            # Extract videos (if applicable)
-            video_elements = soup.select(".writing_view_box video")
-            if video_elements:
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                media_dir = os.path.join(current_dir, f"../../data/dcinside/{keyword}_{post_no}")
-                videos_dir = os.path.join(media_dir, "videos")
-
-                # Ensure directories exist
-                os.makedirs(videos_dir, exist_ok=True)
-
-                for video_el in video_elements:
-                    video_url = video_el["src"]
-                    if video_url:
-                        video_path = os.path.join(videos_dir, self.sanitize_filename(video_url))
-                        downloaded_path = self.download_file(video_url, video_path)
-                        if downloaded_path:
-                            media["videos"].append(downloaded_path)
-
-            # Fetch comments
-            comments = self.fetch_comments(keyword, post_no)
-
-            return {
-                "name": keyword,
-                "no": post_no,
-                "title": title,
-                "views": views,
-                "recommendations": recommendations,
-                "content": content,
-                "media": media,
-                "comments": comments,
-                "url": post_url,
-                "collected_at": datetime.now()
-            }
+            page = await self.fetch_post_page_async(post_url)
         except Exception as e:
             print(f"[DCInside] Failed to parse post details for URL: {post_url} -> {e}")
             return None
+        if not page:
+            print(f"[DCInside] Failed to fetch HTML for URL: {post_url}")
+            return None
 
-    def store_post(self, post):
+        post_no = post_url.split("no=")[1].split("&")[0]
+        # Media is downloaded later by the media worker
+        media = {
+            "images": [{"url": url, "status": "pending"} for url in page["images"]],
+            "videos": [{"url": url, "status": "pending"} for url in page["videos"]],
+        }
+        with span("comments"):
+            comments = await self.fetch_comments_async(keyword, post_no)
+
+        return {
+            "name": keyword,
+            "no": post_no,
+            "title": page["title"],
+            "views": page["views"],
+            "recommendations": page["recommendations"],
+            "content": page["content"],
+            "media": media,
+            "media_status": "pending" if media["images"] or media["videos"] else "complete",
+            "comments": comments,
+            "url": post_url,
+            "collected_at": datetime.now()
+        }
+
+    def store_post(self, post, on_written=None):
         """
-        Store a single post in MongoDB.
+        Queue a single post for a buffered write to MongoDB.
+
+        :param on_written: Called with the post URL once the post is stored or found already stored.
         """
-        if not self.collection.find_one({"url": post["url"]}):
-            self.collection.insert_one(post)
-            print(f"[DCInside] Stored post: {post['title']}")
-        else:
+        if post["url"] in self.seen_index:
             print(f"[DCInside] Duplicate skipped: {post['title']}")
+            if on_written:
+                on_written(post["url"])
+            return False
+
+        # Only stored posts count as seen, so a failed flush leaves the post to be fetched again
+        def written():
+            self.seen_index.add(post["url"])
+            if on_written:
+                on_written(post["url"])
+
+        self.db_client.buffer_insert("dcinside", post, on_written=written)
+        with span("media"):
+            self.media_queue.enqueue("dcinside", post, self.headers)
+        print(f"[DCInside] Queued post: {post['title']}")
+        return True
@@ -0,0 +1,190 @@
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from src.metrics import SELENIUM_SECONDS
+
+
+def headless_chrome_options():
+    """
+    Build the Chrome options used for headless crawling.
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    return chrome_options
+
+
+def headless_chrome():
+    """
+    Start a headless Chrome driver.
+    """
+    return webdriver.Chrome(options=headless_chrome_options())
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class ChromeDriverPool:
+    def __init__(self, size=2, max_pages_per_driver=50, page_timeout=10, driver_factory=headless_chrome):
+        """
+        Bounded pool of long-lived headless Chrome drivers.
+
+        :param size: Maximum number of drivers alive at the same time.
+        :param max_pages_per_driver: Pages rendered before a driver is recycled.
+        :param page_timeout: Seconds to wait for the awaited element of a page.
+        :param driver_factory: Callable starting a new driver.
+        """
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.page_timeout = page_timeout
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._live = 0
+        self._pages = 0
+        self._retired_pages = 0
+        self._retired = 0
+        self._restarts = 0
+
+    def _start_driver(self):
+        driver = self.driver_factory()
+        with self._lock:
+            self._live += 1
+        return _PooledDriver(driver)
+
+    def _retire(self, pooled, crashed=False):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"[DriverPool] Error closing driver: {e}")
+        with self._lock:
+            self._live -= 1
+            self._retired += 1
+            self._retired_pages += pooled.pages
+            if crashed:
+                self._restarts += 1
+
+    @contextmanager
+    def driver(self):
+        """
+        Check out a driver for one page. The driver is recycled after max_pages_per_driver
+        pages, or immediately if the caller raises.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._start_driver()
+
+            crashed = True
+            try:
+                yield pooled.driver
+                crashed = False
+            finally:
+                pooled.pages += 1
+                with self._lock:
+                    self._pages += 1
+                if crashed or self._closed or pooled.pages >= self.max_pages_per_driver:
+                    self._retire(pooled, crashed=crashed)
+                else:
+                    self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    def fetch(self, url, wait_selector=None):
+        """
+        Render a page and return its HTML once wait_selector is present.
+        If the element never appears, the page is returned as rendered so far.
+        """
+        with self.driver() as driver, SELENIUM_SECONDS.time():
+            driver.get(url)
+            if wait_selector:
+                try:
+                    WebDriverWait(driver, self.page_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                    )
+                except TimeoutException:
+                    print(f"[DriverPool] Timed out waiting for {wait_selector}: {url}")
+            return driver.page_source
+
+    def metrics(self):
+        """
+        Return pool usage counters.
+        """
+        with self._lock:
+            drivers = self._retired + self._live
+            return {
+                "pool_size": self.size,
+                "live_drivers": self._live,
+                "pages": self._pages,
+                "pages_per_driver": round(self._pages / drivers, 2) if drivers else 0,
+                "retired_drivers": self._retired,
+                "driver_restarts": self._restarts,
+            }
+
+    def close(self):
+        """
+        Quit every idle driver. Drivers still checked out are quit when returned.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._retire(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure_driver_pool(settings):
+    """
+    Replace the shared driver pool with one built from the application settings.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ChromeDriverPool(
+            size=settings.selenium_pool_size,
+            max_pages_per_driver=settings.selenium_max_pages_per_driver,
+            page_timeout=settings.selenium_page_timeout,
+        )
+    return _pool
+
+
+def get_driver_pool():
+    """
+    Return the shared driver pool, creating one with default settings if needed.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ChromeDriverPool()
+        return _pool
+
+
+def close_driver_pool():
+    """
+    Close the shared driver pool, if one was created.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,61 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class AsyncFetcher:
+    def __init__(self, max_per_host=4, max_workers=32):
+        """
+        Run blocking HTTP calls on a thread pool from asyncio code.
+
+        :param max_per_host: Maximum number of in-flight requests per host.
+        :param max_workers: Size of the worker thread pool used for a crawl run.
+        """
+        self.max_per_host = max_per_host
+        self.max_workers = max_workers
+        self._loop = None
+        self._semaphores = {}
+
+    def _host_semaphore(self, url):
+        """
+        Return the semaphore limiting concurrency for the host of a URL.
+        Semaphores are bound to an event loop, so they are rebuilt for every new loop.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._semaphores[host]
+
+    async def submit(self, url, func, *args, **kwargs):
+        """
+        Run a blocking call for a URL once a slot for its host is free.
+        """
+        async with self._host_semaphore(url):
+            return await self.run_blocking(func, *args, **kwargs)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """
+        Run a blocking call on the worker pool without taking a host slot.
+        The call sees the caller's context variables, so trace spans nest across the pool.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+
+    def run(self, coro):
+        """
+        Run a coroutine to completion on a fresh event loop with a sized worker pool.
+        """
+        async def runner():
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+            )
+            return await coro
+
+        return asyncio.run(runner())
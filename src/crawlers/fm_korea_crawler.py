@@ -1,5 +1,8 @@
 from src.crawlers.base_crawler import BaseCrawler
+from src.crawlers.parsing import parse_fmkorea_list
 from src.db.mongo_client import MongoDBClient
+from src.db.crawl_state import CrawlStateStore, stored_high_water
+from src.metrics import DEDUPE_HITS
 import re
 
 class FMKoreaCrawler(BaseCrawler):
@@ -7,48 +10,66 @@ class FMKoreaCrawler(BaseCrawler):
         super().__init__()
         self.db_client = db_client
         self.base_url = "https://www.fmkorea.com/"
+        self.crawl_state = CrawlStateStore(db_client)
 
     def fetch_posts(self, board_id, max_pages=5):
         """
-        Fetch posts from an FM Korea board.
+        Fetch posts from an FM Korea board, stopping at the first page with no posts
+        above the board's high-water mark. The mark moves up only over posts whose documents
+        were written.
+
+        :return: Number of new posts found.
         """
+        high_water = self.crawl_state.get_high_water("fmkorea", board_id)
+        tried = []
+        stored = set()
+        found = 0
         for page in range(1, max_pages + 1):
             url = f"{self.base_url}{board_id}?page={page}"
-            html = self.get_html(url)
+            html = self.get_content(url)
             if html:
-                posts = self.parse_posts(html)
-                self.store_posts(posts)
+                # Parsing on the pool leaves the GIL to crawlers running on other scheduler threads
+                posts = self.parse_pool.run(parse_fmkorea_list, html)
+                new_posts = [post for post in posts if self.post_number(post["url"]) > high_water]
+                DEDUPE_HITS.inc(len(posts) - len(new_posts), ("fmkorea", "list"))
+                if posts and not new_posts:
+                    print(f"[FM Korea] No new posts on page {page} for {board_id}, stopping")
+                    break
+                self.store_posts(new_posts, board_id, lambda url: stored.add(self.post_number(url)))
+                found += len(new_posts)
+                tried.extend(self.post_number(post["url"]) for post in new_posts)
+
+        # The mark may only cover posts already in MongoDB, or a crash would lose buffered ones
+        self.db_client.flush_writes()
+        newest = stored_high_water(high_water, tried, stored)
+        if newest > high_water:
+            self.crawl_state.update_high_water("fmkorea", board_id, newest)
+        return found
+
+    @staticmethod
+    def post_number(url):
+        """
+        Extract the document number from a post URL, or 0 if there is none.
+        """
+        match = re.search(r'document_srl=(\d+)', url) or re.search(r'/(\d+)(?:[/?#]|$)', url)
+        return int(match.group(1)) if match else 0
 
     def parse_posts(self, html):
         """
         Parse HTML to extract posts.
         """
-        posts = []
-        row_pattern = re.compile(r'<tr[^>]*>(.*?)</tr>', re.DOTALL)
-        title_pattern = re.compile(r'<a[^>]*href="([^"]+)"[^>]*>(.*?)</a>', re.DOTALL)
-        for match in row_pattern.finditer(html):
-            row_html = match.group(1)
-            title_match = title_pattern.search(row_html)
-            if not title_match:
-                continue
-
-            url = title_match.group(1)
-            title = re.sub(r'<[^>]+>', '', title_match.group(2)).strip()
-            posts.append({"title": title, "url": url, "source": "fmkorea"})
-        return posts
-
-    def store_posts(self, posts, keyword):
-        collection_name = "fmkorea"
-        collection = self.db_client.db[collection_name]
+        return parse_fmkorea_list(html)
+
+    def store_posts(self, posts, keyword, on_written=None):
+        """
+        Queue posts for a buffered write to MongoDB.
 
-        if collection_name not in self.db_client.db.list_collection_names():
-            print(f"[FM Korea] Creating collection: {collection_name}")
-            collection.create_index("url", unique=True)
+        :param on_written: Called with the URL of each post once it is stored or found already stored.
+        """
+        collection_name = "fmkorea"
 
         for post in posts:
             post["name"] = keyword
-            try:
-                collection.insert_one(post)
-                print(f"[FM Korea] Inserted: {post['title']} for {keyword} in {collection_name}")
-            except Exception as e:
-                print(f"[FM Korea] Duplicate or error: {post['title']} for {keyword} in {collection_name} -> {e}")
+            written = (lambda url=post["url"]: on_written(url)) if on_written else None
+            self.db_client.buffer_insert(collection_name, post, on_written=written)
+        print(f"[FM Korea] Queued {len(posts)} posts for {keyword} in {collection_name}")
@@ -0,0 +1,232 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+import requests
+from src.crawlers.transport import get_transport
+from src.metrics import MEDIA_BYTES, MEDIA_DOWNLOADS, MEDIA_SECONDS
+
+DEFAULT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/media"))
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "video/mp4": ".mp4",
+    "video/webm": ".webm",
+}
+
+
+class MediaTooLargeError(Exception):
+    """
+    Raised when a media file exceeds the configured size cap.
+    """
+
+
+class MediaStore:
+    def __init__(self, db_client, root=None, max_workers=8, chunk_size=256 * 1024):
+        """
+        Download media into storage addressed by the SHA-256 of the content.
+        Each file is stored once however many posts reference it, and the media collection
+        maps source URLs to stored files so known URLs are never downloaded again.
+
+        :param db_client: MongoDBClient instance.
+        :param root: Directory holding the stored files.
+        :param max_workers: Maximum number of concurrent downloads.
+        :param chunk_size: Bytes read from the network per write.
+        """
+        self.collection = db_client.db["media"]
+        self.root = root or DEFAULT_ROOT
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media")
+        self._lock = threading.Lock()
+        self.stats = {"downloaded": 0, "known_url": 0, "known_content": 0, "failed": 0, "bytes": 0}
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            self.stats[field] += amount
+        if field == "bytes":
+            MEDIA_BYTES.inc(amount)
+        else:
+            MEDIA_DOWNLOADS.inc(amount, (field,))
+
+    def path_for(self, sha256, extension):
+        """
+        Return the storage path of a content hash, fanned out over two directory levels.
+        """
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256 + extension)
+
+    @staticmethod
+    def extension_for(content_type, url):
+        """
+        Pick a file extension from the Content-Type, falling back to the URL path.
+        """
+        content_type = content_type.split(";")[0].strip().lower()
+        if content_type in EXTENSIONS:
+            return EXTENSIONS[content_type]
+        _, extension = os.path.splitext(urlparse(url).path)
+        if extension and len(extension) <= 5:
+            return extension.lower()
+        return mimetypes.guess_extension(content_type) or ".jpg"
+
+    @staticmethod
+    def reference(document):
+        """
+        Reduce a media document to the reference stored on posts.
+        """
+        return {"url": document["url"], "sha256": document["sha256"], "path": document["path"]}
+
+    def lookup(self, url):
+        """
+        Return the reference of an already stored URL, or None.
+        """
+        document = self.collection.find_one({"url": url}, {"_id": 0, "url": 1, "sha256": 1, "path": 1})
+        return self.reference(document) if document else None
+
+    def _write_temp(self, response, max_bytes=None, throttle=None):
+        """
+        Stream a response to a temporary file while hashing it.
+        """
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as file:
+            try:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise MediaTooLargeError(f"more than {max_bytes} bytes")
+                    if throttle:
+                        throttle(len(chunk))
+                    digest.update(chunk)
+                    file.write(chunk)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        return digest.hexdigest(), size, file.name
+
+    def fetch(self, url, headers=None, max_bytes=None, throttle=None):
+        """
+        Download a media URL unless it is already stored, raising on failure.
+
+        :param max_bytes: Abort files larger than this many bytes.
+        :param throttle: Callable invoked with the size of each chunk before it is written.
+        :return: Reference dict with url, sha256 and path.
+        """
+        known = self.lookup(url)
+        if known:
+            self._count("known_url")
+            return known
+
+        started = time.perf_counter()
+        response = get_transport().request("GET", url, headers=headers, stream=True)
+        with response:
+            response.raise_for_status()
+            declared = response.headers.get("Content-Length", "")
+            if max_bytes and declared.isdigit() and int(declared) > max_bytes:
+                raise MediaTooLargeError(f"{declared} bytes declared")
+            sha256, size, temp_path = self._write_temp(response, max_bytes=max_bytes, throttle=throttle)
+            content_type = response.headers.get("Content-Type", "")
+        MEDIA_SECONDS.observe(time.perf_counter() - started)
+
+        path = self.path_for(sha256, self.extension_for(content_type, url))
+        if os.path.exists(path):
+            os.remove(temp_path)
+            self._count("known_content")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+
+        self._count("downloaded")
+        self._count("bytes", size)
+        document = {
+            "url": url,
+            "sha256": sha256,
+            "path": path,
+            "size": size,
+            "content_type": content_type,
+            "downloaded_at": datetime.utcnow(),
+        }
+        self.collection.update_one({"url": url}, {"$setOnInsert": document}, upsert=True)
+        return self.reference(document)
+
+    def download(self, url, headers=None):
+        """
+        Download a media URL unless it is already stored.
+
+        :return: Reference dict with url, sha256 and path, or None if the download failed.
+        """
+        try:
+            return self.fetch(url, headers=headers)
+        except (requests.exceptions.RequestException, OSError, MediaTooLargeError) as e:
+            print(f"[Media] Download failed: {url} -> {e}")
+            self._count("failed")
+            return None
+
+    def download_many(self, urls, headers=None):
+        """
+        Download URLs on the bounded pool, keeping their order.
+
+        :return: List of references, with None for failed downloads.
+        """
+        return list(self.executor.map(lambda url: self.download(url, headers=headers), urls))
+
+    def close(self, wait=True):
+        """
+        Wait for running downloads and stop the pool.
+
+        :param wait: Wait for running downloads. Otherwise queued downloads are cancelled and
+            the call returns at once.
+        """
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def configure_media_store(db_client, settings):
+    """
+    Replace the shared media store with one built from the application settings.
+    """
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = MediaStore(
+            db_client,
+            root=settings.media_root,
+            max_workers=settings.media_download_workers,
+            chunk_size=settings.media_chunk_size,
+        )
+    return _store
+
+
+def get_media_store(db_client):
+    """
+    Return the shared media store, creating one with default settings if needed.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MediaStore(db_client)
+        return _store
+
+
+def close_media_store(wait=True):
+    """
+    Close the shared media store, if one was created.
+    """
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close(wait=wait)
+            _store = None
@@ -0,0 +1,147 @@
+import threading
+import time
+import requests
+from src.crawlers.media_store import MediaTooLargeError
+from src.db.media_queue import MediaQueue
+
+
+class BandwidthBudget:
+    def __init__(self, bytes_per_second=0):
+        """
+        Token bucket shared by every download thread of the media worker.
+
+        :param bytes_per_second: Sustained download rate. 0 disables the limit.
+        """
+        self.rate = bytes_per_second
+        self.tokens = bytes_per_second
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        """
+        Take amount bytes from the bucket, sleeping while it is in debt.
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class MediaWorker:
+    def __init__(self, db_client, media_store, bandwidth=0, max_bytes=50 * 1024 * 1024, max_attempts=5,
+                 retry_delay=60, batch_size=100):
+        """
+        Drain the media queue and attach downloaded files to their posts.
+        Downloads run on the media store pool, so its size bounds the worker's concurrency.
+
+        :param db_client: MongoDBClient instance.
+        :param media_store: MediaStore used to download and store files.
+        :param bandwidth: Download budget in bytes per second shared by all threads. 0 disables it.
+        :param max_bytes: Files larger than this fail without retry.
+        :param max_attempts: Attempts before an item fails permanently.
+        :param retry_delay: Seconds before the first retry, doubled on each further attempt.
+        :param batch_size: Items claimed per run_once call.
+        """
+        self.db = db_client.db
+        self.media_store = media_store
+        self.queue = MediaQueue(db_client)
+        self.budget = BandwidthBudget(bandwidth)
+        self.max_bytes = max_bytes
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+
+    def run_once(self):
+        """
+        Claim a batch of due items and process them concurrently.
+
+        :return: Number of items processed.
+        """
+        items = []
+        while len(items) < self.batch_size:
+            item = self.queue.claim()
+            if not item:
+                break
+            items.append(item)
+        if not items:
+            return 0
+
+        results = list(self.media_store.executor.map(self.process, items))
+        counts = {status: results.count(status) for status in set(results)}
+        print(f"[MediaWorker] Processed {len(items)} media items: {counts}")
+        return len(items)
+
+    def drain(self):
+        """
+        Process batches until no item is due.
+        """
+        while self.run_once() == self.batch_size:
+            pass
+
+    def process(self, item):
+        """
+        Download one queued media file and record the outcome on its post.
+
+        :return: "done", "retry" or "failed".
+        """
+        try:
+            reference = self.media_store.fetch(
+                item["media_url"],
+                headers=item.get("headers") or None,
+                max_bytes=self.max_bytes,
+                throttle=self.budget.consume,
+            )
+        except MediaTooLargeError as e:
+            return self._fail(item, str(e))
+        except (requests.exceptions.RequestException, OSError) as e:
+            if self.queue.retry(item, str(e), self.retry_delay, self.max_attempts):
+                return "retry"
+            return self._fail(item, str(e), recorded=True)
+
+        if not self._set_media(item, {**reference, "status": "done"}):
+            # The post is still in the bulk writer buffer; the file is kept and found by URL next time
+            if self.queue.retry(item, "post not stored yet", self.retry_delay, self.max_attempts):
+                return "retry"
+            return "failed"
+        self.queue.complete(item)
+        self._update_post_status(item)
+        return "done"
+
+    def _fail(self, item, error, recorded=False):
+        print(f"[MediaWorker] Giving up on {item['media_url']}: {error}")
+        if not recorded:
+            self.queue.fail(item, error)
+        self._set_media(item, {"url": item["media_url"], "status": "failed", "error": error})
+        self._update_post_status(item)
+        return "failed"
+
+    def _set_media(self, item, entry):
+        """
+        Replace every media entry of a post that matches the item's URL.
+
+        :return: True if the post was found.
+        """
+        collection = self.db[item["post_collection"]]
+        field = f"media.{item['kind']}"
+        # The positional $ updates one entry per call, so a URL listed twice takes one call per copy.
+        # Copies already carrying the new status are skipped, which ends the loop.
+        query = {"url": item["post_url"], field: {"$elemMatch": {"url": item["media_url"], "status": {"$ne": entry["status"]}}}}
+        found = False
+        while collection.update_one(query, {"$set": {f"{field}.$": entry}}).matched_count:
+            found = True
+        return found or collection.count_documents({"url": item["post_url"], f"{field}.url": item["media_url"]}, limit=1) > 0
+
+    def _update_post_status(self, item):
+        """
+        Mark the post complete, or partial if some media failed, once no item is outstanding.
+        """
+        if self.queue.remaining(item["post_url"]):
+            return
+        status = "partial" if self.queue.failed(item["post_url"]) else "complete"
+        self.db[item["post_collection"]].update_one({"url": item["post_url"]}, {"$set": {"media_status": status}})
@@ -1,56 +1,135 @@
-import os
-import hashlib
+import asyncio
 from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 from src.crawlers.base_crawler import BaseCrawler
+from src.crawlers.comments import collect_comments
+from src.crawlers.parsing import parse_nate_comments, parse_nate_list, parse_nate_post
+from src.db.crawl_state import CrawlStateStore, stored_high_water
+from src.db.media_queue import MediaQueue
+from src.db.seen_index import get_seen_index
+from src.metrics import DEDUPE_HITS
+from src.tracing import span, trace
+
+COMMENT_URL = "https://pann.nate.com/talk/reply/view"
 
 
 class NateCrawler(BaseCrawler):
-    def __init__(self, db_client):
-        super().__init__()
+    def __init__(self, db_client, max_per_host=4, comment_fanout=4, comment_max_pages=50):
+        """
+        :param comment_fanout: Comment pages of one post requested at once.
+        :param comment_max_pages: Comment pages fetched per post at most.
+        """
+        super().__init__(max_per_host=max_per_host)
         self.db_client = db_client
-        self.collection = self.db_client.db["nate"]
+        self.comment_fanout = comment_fanout
+        self.comment_max_pages = comment_max_pages
+        self.crawl_state = CrawlStateStore(db_client)
+        self.seen_index = get_seen_index(db_client)
+        self.media_queue = MediaQueue(db_client)
 
-    def fetch_posts(self, keyword, start_page, end_page):
+    def fetch_posts(self, keyword, start_page, end_page, frontier=None):
         """
         Fetch posts for a specific keyword (board ID) from Nate Pann.
+
+        :return: Number of new posts found.
+        """
+        with trace("cycle", "nate", keyword):
+            return self.run_async(self.fetch_posts_async(keyword, start_page, end_page, frontier))
+
+    async def fetch_posts_async(self, keyword, start_page, end_page, frontier=None):
+        """
+        Walk list pages until one holds only already-seen posts, or none above the board's
+        high-water mark, processing the new posts of each page concurrently. Posts already in
+        the seen-URL index are dropped before any detail fetch. The list is ranked, so an older
+        post may join it late: the mark only ends the walk and never drops a post. It moves up
+        only over posts whose documents were written.
+
+        :param frontier: CrawlFrontier to queue new posts on for any worker, instead of processing them here.
+        :return: Number of new posts found.
         """
         base_url = f"https://pann.nate.com/talk/{keyword}?type=3&page="
+        high_water = await self.fetcher.run_blocking(self.crawl_state.get_high_water, "nate", keyword)
+        tried = []
+        stored = set()
+        found = 0
+
         for page in range(start_page, end_page + 1):
             print(f"[Nate Pann] Fetching page {page} for keyword {keyword}")
-            html = self.get_html(base_url + str(page))
-            if html:
-                post_links = self.extract_post_links(html)
-                print(f"[Nate Pann] Found {len(post_links)} post links on page {page} for keyword {keyword}")
-                for link in post_links:
-                    self.process_post(link, keyword)
+            with span("list_fetch"):
+                html = await self.get_content_async(base_url + str(page))
+            if not html:
+                continue
+
+            with span("parse_list"):
+                post_links = await self.parse_pool.parse(parse_nate_list, html)
+            new_links = [link for link in post_links if link not in self.seen_index]
+            print(f"[Nate Pann] Found {len(new_links)} new of {len(post_links)} post links on page {page} for keyword {keyword}")
+            DEDUPE_HITS.inc(len(post_links) - len(new_links), ("nate", "list"))
+            if post_links and not new_links:
+                break
+            # Later pages hold older posts; unseen ones on this page are still processed
+            last_page = all(self.post_number(link) <= high_water for link in post_links)
+            found += len(new_links)
+
+            with span("posts"):
+                if frontier:
+                    # Queued posts are the frontier's to retry
+                    await self.fetcher.run_blocking(frontier.enqueue_posts, "nate", keyword, new_links)
+                    stored.update(self.post_number(link) for link in new_links)
+                else:
+                    await asyncio.gather(*(
+                        self.process_post_async(link, keyword, lambda url: stored.add(self.post_number(url)))
+                        for link in new_links
+                    ))
+            tried.extend(self.post_number(link) for link in new_links)
+            if last_page:
+                print(f"[Nate Pann] No posts above the high-water mark on page {page} for keyword {keyword}, stopping")
+                break
+
+        # The mark may only cover posts already in MongoDB, or a crash would lose buffered ones
+        await self.fetcher.run_blocking(self.db_client.flush_writes)
+        newest = stored_high_water(high_water, tried, stored)
+        if newest > high_water:
+            await self.fetcher.run_blocking(self.crawl_state.update_high_water, "nate", keyword, newest)
+        return found
 
     def extract_post_links(self, html_content):
         """
         Extract post links from a page's HTML content.
         """
-        soup = BeautifulSoup(html_content, "html.parser")
-        post_links = []
-        tbody = soup.find("tbody")
-        if tbody:
-            for tr in tbody.find_all("tr"):
-                h2 = tr.find("h2")
-                if h2 and (a_tag := h2.find("a", href=True)):
-                    post_links.append("https://pann.nate.com" + a_tag["href"])
-        return post_links
+        return parse_nate_list(html_content)
 
     def process_post(self, post_url, keyword):
         """
         Process a single post by extracting content and storing it.
         """
+        return self.run_async(self.process_post_async(post_url, keyword))
+
+    async def process_post_async(self, post_url, keyword, on_written=None):
+        """
+        Process a single post without blocking the event loop.
+
+        :param on_written: Called with the post URL once the post is stored, as in store_post.
+        :return: True if the post was fetched and handed to store_post.
+        """
         post_id = self.extract_post_id(post_url)
-        html = self.get_html(post_url)
-        if html:
-            post_data = self.extract_post_content(html, post_url, keyword, post_id)
-            if post_data:
-                self.store_post(post_data)
+        with trace("post", "nate", post_url):
+            with span("detail_fetch"):
+                html = await self.get_content_async(post_url)
+            if not html:
+                return False
+            try:
+                with span("parse_post"):
+                    page = await self.parse_pool.parse(parse_nate_post, html)
+            except Exception as e:
+                print(f"[Nate Pann] Failed to parse post: {post_url} -> {e}")
+                return False
+            with span("comments"):
+                comments = await self.fetch_comments_async(post_id)
+            post_data = self.build_post(page, post_url, keyword, post_id, comments)
+            with span("store"):
+                await self.fetcher.run_blocking(self.store_post, post_data, on_written)
+            return True
 
     def extract_post_id(self, url):
         """
@@ -62,93 +141,115 @@ class NateCrawler(BaseCrawler):
             return path_parts[-1]  # '373645734' 부분 추출
         return "unknown_id"
 
-    def extract_post_content(self, html_content, url, keyword, post_id):
+    def post_number(self, url):
+        """
+        Extract the numeric post ID from the URL, or 0 if it is not numeric.
         """
-        Extract the content, media, and comments of a post.
-        """
-        soup = BeautifulSoup(html_content, "html.parser")
-        media = {"images": [], "videos": []}
-        comments = []
-
-        def download_media(media_url, folder, index=None):
-            """
-            Download media file and save it in the specified folder with a unique name.
-            """
-            os.makedirs(folder, exist_ok=True)  # Ensure the folder exists
-            parsed_url = urlparse(media_url)
-            filename = os.path.basename(parsed_url.path)  # 기본 파일 이름
-            if not filename or filename == "download.jsp":  # 이름이 없거나 download.jsp인 경우
-                filename = f"image_{index}.jpg" if index is not None else hashlib.md5(media_url.encode()).hexdigest() + ".jpg"
-            elif '.' not in filename:  # 확장자가 없을 경우 기본 확장자로 저장
-                filename += ".jpg"
-            file_path = os.path.join(folder, filename)
+        post_id = self.extract_post_id(url)
+        return int(post_id) if post_id.isdigit() else 0
 
-            try:
-                response = requests.get(media_url, stream=True)
-                response.raise_for_status()
-                with open(file_path, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                print(f"[Nate Pann] Media saved: {file_path}")
-                return file_path
-            except Exception as e:
-                print(f"[Nate Pann] Media download failed: {media_url} -> {e}")
-                return None
-
-        # 미디어 폴더 생성
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        media_dir = os.path.join(current_dir, f"../../data/nate/{keyword}_{post_id}/")
-        images_dir = os.path.join(media_dir, "images")
-        videos_dir = os.path.join(media_dir, "videos")
-
-        # 이미지 다운로드
-        for index, img_tag in enumerate(soup.select("div[id='contentArea'] img"), start=1):
-            if img_url := img_tag.get("src"):
-                media_path = download_media(img_url, images_dir, index)
-                if media_path:
-                    media["images"].append(media_path)
-
-        # 동영상 다운로드
-        for index, video_tag in enumerate(soup.select("div[id='contentArea'] video"), start=1):
-            if video_url := video_tag.get("src"):
-                media_path = download_media(video_url, videos_dir, index)
-                if media_path:
-                    media["videos"].append(media_path)
-
-        # 댓글 수집
-        comment_section = soup.find("div", class_="cmt_best")
-        if comment_section:
-            for comment_item in comment_section.find_all("dl", class_="cmt_item"):
-                try:
-                    author = comment_item.select_one("span.nameui").get_text(strip=True)
-                    date = comment_item.select_one("dt.beple i").get_text(strip=True)
-                    content = comment_item.select_one("dd.usertxt span").get_text(strip=True)
-                    comments.append({
-                        "author": author,
-                        "date": date,
-                        "content": content
-                    })
-                except Exception as e:
-                    print(f"[Nate Pann] Error parsing comment: {e}")
+    def extract_post_content(self, html_content, url, keyword, post_id):
+        """
+        Extract the content, media URLs, and comments of a post. Media URLs are stored as pending.
+        """
+        return self.build_post(parse_nate_post(html_content), url, keyword, post_id, self.fetch_comments(post_id))
 
+    def build_post(self, page, url, keyword, post_id, comments=()):
+        """
+        Build the post document from a page parsed by parse_nate_post and its comment thread.
+        """
+        # 이미지/동영상은 미디어 워커가 나중에 다운로드
+        media = {
+            "images": [{"url": media_url, "status": "pending"} for media_url in page["images"]],
+            "videos": [{"url": media_url, "status": "pending"} for media_url in page["videos"]],
+        }
         return {
-            "title": soup.select_one("div.post-tit-info h1").get_text(strip=True) if soup.select_one("div.post-tit-info h1") else "No Title",
-            "content": " ".join(soup.find("div", id="contentArea").stripped_strings) if soup.find("div", id="contentArea") else "No Content",
+            "title": page["title"],
+            "content": page["content"],
             "url": url,
             "post_id": post_id,
             "media": media,
-            "comments": comments,
+            "media_status": "pending" if media["images"] or media["videos"] else "complete",
+            "comments": list(comments),
+            "best_comments": page["comments"],
             "source": "nate",
             "keyword": keyword,
             "timestamp": datetime.utcnow()
         }
 
-    def store_post(self, post):
+    def fetch_comments(self, post_id, known_ids=()):
+        """
+        Fetch the full comment thread of a post.
+        """
+        return self.run_async(self.fetch_comments_async(post_id, known_ids))
+
+    async def fetch_comments_async(self, post_id, known_ids=()):
+        """
+        Fetch every comment page of a post concurrently, skipping comments in known_ids.
+        Comment pages are requested newest first, so a refresh stops at the first stored page.
+        """
+        async def fetch_page(page):
+            html = await self.get_content_async(f"{COMMENT_URL}?pann_id={post_id}&currMenu=talk&order=N&page={page}")
+            return await self.parse_pool.parse(parse_nate_comments, html) if html else None
+
+        return await collect_comments(
+            fetch_page,
+            known_ids=known_ids,
+            fanout=self.comment_fanout,
+            max_pages=self.comment_max_pages,
+            newest_first=True,
+        )
+
+    def refresh_comments(self, post_url):
+        """
+        Add comments posted since a stored post was crawled.
+        """
+        return self.run_async(self.refresh_comments_async(post_url))
+
+    async def refresh_comments_async(self, post_url):
         """
-        Store post data in MongoDB, avoiding duplicates.
+        Fetch only the comments a stored post does not have yet and add them.
+
+        :return: Number of comments added.
         """
-        if not self.collection.find_one({"url": post["url"]}):
-            self.collection.insert_one(post)
-            print(f"[Nate Pann] Stored post: {post['title']}")
+        collection = self.db_client.db["nate"]
+        post = await self.fetcher.run_blocking(collection.find_one, {"url": post_url}, {"post_id": 1, "comments.id": 1})
+        if not post:
+            return 0
+        stored = post.get("comments", [])
+        known_ids = [comment["id"] for comment in stored if "id" in comment]
+        if len(known_ids) < len(stored):
+            # Posts stored with only the best comments are refetched whole
+            comments = await self.fetch_comments_async(post["post_id"])
+            update = {"$set": {"comments": comments}}
         else:
+            comments = await self.fetch_comments_async(post["post_id"], known_ids)
+            # Keep the thread newest first, as the site lists it
+            update = {"$push": {"comments": {"$each": comments, "$position": 0}}}
+        update.setdefault("$set", {})["comments_refreshed_at"] = datetime.utcnow()
+        await self.fetcher.run_blocking(collection.update_one, {"_id": post["_id"]}, update)
+        return len(comments)
+
+    def store_post(self, post, on_written=None):
+        """
+        Queue post data for a buffered write to MongoDB, avoiding duplicates.
+
+        :param on_written: Called with the post URL once the post is stored or found already stored.
+        """
+        if post["url"] in self.seen_index:
             print(f"[Nate Pann] Duplicate post skipped: {post['title']}")
+            if on_written:
+                on_written(post["url"])
+            return False
+
+        # Only stored posts count as seen, so a failed flush leaves the post to be fetched again
+        def written():
+            self.seen_index.add(post["url"])
+            if on_written:
+                on_written(post["url"])
+
+        self.db_client.buffer_insert("nate", post, on_written=written)
+        with span("media"):
+            self.media_queue.enqueue("nate", post, self.headers)
+        print(f"[Nate Pann] Queued post: {post['title']}")
+        return True
@@ -0,0 +1,236 @@
+import fcntl
+import glob
+import json
+import mmap
+import os
+import threading
+import time
+import zstandard
+from src.metrics import ARCHIVE_BYTES
+
+DEFAULT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/archive"))
+SEGMENT_PATTERN = "pages-*.zst"
+
+
+class PageArchive:
+    def __init__(self, root=DEFAULT_ROOT, segment_bytes=256 * 1024 * 1024, level=3):
+        """
+        Append-only archive of fetched page bodies, so pages can be parsed again after a
+        selector fix without fetching them again.
+
+        Bodies are stored as independent zstd frames in numbered segment files. Each segment
+        has an index of JSON lines giving the URL, fetch time, offset and length of its
+        records, so one record can be read without decompressing its neighbours. Several
+        processes may append to the same root; each record is written under an exclusive
+        lock on its segment.
+
+        :param root: Directory of the segment and index files.
+        :param segment_bytes: Compressed bytes after which a new segment is started.
+        :param level: zstd compression level.
+        """
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._local = threading.local()
+        self._segment = None
+        self._data = None
+        self._index = None
+        self._index_checked = False
+        self._lock = threading.Lock()
+
+    def _compressor(self):
+        # Compressors are not thread-safe, so each fetch thread keeps its own
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def segments(self):
+        """
+        Return the numbers of the segments on disk, oldest first.
+        """
+        names = glob.glob(os.path.join(self.root, SEGMENT_PATTERN))
+        return sorted(int(os.path.basename(name)[6:-4]) for name in names)
+
+    def segment_path(self, segment):
+        return os.path.join(self.root, f"pages-{segment:06d}.zst")
+
+    def index_path(self, segment):
+        return os.path.join(self.root, f"pages-{segment:06d}.idx")
+
+    def _open_segment(self):
+        """
+        Open the last segment for appending, or start a new one when it is full.
+        """
+        if self._data is not None:
+            self._data.close()
+            self._index.close()
+        os.makedirs(self.root, exist_ok=True)
+        segments = self.segments()
+        segment = segments[-1] if segments else 1
+        if segments and os.path.getsize(self.segment_path(segment)) >= self.segment_bytes:
+            segment += 1
+        self._segment = segment
+        self._data = open(self.segment_path(segment), "ab")
+        self._index = open(self.index_path(segment), "a", encoding="utf-8")
+        self._index_checked = False
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def append(self, url, body, content_type="", status=200, fetched_at=None):
+        """
+        Compress a fetched body and append it to the current segment.
+
+        :return: Index entry of the record.
+        """
+        frame = self._compressor().compress(body)
+        entry = {
+            "url": url,
+            "fetched_at": fetched_at or time.time(),
+            "status": status,
+            "content_type": content_type,
+            "size": len(body),
+            "length": len(frame),
+        }
+        with self._lock:
+            if self._data is None:
+                self._open_segment()
+            while True:
+                # Other processes append to the segment too, so its end is only known under the lock
+                fcntl.flock(self._data.fileno(), fcntl.LOCK_EX)
+                end = self._data.seek(0, os.SEEK_END)
+                if end < self.segment_bytes:
+                    break
+                fcntl.flock(self._data.fileno(), fcntl.LOCK_UN)
+                self._open_segment()
+            try:
+                if not self._index_checked:
+                    if self._index.seek(0, os.SEEK_END) and not self._ends_with_newline(self.index_path(self._segment)):
+                        # End a line cut short by a crash, so the next entry starts on its own line
+                        self._index.write("\n")
+                    self._index_checked = True
+                entry["segment"] = self._segment
+                entry["offset"] = end
+                self._data.write(frame)
+                self._data.flush()
+                # The index line follows its data, so an entry never points past the end of a segment
+                self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._index.flush()
+            finally:
+                fcntl.flock(self._data.fileno(), fcntl.LOCK_UN)
+        ARCHIVE_BYTES.inc(len(body), ("raw",))
+        ARCHIVE_BYTES.inc(len(frame), ("compressed",))
+        return entry
+
+    def entries(self, predicate=None):
+        """
+        Yield the index entries of every segment, oldest first, that predicate accepts.
+        """
+        for segment in self.segments():
+            try:
+                index = open(self.index_path(segment), encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with index:
+                for line in index:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash while it was written
+                        continue
+                    if predicate is None or predicate(entry):
+                        yield entry
+
+    def latest(self, predicate=None):
+        """
+        Return the newest entry of each URL that predicate accepts, in archive order.
+        """
+        newest = {}
+        for entry in self.entries(predicate):
+            known = newest.get(entry["url"])
+            if known is None or entry["fetched_at"] >= known["fetched_at"]:
+                newest[entry["url"]] = entry
+        return sorted(newest.values(), key=lambda entry: (entry["segment"], entry["offset"]))
+
+    def read(self, entry):
+        """
+        Return the body of one archived record.
+        """
+        for _, body in self.iter_pages([entry]):
+            return body
+
+    def iter_pages(self, entries):
+        """
+        Yield (entry, body) for each entry, reading every segment through one memory map.
+        Entries in archive order are read sequentially.
+        """
+        decompressor = zstandard.ZstdDecompressor()
+        mapped_segment, mapped, file = None, None, None
+        try:
+            for entry in entries:
+                if entry["segment"] != mapped_segment:
+                    if mapped is not None:
+                        mapped.close()
+                        file.close()
+                    file = open(self.segment_path(entry["segment"]), "rb")
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    mapped_segment = entry["segment"]
+                frame = mapped[entry["offset"]:entry["offset"] + entry["length"]]
+                yield entry, decompressor.decompress(frame)
+        finally:
+            if mapped is not None:
+                mapped.close()
+                file.close()
+
+    def close(self):
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+                self._index.close()
+                self._data = self._index = None
+
+
+_archive = None
+_lock = threading.Lock()
+
+
+def configure_page_archive(settings):
+    """
+    Replace the shared archive with one built from the application settings, or remove
+    it if archiving is disabled.
+    """
+    global _archive
+    with _lock:
+        if _archive is not None:
+            _archive.close()
+        _archive = None
+        if settings.archive_pages:
+            _archive = PageArchive(
+                root=settings.archive_root or DEFAULT_ROOT,
+                segment_bytes=settings.archive_segment_bytes,
+                level=settings.archive_level,
+            )
+    return _archive
+
+
+def get_page_archive():
+    """
+    Return the shared archive, or None if archiving is not configured.
+    """
+    with _lock:
+        return _archive
+
+
+def close_page_archive():
+    """
+    Close the shared archive, if one was configured.
+    """
+    global _archive
+    with _lock:
+        if _archive is not None:
+            _archive.close()
+            _archive = None
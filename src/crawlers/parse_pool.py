@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.crawlers.parsing import configure_parser, get_parser
+from src.metrics import PARSE_SECONDS
+
+
+class ParsePool:
+    def __init__(self, max_workers=0):
+        """
+        Run page parsers on worker processes so parsing uses every core instead of
+        competing with the fetch threads for the GIL. Parsers must be module-level
+        functions taking and returning picklable values.
+
+        :param max_workers: Number of parser processes. 0 uses one per core.
+        """
+        self.max_workers = max_workers or os.cpu_count()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        """
+        Return the process pool, starting it on first use or after a worker died.
+        """
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs scheduler and writer threads can deadlock the children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=configure_parser,
+                    initargs=(get_parser(),),
+                )
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def parse(self, func, *args):
+        """
+        Run func(*args) on a parser process without blocking the event loop.
+        A pool broken by a crashed worker is restarted and the call retried once.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor()
+        with PARSE_SECONDS.time((func.__name__,)):
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                self._reset(executor)
+                return await loop.run_in_executor(self.executor(), func, *args)
+
+    def run(self, func, *args):
+        """
+        Run func(*args) on a parser process from synchronous code and wait for the result.
+        """
+        executor = self.executor()
+        with PARSE_SECONDS.time((func.__name__,)):
+            try:
+                return executor.submit(func, *args).result()
+            except BrokenProcessPool:
+                self._reset(executor)
+                return self.executor().submit(func, *args).result()
+
+    def close(self, wait=True):
+        """
+        Stop the parser processes.
+
+        :param wait: Wait for running parses. Otherwise queued parses are cancelled and the
+            call returns at once.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def configure_parse_pool(settings):
+    """
+    Replace the shared parse pool with one built from the application settings.
+    """
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ParsePool(max_workers=settings.parse_workers)
+    return _pool
+
+
+def get_parse_pool():
+    """
+    Return the shared parse pool, creating one with default settings if needed.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ParsePool()
+        return _pool
+
+
+def close_parse_pool(wait=True):
+    """
+    Close the shared parse pool, if one was created.
+    """
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.close(wait=wait)
+            _pool = None
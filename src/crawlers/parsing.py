@@ -0,0 +1,275 @@
+import hashlib
+import importlib.util
+import math
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Tree builders in order of preference. lxml is C-backed and several times faster than html.parser.
+PARSERS = ("lxml", "html.parser")
+
+_parser = None
+
+
+def available_parsers():
+    """
+    Return the installed tree builders in order of preference.
+    """
+    return [name for name in PARSERS if name == "html.parser" or importlib.util.find_spec(name) is not None]
+
+
+def configure_parser(name="auto"):
+    """
+    Select the tree builder used by make_soup. "auto" picks the fastest installed one.
+    """
+    global _parser
+    if name == "auto":
+        _parser = available_parsers()[0]
+    elif name in available_parsers():
+        _parser = name
+    else:
+        raise ValueError(f"HTML parser not available: {name}")
+    return _parser
+
+
+def get_parser():
+    """
+    Return the selected tree builder, picking one on first use.
+    """
+    return _parser or configure_parser()
+
+
+def only(tags=(), classes=(), ids=()):
+    """
+    Build a strainer keeping the subtrees rooted at any of the given tag names, classes or ids.
+    Everything outside those subtrees is skipped while the tree is built.
+    """
+    tags, classes, ids = set(tags), set(classes), set(ids)
+
+    def match(name, attrs):
+        if name in tags or attrs.get("id") in ids:
+            return True
+        # Builders pass raw attributes, so class may still be a single string
+        value = attrs.get("class") or ()
+        return bool(classes.intersection(value.split() if isinstance(value, str) else value))
+
+    return SoupStrainer(match)
+
+
+def make_soup(markup, strainer=None, parser=None):
+    """
+    Parse markup with the selected tree builder, optionally restricted by a strainer from only().
+    """
+    return BeautifulSoup(markup, parser or get_parser(), parse_only=strainer)
+
+
+# Subtrees each page type is parsed for
+DCINSIDE_LIST = only(tags=("tbody",))
+DCINSIDE_POST = only(classes=("title_subject", "gall_count", "gall_recommend", "writing_view_box"))
+NATE_LIST = only(tags=("tbody",))
+NATE_POST = only(classes=("post-tit-info", "cmt_best"), ids=("contentArea",))
+
+
+def normalize_url(url):
+    """
+    Normalize a URL to ensure it has a valid scheme, or return None if it has none.
+    """
+    if url.startswith("//"):
+        return f"https:{url}"  # Add HTTPS scheme
+    elif not url.startswith("http"):
+        return None  # Skip invalid URLs
+    return url
+
+
+def _count(el, prefix=""):
+    text = el.text.strip().replace(prefix, "").replace(",", "") if el else "0"
+    return int(text) if text.isdigit() else 0
+
+
+# Page parsers below are pure functions of the page markup (bytes or str) returning plain
+# dicts and lists, so they can run on a ParsePool worker process.
+
+def parse_dcinside_list(html, gallery_id):
+    """
+    Extract the URLs of general posts with enough views, recommendations and comments.
+    """
+    soup = make_soup(html, DCINSIDE_LIST)
+    post_urls = []
+
+    for row in soup.select("tbody tr.ub-content"):
+        category_el = row.select_one(".gall_subject")
+        if not category_el or category_el.text.strip() != "일반":
+            continue
+
+        # Extract views, recommendations, and comments
+        views = _count(row.select_one(".gall_count"))
+        recommend = _count(row.select_one(".gall_recommend"))
+        comments_el = row.select_one(".reply_numbox")
+        comments = int(comments_el.text.strip("[]")) if comments_el and comments_el.text.strip("[]").isdigit() else 0
+
+        # Apply filters
+        if views < 500 or recommend < 10 or comments < 5:
+            continue
+
+        # Construct post URL using id and no
+        post_el = row.select_one(".gall_tit a")
+        if post_el:
+            post_no = post_el["href"].split("no=")[1].split("&")[0]
+            post_urls.append(f"https://gall.dcinside.com/mgallery/board/view/?id={gallery_id}&no={post_no}&exception_mode=recommend")
+
+    return post_urls
+
+
+def dcinside_post_complete(soup):
+    """
+    Check whether a statically fetched post page has everything parse_dcinside_post needs.
+    Pages without a title or body, or with lazy-loaded images, need a Selenium render.
+    """
+    if not soup.select_one(".title_subject") or not soup.select_one(".writing_view_box"):
+        return False
+    for img_el in soup.select(".writing_view_box img"):
+        src = img_el.get("src", "")
+        if not src or src.startswith("data:") or img_el.get("data-original") or img_el.get("data-src"):
+            return False
+    return True
+
+
+def parse_dcinside_post(html):
+    """
+    Extract the title, counters, body text and media URLs of a DCInside post page.
+    """
+    soup = make_soup(html, DCINSIDE_POST)
+    title_el = soup.select_one(".title_subject")
+    content_el = soup.select_one(".writing_view_box")
+    images = [normalize_url(img_el.get("src", "")) for img_el in content_el.find_all("img")] if content_el else []
+    videos = [normalize_url(video_el.get("src", "")) for video_el in content_el.find_all("video")] if content_el else []
+
+    return {
+        "complete": dcinside_post_complete(soup),
+        "title": title_el.text.strip() if title_el else "No Title",
+        "views": _count(soup.select_one(".gall_count"), "조회 "),
+        "recommendations": _count(soup.select_one(".gall_recommend"), "추천 "),
+        "content": content_el.text.strip() if content_el else "No Content",
+        "images": [url for url in images if url],
+        "videos": [url for url in videos if url],
+    }
+
+
+DCINSIDE_COMMENT_PAGE_SIZE = 100
+
+
+def parse_dcinside_comments(data):
+    """
+    Extract one page of comments from the decoded JSON of the DCInside comment endpoint.
+
+    :return: Dict with "comments", the "total" comment count and the number of "pages".
+    """
+    total = int(data.get("total_cnt") or 0)
+    comments = [
+        {
+            "id": str(comment["no"]),
+            "author": comment.get("name", "Unknown"),
+            "content": comment.get("memo", "No Content"),
+            "date": comment.get("reg_date", "Unknown"),
+        }
+        # Entries without a number are ads inserted into the thread
+        for comment in data.get("comments") or [] if comment.get("no")
+    ]
+    return {"comments": comments, "total": total, "pages": max(math.ceil(total / DCINSIDE_COMMENT_PAGE_SIZE), 1)}
+
+
+def parse_nate_list(html):
+    """
+    Extract post links from a Nate Pann list page.
+    """
+    soup = make_soup(html, NATE_LIST)
+    post_links = []
+    tbody = soup.find("tbody")
+    if tbody:
+        for tr in tbody.find_all("tr"):
+            h2 = tr.find("h2")
+            if h2 and (a_tag := h2.find("a", href=True)):
+                post_links.append("https://pann.nate.com" + a_tag["href"])
+    return post_links
+
+
+def parse_nate_post(html):
+    """
+    Extract the title, body text, media URLs and best comments of a Nate Pann post page.
+    """
+    soup = make_soup(html, NATE_POST)
+    title_el = soup.select_one("div.post-tit-info h1")
+    content_area = soup.find("div", id="contentArea")
+    comments = []
+
+    comment_section = soup.find("div", class_="cmt_best")
+    if comment_section:
+        for comment_item in comment_section.find_all("dl", class_="cmt_item"):
+            try:
+                comments.append({
+                    "author": comment_item.select_one("span.nameui").get_text(strip=True),
+                    "date": comment_item.select_one("dt.beple i").get_text(strip=True),
+                    "content": comment_item.select_one("dd.usertxt span").get_text(strip=True),
+                })
+            except Exception as e:
+                print(f"[Nate Pann] Error parsing comment: {e}")
+
+    images = [img_tag.get("src") for img_tag in content_area.find_all("img")] if content_area else []
+    videos = [video_tag.get("src") for video_tag in content_area.find_all("video")] if content_area else []
+    return {
+        "title": title_el.get_text(strip=True) if title_el else "No Title",
+        "content": " ".join(content_area.stripped_strings) if content_area else "No Content",
+        "images": [url for url in images if url],
+        "videos": [url for url in videos if url],
+        "comments": comments,
+    }
+
+
+def _comment_id(item, author, date, content):
+    # Fall back to a digest of the comment when the markup carries no id
+    return item.get("id") or hashlib.blake2b(f"{author}|{date}|{content}".encode(), digest_size=8).hexdigest()
+
+
+def parse_nate_comments(html):
+    """
+    Extract one page of the full comment thread returned by the Nate Pann reply endpoint.
+
+    :return: Dict with "comments", an unknown "total" and the last page number linked from the page.
+    """
+    soup = make_soup(html)
+    comments = []
+    for item in soup.select("dl.cmt_item"):
+        if item.find_parent("div", class_="cmt_best"):
+            continue
+        author_el = item.select_one("span.nameui")
+        date_el = item.select_one("dt i")
+        content_el = item.select_one("dd.usertxt span") or item.select_one("dd.usertxt")
+        if not content_el:
+            continue
+        author = author_el.get_text(strip=True) if author_el else "Unknown"
+        date = date_el.get_text(strip=True) if date_el else "Unknown"
+        content = content_el.get_text(strip=True)
+        comments.append({"id": _comment_id(item, author, date, content), "author": author, "date": date, "content": content})
+
+    page_numbers = [int(a.get_text(strip=True)) for a in soup.select(".paging a, .paging strong") if a.get_text(strip=True).isdigit()]
+    return {"comments": comments, "total": None, "pages": max(page_numbers, default=1)}
+
+
+FM_KOREA_ROW = re.compile(r'<tr[^>]*>(.*?)</tr>', re.DOTALL)
+FM_KOREA_TITLE = re.compile(r'<a[^>]*href="([^"]+)"[^>]*>(.*?)</a>', re.DOTALL)
+TAG = re.compile(r'<[^>]+>')
+
+
+def parse_fmkorea_list(html):
+    """
+    Extract post titles and URLs from an FM Korea board page.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    posts = []
+    for match in FM_KOREA_ROW.finditer(html):
+        title_match = FM_KOREA_TITLE.search(match.group(1))
+        if not title_match:
+            continue
+        title = TAG.sub('', title_match.group(2)).strip()
+        posts.append({"title": title, "url": title_match.group(1), "source": "fmkorea"})
+    return posts
@@ -0,0 +1,228 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+
+# Responses telling us to slow down. They shrink the rate and count towards the circuit breaker.
+THROTTLE_STATUSES = (429, 503)
+
+
+class HostUnavailable(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request to a host that is paused by its circuit breaker
+    or by a Retry-After longer than the limiter is willing to wait.
+    """
+
+
+def parse_retry_after(value):
+    """
+    Return the seconds a Retry-After header asks to wait, or None if it is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class HostLimiter:
+    def __init__(self, rate, burst, min_rate, increase, decrease, breaker_failures, breaker_cooldown):
+        """
+        Token bucket for one host whose rate follows additive-increase, multiplicative-decrease,
+        with a circuit breaker. See RateLimiter for the parameters.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.lock = threading.Lock()
+        # Theoretical arrival time of the next request (GCRA form of the token bucket)
+        self.next_at = 0.0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.failures = 0
+        self.state = "closed"
+        self.open_until = 0.0
+        self.probe_at = 0.0
+        self.counts = {"requests": 0, "throttled": 0, "errors": 0, "rejected": 0, "opened": 0}
+
+    def reserve(self, max_wait):
+        """
+        Reserve the next request slot.
+
+        :return: Seconds to wait before sending.
+        :raises HostUnavailable: If the host is paused for longer than max_wait.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.state == "open":
+                if now < self.open_until:
+                    self.counts["rejected"] += 1
+                    raise HostUnavailable(f"circuit open for another {self.open_until - now:.0f}s")
+                # Let one probe through; its outcome closes or reopens the breaker
+                self.state = "half_open"
+                self.probe_at = now
+            elif self.state == "half_open":
+                # A probe that never reported back does not hold the host forever
+                if now - self.probe_at < self.breaker_cooldown:
+                    self.counts["rejected"] += 1
+                    raise HostUnavailable("circuit half open, probe in flight")
+                self.probe_at = now
+
+            interval = 1.0 / self.rate
+            start = max(now, self.blocked_until, self.next_at - (self.burst - 1) * interval)
+            wait = start - now
+            if wait > max_wait:
+                self.counts["rejected"] += 1
+                if self.state == "half_open":
+                    self.state = "open"
+                raise HostUnavailable(f"host paused for another {wait:.0f}s")
+            self.next_at = max(self.next_at, start) + interval
+            self.counts["requests"] += 1
+            return wait
+
+    def record(self, status=None, retry_after=None, error=False):
+        """
+        Adjust the rate and breaker from the outcome of a request.
+        """
+        throttled = status in THROTTLE_STATUSES
+        failed = error or throttled or (status is not None and status >= 500)
+        with self.lock:
+            now = time.monotonic()
+            if not failed:
+                if self.state == "open" and now < self.open_until:
+                    # Sent before the breaker opened; only a probe after the cooldown closes it
+                    return
+                self.failures = 0
+                self.state = "closed"
+                self.rate = min(self.rate + self.increase, self.max_rate)
+                return
+
+            self.failures += 1
+            self.counts["throttled" if throttled else "errors"] += 1
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            # Concurrent requests fail together; shrink the rate once per interval, not once per request
+            if now - self.last_decrease >= 1.0 / self.rate:
+                self.rate = max(self.rate * self.decrease, self.min_rate)
+                self.last_decrease = now
+            if self.state == "half_open" or self.failures >= self.breaker_failures:
+                if self.state != "open":
+                    self.counts["opened"] += 1
+                self.state = "open"
+                self.open_until = now + max(self.breaker_cooldown, retry_after or 0)
+
+    def stats(self):
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "state": self.state,
+                "failures": self.failures,
+                "paused_for": round(max(self.blocked_until - now, self.open_until - now if self.state == "open" else 0, 0), 1),
+                **self.counts,
+            }
+
+
+class RateLimiter:
+    def __init__(self, rate=4.0, burst=8, host_rates=None, min_rate=0.1, increase=0.05, decrease=0.5,
+                 breaker_failures=5, breaker_cooldown=60.0, max_wait=30.0):
+        """
+        Per-host request rate limiter shared by every crawler.
+
+        Each host gets a token bucket. Successful responses raise its rate by increase up to
+        its configured rate; 429, 5xx and connection errors multiply it by decrease, and a
+        Retry-After pauses the host for as long as it asks. After breaker_failures failures
+        in a row the host's circuit opens and requests fail fast for breaker_cooldown seconds,
+        then a single probe decides whether it closes again.
+
+        :param rate: Requests per second per host.
+        :param burst: Requests a host may receive at once after being idle.
+        :param host_rates: Dict of host -> requests per second overriding rate.
+        :param min_rate: Lowest rate the decreases go down to.
+        :param increase: Requests per second added after each success.
+        :param decrease: Factor applied to the rate after a failure.
+        :param breaker_failures: Failures in a row that open a host's circuit.
+        :param breaker_cooldown: Seconds a circuit stays open.
+        :param max_wait: Longest wait for a slot; longer pauses fail fast with HostUnavailable.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = dict(host_rates or {})
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.max_wait = max_wait
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            rate=settings.http_rate,
+            burst=settings.http_burst,
+            host_rates=settings.http_host_rates,
+            min_rate=settings.http_min_rate,
+            increase=settings.http_rate_increase,
+            decrease=settings.http_rate_decrease,
+            breaker_failures=settings.http_breaker_failures,
+            breaker_cooldown=settings.http_breaker_cooldown,
+            max_wait=settings.http_max_wait,
+        )
+
+    def host(self, url):
+        """
+        Return the limiter of the host of a URL.
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostLimiter(
+                    self.host_rates.get(host, self.rate), self.burst, self.min_rate, self.increase,
+                    self.decrease, self.breaker_failures, self.breaker_cooldown,
+                )
+            return self._hosts[host]
+
+    def acquire(self, url):
+        """
+        Block until a request to url may be sent.
+
+        :raises HostUnavailable: If the host is paused for longer than max_wait.
+        """
+        wait = self.host(url).reserve(self.max_wait)
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url, status=None, retry_after=None, error=False):
+        """
+        Report the outcome of a request to url.
+
+        :param status: HTTP status of the response, or None if there was none.
+        :param retry_after: Value of the Retry-After header, if any.
+        :param error: Whether the request failed without a response.
+        """
+        self.host(url).record(status, parse_retry_after(retry_after), error)
+
+    def stats(self):
+        """
+        Return the current rate, breaker state and counters of every host.
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: limiter.stats() for host, limiter in sorted(hosts.items())}
@@ -23,21 +23,13 @@ class RedditCrawler:
                 "author": submission.author.name if submission.author else "Unknown",
                 "source": "reddit"
             })
-        self.store_posts(posts)
+        self.store_posts(posts, subreddit_name)
 
     def store_posts(self, posts, keyword):
         collection_name = "reddit"
-        collection = self.db_client.db[collection_name]
-
-        if collection_name not in self.db_client.db.list_collection_names():
-            print(f"[Reddit] Creating collection: {collection_name}")
-            collection.create_index("url", unique=True)
 
         for post in posts:
             post["name"] = keyword
-            try:
-                collection.insert_one(post)
-                print(f"[Reddit] Inserted: {post['title']} for {keyword} in {collection_name}")
-            except Exception as e:
-                print(f"[Reddit] Duplicate or error: {post['title']} for {keyword} in {collection_name} -> {e}")
+            self.db_client.buffer_insert(collection_name, post)
+        print(f"[Reddit] Queued {len(posts)} posts for {keyword} in {collection_name}")
 
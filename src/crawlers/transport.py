@@ -0,0 +1,167 @@
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.crawlers.page_archive import get_page_archive
+from src.crawlers.rate_limiter import HostUnavailable, RateLimiter
+from src.metrics import HTTP_BYTES, HTTP_REQUESTS, HTTP_SECONDS, REGISTRY
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes "br" only when brotli is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Retried by HttpTransport.request, each attempt paced by the rate limiter
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpTransport:
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, max_retries=3, backoff_factor=0.5,
+                 pool_connections=10, pool_maxsize=8, limiter=None):
+        """
+        Process-wide HTTP transport shared by every crawler.
+
+        :param connect_timeout: Seconds to wait for a connection to be established.
+        :param read_timeout: Seconds to wait between bytes of a response.
+        :param max_retries: Retries on connection errors, 429 and 5xx responses.
+        :param backoff_factor: Base of the exponential backoff between retries of a response.
+        :param pool_connections: Number of hosts whose connection pools are kept alive.
+        :param pool_maxsize: Keep-alive connections kept per host.
+        :param limiter: RateLimiter pacing the requests to each host.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # urllib3 only retries failed connections and reads. Retrying responses there would
+        # bypass the rate limiter, so a throttling host would get them at the backoff rate.
+        self.retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=0,
+            allowed_methods=None,  # Comment endpoints are read-only POSTs, so retry every method
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=self.retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiter = limiter or RateLimiter()
+        REGISTRY.gauge_callback("crawler_host_rate", "Current request rate limit by host.", ("host",), lambda: {
+            (host,): stats["rate"] for host, stats in self.limiter.stats().items()
+        })
+        REGISTRY.gauge_callback("crawler_host_circuit_open", "Whether the circuit breaker of a host is open.", ("host",), lambda: {
+            (host,): int(stats["state"] != "closed") for host, stats in self.limiter.stats().items()
+        })
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session with the default timeouts, once the
+        rate limiter of its host allows it. 429 and 5xx responses are retried up to
+        max_retries times; every attempt waits for the limiter, which slows down and honours
+        Retry-After on each of them. Pages fetched with GET are archived, if an archive is
+        configured.
+
+        :return: The last response, which may still be an error.
+        :raises HostUnavailable: If the host is paused by its circuit breaker or a long Retry-After.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self._send(method, url, kwargs)
+        for attempt in range(self.max_retries):
+            if response.status_code not in RETRY_STATUSES:
+                break
+            time.sleep(self.backoff_factor * 2 ** attempt)
+            try:
+                retried = self._send(method, url, kwargs)
+            except HostUnavailable:
+                # The host asked for a longer pause than the limiter waits; report what it answered
+                break
+            response.close()
+            response = retried
+        if not kwargs.get("stream"):
+            archive = get_page_archive()
+            if archive is not None and method == "GET" and response.status_code == 200:
+                archive.append(url, response.content, response.headers.get("Content-Type", ""))
+        return response
+
+    def _send(self, method, url, kwargs):
+        """
+        Send one attempt of a request once the limiter allows it, and report its outcome.
+        """
+        host = (urlparse(url).netloc,)
+        try:
+            self.limiter.acquire(url)
+        except HostUnavailable:
+            HTTP_REQUESTS.inc(labels=host + ("rejected",))
+            raise
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            HTTP_REQUESTS.inc(labels=host + ("error",))
+            self.limiter.record(url, error=True)
+            raise
+        HTTP_SECONDS.observe(time.perf_counter() - started, host)
+        HTTP_REQUESTS.inc(labels=host + (str(response.status_code),))
+        if not kwargs.get("stream"):
+            # The body was read with the headers; streamed bodies are counted by their reader
+            HTTP_BYTES.inc(len(response.content), host)
+        self.limiter.record(url, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        self.session.close()
+
+
+_transport = None
+_lock = threading.Lock()
+
+
+def configure_transport(settings):
+    """
+    Replace the shared transport with one built from the application settings.
+    """
+    global _transport
+    with _lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = HttpTransport(
+            connect_timeout=settings.http_connect_timeout,
+            read_timeout=settings.http_read_timeout,
+            max_retries=settings.http_max_retries,
+            backoff_factor=settings.http_backoff_factor,
+            pool_connections=settings.http_pool_connections,
+            pool_maxsize=max(settings.http_pool_maxsize, settings.http_max_per_host),
+            limiter=RateLimiter.from_settings(settings),
+        )
+    return _transport
+
+
+def get_transport():
+    """
+    Return the shared transport, creating one with default settings if needed.
+    """
+    global _transport
+    with _lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
+
+
+def close_transport():
+    """
+    Close the shared transport, if one was created.
+    """
+    global _transport
+    with _lock:
+        if _transport is not None:
+            _transport.close()
+            _transport = None
@@ -21,21 +21,12 @@ class XCrawler:
                 "url": f"https://twitter.com/{tweet.user.screen_name}/status/{tweet.id}",
                 "source": "x"
             })
-        self.store_posts(posts)
+        self.store_posts(posts, query)
 
     def store_posts(self, posts, keyword):
         collection_name = "x"
-        collection = self.db_client.db[collection_name]
-
-        # Ensure collection exists and has necessary indexes
-        if collection_name not in self.db_client.db.list_collection_names():
-            print(f"[X] Creating collection: {collection_name}")
-            collection.create_index("url", unique=True)
 
         for post in posts:
             post["name"] = keyword
-            try:
-                collection.insert_one(post)
-                print(f"[X] Inserted: {post['title']} for {keyword} in {collection_name}")
-            except Exception as e:
-                print(f"[X] Duplicate or error: {post['title']} for {keyword} in {collection_name} -> {e}")
+            self.db_client.buffer_insert(collection_name, post)
+        print(f"[X] Queued {len(posts)} posts for {keyword} in {collection_name}")
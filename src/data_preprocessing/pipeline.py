@@ -0,0 +1,146 @@
+"""
+Clean the text of stored posts in batches on a process pool.
+
+    python -m src.data_preprocessing.pipeline
+    python -m src.data_preprocessing.pipeline --collections dcinside nate --workers 8
+
+Cleaned fields are stored under "clean", next to the raw ones, with a "processed" marker.
+Progress is checkpointed per collection, so an interrupted run resumes where it stopped.
+"""
+import argparse
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from src.config.settings import Settings
+from src.crawlers.parse_pool import ParsePool
+from src.data_preprocessing.preprocess import COMMENT_FIELDS, TEXT_FIELDS, clean_documents
+from src.db.mongo_client import SOURCE_COLLECTIONS, MongoDBClient
+
+# Bump when clean_text changes, so stored posts are cleaned again
+VERSION = 1
+
+PROJECTION = dict.fromkeys(TEXT_FIELDS, 1) | {f"{field}.content": 1 for field in COMMENT_FIELDS}
+
+# Posts inserted while a run's cursor is open may sort before its last _id, so a finished
+# run checkpoints this long before it started
+CHECKPOINT_LAG = timedelta(minutes=10)
+
+
+class PreprocessJob:
+    def __init__(self, db, pool, batch_size=500, max_pending=0, checkpoint_collection="job_state"):
+        """
+        :param db: Database holding the post collections.
+        :param pool: ParsePool whose processes clean the batches.
+        :param batch_size: Posts read, cleaned and written per batch.
+        :param max_pending: Batches being cleaned at once. 0 uses two per pool process.
+        :param checkpoint_collection: Collection storing the last written _id of each collection.
+        """
+        self.db = db
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_pending = max_pending or pool.max_workers * 2
+        self.checkpoints = db[checkpoint_collection]
+
+    def checkpoint(self, collection_name):
+        document = self.checkpoints.find_one({"_id": f"preprocess:{collection_name}"})
+        return document["last_id"] if document and document.get("version") == VERSION else None
+
+    def save_checkpoint(self, collection_name, last_id):
+        self.checkpoints.update_one(
+            {"_id": f"preprocess:{collection_name}"},
+            {"$set": {"last_id": last_id, "version": VERSION, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def reset(self, collection_name):
+        self.checkpoints.delete_one({"_id": f"preprocess:{collection_name}"})
+
+    def run_collection(self, collection_name):
+        """
+        Stream the posts of a collection not cleaned by this version, after its checkpoint,
+        through the pool in _id order. At most max_pending batches are in flight, so memory
+        does not grow with the collection.
+
+        :return: Number of posts cleaned.
+        """
+        started = datetime.now(timezone.utc)
+        collection = self.db[collection_name]
+        query = {"processed": {"$ne": VERSION}}
+        last_id = self.checkpoint(collection_name)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = collection.find(query, PROJECTION, sort=[("_id", 1)], batch_size=self.batch_size)
+
+        executor = self.pool.executor()
+        pending = deque()
+        cleaned = 0
+
+        def write(future):
+            results = future.result()
+            processed_at = datetime.utcnow()
+            collection.bulk_write([
+                UpdateOne({"_id": _id}, {"$set": {"clean": fields, "processed": VERSION, "processed_at": processed_at}})
+                for _id, fields in results
+            ], ordered=False)
+            # Batches are written in _id order, so everything up to the last one is done
+            self.save_checkpoint(collection_name, results[-1][0])
+            return len(results)
+
+        batch = []
+        with cursor:
+            for document in cursor:
+                batch.append(document)
+                if len(batch) < self.batch_size:
+                    continue
+                pending.append(executor.submit(clean_documents, batch))
+                batch = []
+                if len(pending) >= self.max_pending:
+                    cleaned += write(pending.popleft())
+        if batch:
+            pending.append(executor.submit(clean_documents, batch))
+        while pending:
+            cleaned += write(pending.popleft())
+
+        self.save_checkpoint(collection_name, ObjectId.from_datetime(started - CHECKPOINT_LAG))
+        return cleaned
+
+    def run(self, collection_names=SOURCE_COLLECTIONS):
+        """
+        :return: Dict of collection name -> number of posts cleaned.
+        """
+        counts = {}
+        for collection_name in collection_names:
+            started = datetime.utcnow()
+            counts[collection_name] = self.run_collection(collection_name)
+            seconds = (datetime.utcnow() - started).total_seconds()
+            print(f"[Preprocess] Cleaned {counts[collection_name]} posts in {collection_name} in {seconds:.1f}s")
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", nargs="+", choices=SOURCE_COLLECTIONS, default=list(SOURCE_COLLECTIONS))
+    parser.add_argument("--batch-size", type=int, help="Posts per batch, PREPROCESS_BATCH_SIZE by default")
+    parser.add_argument("--workers", type=int, help="Cleaning processes, PREPROCESS_WORKERS by default")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoints and scan every post again")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = Settings()
+    pool = ParsePool(max_workers=args.workers or settings.preprocess_workers)
+    db_client = MongoDBClient(uri=settings.mongodb_uri, db_name=settings.mongodb_name)
+    job = PreprocessJob(db_client.db, pool, batch_size=args.batch_size or settings.preprocess_batch_size)
+    try:
+        if args.restart:
+            for collection_name in args.collections:
+                job.reset(collection_name)
+        job.run(args.collections)
+    finally:
+        pool.close()
+        db_client.close_connection()
+
+
+if __name__ == "__main__":
+    main()
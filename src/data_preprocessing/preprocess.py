@@ -1,14 +1,21 @@
 import re
 
+# HTML tags and special characters except common punctuation, removed in one pass. Runs of
+# special characters stop before "<" so a tag right after them is still matched as a tag.
+STRIP = re.compile(r'<[^>]+>|[^\w\s.,!?\'"<]+|<')
+
+# Text fields cleaned by clean_document, and the list fields whose entries' content is cleaned
+TEXT_FIELDS = ("title", "content", "text")
+COMMENT_FIELDS = ("comments", "best_comments")
+
+
 def clean_text(text):
     """
     Remove HTML tags and special characters from text.
     """
-    text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-    text = re.sub(r'[\r\n]+', ' ', text)  # Replace line breaks with space
-    text = re.sub(r'[^\w\s.,!?\'"]', '', text)  # Remove special characters except common punctuations
-    text = re.sub(r'\s+', ' ', text).strip()  # Remove extra spaces
-    return text
+    text = STRIP.sub('', text)
+    return ' '.join(text.split())  # Collapse line breaks and extra spaces
+
 
 def preprocess_data(data):
     """
@@ -19,3 +26,31 @@ def preprocess_data(data):
     if 'content' in data:
         data['content'] = clean_text(data['content'])
     return data
+
+
+def clean_document(document):
+    """
+    Clean the text fields and comment contents of a stored post.
+
+    :return: Dict of cleaned fields; comment lists keep the positions of the stored comments.
+    """
+    cleaned = {}
+    for field in TEXT_FIELDS:
+        if isinstance(document.get(field), str):
+            cleaned[field] = clean_text(document[field])
+    for field in COMMENT_FIELDS:
+        if isinstance(document.get(field), list):
+            cleaned[field] = [
+                clean_text(comment.get('content') or '') if isinstance(comment, dict) else clean_text(str(comment))
+                for comment in document[field]
+            ]
+    return cleaned
+
+
+def clean_documents(documents):
+    """
+    Clean a batch of stored posts on a worker process.
+
+    :return: List of (_id, cleaned fields) pairs.
+    """
+    return [(document["_id"], clean_document(document)) for document in documents]
@@ -0,0 +1,131 @@
+import threading
+import time
+import bson
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from src.metrics import DEDUPE_HITS, MONGO_BATCH_SIZE, MONGO_DOCUMENTS, MONGO_WRITE_SECONDS
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class BulkWriter:
+    def __init__(self, db, max_docs=500, max_bytes=4 * 1024 * 1024, flush_interval=5.0):
+        """
+        Buffer documents per collection and write them as unordered bulk upserts.
+
+        :param db: The pymongo database to write to.
+        :param max_docs: Flush a collection once this many documents are buffered.
+        :param max_bytes: Flush a collection once its buffered documents reach this BSON size.
+        :param flush_interval: Flush any buffer older than this many seconds.
+        """
+        self.db = db
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.totals = {"inserted": 0, "duplicates": 0, "failed": 0, "flushes": 0}
+
+    def add(self, collection_name, document, key="url", on_written=None):
+        """
+        Buffer a document for insertion. Existing documents with the same key are left untouched.
+
+        :param key: The field, or tuple of fields, identifying a document.
+        :param on_written: Called without arguments once the document is stored, or found
+            already stored. It is not called if the write fails.
+        """
+        fields = (key,) if isinstance(key, str) else key
+        operation = UpdateOne({field: document[field] for field in fields}, {"$setOnInsert": document}, upsert=True)
+        size = len(bson.encode(document))
+        with self._lock:
+            self._start_timer()
+            buffer = self._buffers.setdefault(
+                collection_name, {"ops": [], "callbacks": [], "bytes": 0, "since": time.monotonic()}
+            )
+            buffer["ops"].append(operation)
+            buffer["callbacks"].append(on_written)
+            buffer["bytes"] += size
+            full = len(buffer["ops"]) >= self.max_docs or buffer["bytes"] >= self.max_bytes
+        if full:
+            self.flush(collection_name)
+
+    def flush(self, collection_name=None):
+        """
+        Write buffered documents of one collection, or of every collection.
+
+        :return: List of per-collection flush reports.
+        """
+        with self._lock:
+            names = [collection_name] if collection_name else list(self._buffers)
+            pending = [(name, self._buffers.pop(name)) for name in names if name in self._buffers]
+        return [self._write(name, buffer["ops"], buffer["callbacks"]) for name, buffer in pending if buffer["ops"]]
+
+    def _write(self, collection_name, operations, callbacks=()):
+        report = {"collection": collection_name, "batch": len(operations), "inserted": 0, "duplicates": 0, "failed": 0}
+        labels = (collection_name,)
+        MONGO_BATCH_SIZE.observe(len(operations), labels)
+        started = time.perf_counter()
+        # Indices of the operations whose document was not stored
+        failed = set()
+        try:
+            result = self.db[collection_name].bulk_write(operations, ordered=False)
+            report["inserted"] = result.upserted_count
+            report["duplicates"] = result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            errors = details.get("writeErrors", [])
+            # Concurrent upserts of the same key race on the unique index; the document exists either way
+            raced = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY_ERROR)
+            report["inserted"] = details.get("nUpserted", 0)
+            report["duplicates"] = details.get("nMatched", 0) + raced
+            report["failed"] = len(errors) - raced
+            failed = {error["index"] for error in errors if error.get("code") != DUPLICATE_KEY_ERROR}
+        except PyMongoError as e:
+            print(f"[BulkWriter] Error writing {len(operations)} documents to {collection_name}: {e}")
+            report["failed"] = len(operations)
+            failed = set(range(len(operations)))
+        MONGO_WRITE_SECONDS.observe(time.perf_counter() - started, labels)
+        for field in ("inserted", "duplicates", "failed"):
+            if report[field]:
+                MONGO_DOCUMENTS.inc(report[field], (collection_name, field))
+        if report["duplicates"]:
+            DEDUPE_HITS.inc(report["duplicates"], (collection_name, "store"))
+
+        with self._lock:
+            self.totals["flushes"] += 1
+            for field in ("inserted", "duplicates", "failed"):
+                self.totals[field] += report[field]
+        for index, callback in enumerate(callbacks):
+            if callback is not None and index not in failed:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[BulkWriter] Write callback error for {collection_name}: {e}")
+        print(f"[BulkWriter] Flushed {collection_name}: {report['inserted']} inserted, "
+              f"{report['duplicates']} duplicates, {report['failed']} failed")
+        return report
+
+    def _start_timer(self):
+        # Called with the lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_timer, name="bulk-writer", daemon=True)
+            self._thread.start()
+
+    def _run_timer(self):
+        while not self._stop.wait(min(self.flush_interval, 1.0)):
+            now = time.monotonic()
+            with self._lock:
+                expired = [name for name, buffer in self._buffers.items() if now - buffer["since"] >= self.flush_interval]
+            for name in expired:
+                self.flush(name)
+
+    def close(self):
+        """
+        Stop the flush timer and write everything still buffered.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.flush()
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+
+def stored_high_water(high_water, post_numbers, stored):
+    """
+    Return the highest post number the high-water mark can move to after a crawl: every post
+    from the old mark up to it must be stored. Posts above the lowest one that failed are
+    left above the mark, so the next crawl tries the failed post again. Posts at or below the
+    old mark, found on ranked lists, do not hold it back.
+
+    :param post_numbers: Numbers of the posts the crawl tried.
+    :param stored: Numbers of the posts now stored in MongoDB.
+    """
+    newest = high_water
+    for post_number in sorted(post_numbers):
+        if post_number <= high_water:
+            continue
+        if post_number not in stored:
+            break
+        newest = max(newest, post_number)
+    return newest
+
+
+class CrawlStateStore:
+    def __init__(self, db_client, collection_name="crawl_state"):
+        """
+        Persist per-board crawl progress in MongoDB.
+
+        :param db_client: MongoDBClient instance.
+        :param collection_name: Collection holding one document per (source, board).
+        """
+        self.collection = db_client.db[collection_name]
+
+    def get_high_water(self, source, board):
+        """
+        Return the highest post number seen for a board, or 0 if it was never crawled.
+        """
+        document = self.collection.find_one({"source": source, "board": board}, {"high_water": 1})
+        return document.get("high_water", 0) if document else 0
+
+    def update_high_water(self, source, board, post_no):
+        """
+        Raise the high-water mark of a board to post_no. Lower values are ignored.
+        """
+        self.collection.update_one(
+            {"source": source, "board": board},
+            {"$max": {"high_water": post_no}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def get_revisit(self, source, board):
+        """
+        Return the stored post arrival rate (posts per second) and last visit time of a board.
+        Either is None if the board has no estimate yet.
+        """
+        document = self.collection.find_one({"source": source, "board": board}, {"post_rate": 1, "visited_at": 1})
+        document = document or {}
+        return document.get("post_rate"), document.get("visited_at")
+
+    def update_revisit(self, source, board, post_rate, visited_at):
+        """
+        Store the post arrival rate estimate of a board and the time of the visit it came from.
+        """
+        self.collection.update_one(
+            {"source": source, "board": board},
+            {"$set": {"post_rate": post_rate, "visited_at": visited_at, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
@@ -0,0 +1,174 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Post items outrank board items, so discovered posts are crawled before more pages are listed
+BOARD_PRIORITY = 0
+POST_PRIORITY = 10
+
+
+def worker_id():
+    """
+    Return an id naming this process as a lease owner.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class CrawlFrontier:
+    def __init__(self, db_client, collection_name="frontier", lease_seconds=300, max_attempts=5):
+        """
+        Shared queue of crawl work items leased by worker processes on any node.
+        A lease expires unless its owner heartbeats, so the items of a crashed worker
+        return to the queue instead of being lost.
+
+        :param db_client: MongoDBClient instance.
+        :param collection_name: Collection holding one document per (source, kind, target).
+        :param lease_seconds: Seconds a lease lasts without a heartbeat.
+        :param max_attempts: Leases of an item before it fails permanently.
+        """
+        self.collection = db_client.db[collection_name]
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue(self, source, kind, target, params=None, priority=0, requeue=True):
+        """
+        Queue a work item unless the same item is already queued or leased.
+
+        :param kind: "board" for a list crawl or "post" for a single post.
+        :param target: Board id or keyword for board items, post URL for post items.
+        :param requeue: Queue the item again if it already finished, as boards are on every tick.
+        :return: True if the item was queued.
+        """
+        now = datetime.utcnow()
+        key = {"source": source, "kind": kind, "target": target}
+        queued = {"status": "queued", "params": params or {}, "priority": priority, "attempts": 0,
+                  "not_before": now, "updated_at": now}
+        if requeue:
+            result = self.collection.update_one({**key, "status": {"$in": ["done", "failed"]}}, {"$set": queued})
+            if result.matched_count:
+                return True
+        try:
+            result = self.collection.update_one(key, {"$setOnInsert": {**queued, "created_at": now}}, upsert=True)
+        except DuplicateKeyError:
+            # Another node inserted the same item first
+            return False
+        return result.upserted_id is not None
+
+    def enqueue_board(self, source, board, params=None):
+        """
+        Queue a list crawl of a board or keyword.
+        """
+        return self.enqueue(source, "board", board, params, priority=BOARD_PRIORITY)
+
+    def enqueue_posts(self, source, board, post_urls):
+        """
+        Queue posts discovered on a board so any worker can crawl them. Posts that were
+        already crawled are not queued again.
+
+        :return: Number of posts queued.
+        """
+        return sum(
+            self.enqueue(source, "post", post_url, {"board": board}, priority=POST_PRIORITY, requeue=False)
+            for post_url in post_urls
+        )
+
+    def lease(self, owner, sources=None):
+        """
+        Atomically lease the highest-priority due item, including items whose lease expired.
+
+        :param sources: Only lease items of these sources.
+        :return: The leased item, or None if nothing is due.
+        """
+        now = datetime.utcnow()
+        query = {"$or": [
+            {"status": "queued", "not_before": {"$lte": now}},
+            # An item whose worker keeps dying while holding it stops being leased
+            {"status": "leased", "lease_expires_at": {"$lte": now}, "attempts": {"$lt": self.max_attempts}},
+        ]}
+        if sources:
+            query["source"] = {"$in": list(sources)}
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": "leased",
+                    "lease_owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "leased_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", DESCENDING), ("not_before", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, item, owner):
+        """
+        Extend a lease.
+
+        :return: False if the lease was lost, for example after expiring and being re-leased.
+        """
+        result = self.collection.update_one(
+            {"_id": item["_id"], "status": "leased", "lease_owner": owner},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+        )
+        return result.matched_count > 0
+
+    def complete(self, item, owner):
+        """
+        Mark a leased item as done.
+
+        :return: False if the lease was lost before completion.
+        """
+        return self._finish(item, owner, {"status": "done", "error": None})
+
+    def retry(self, item, owner, error, delay=60):
+        """
+        Return a leased item to the queue after delay seconds, or fail it once it ran out of attempts.
+
+        :return: True if the item will be retried.
+        """
+        if item.get("attempts", 0) >= self.max_attempts:
+            self._finish(item, owner, {"status": "failed", "error": error})
+            return False
+        self._finish(item, owner, {
+            "status": "queued",
+            "error": error,
+            "not_before": datetime.utcnow() + timedelta(seconds=delay),
+        })
+        return True
+
+    def _finish(self, item, owner, fields):
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {"_id": item["_id"], "status": "leased", "lease_owner": owner},
+            {"$set": {**fields, "lease_owner": None, "lease_expires_at": None, "updated_at": now}},
+        )
+        return result.matched_count > 0
+
+    def requeue_expired(self):
+        """
+        Return every item whose lease expired to the queue, failing the ones out of attempts.
+
+        :return: Number of items requeued.
+        """
+        now = datetime.utcnow()
+        expired = {"status": "leased", "lease_expires_at": {"$lte": now}}
+        released = {"lease_owner": None, "lease_expires_at": None, "updated_at": now}
+        self.collection.update_many(
+            {**expired, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {**released, "status": "failed", "error": "lease expired"}},
+        )
+        result = self.collection.update_many(expired, {"$set": {**released, "status": "queued"}})
+        return result.modified_count
+
+    def stats(self):
+        """
+        Count items per status.
+        """
+        return {row["_id"]: row["count"] for row in self.collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ])}
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+
+
+class MediaQueue:
+    def __init__(self, db_client, collection_name="media_queue"):
+        """
+        Persistent queue of media downloads waiting to be attached to stored posts.
+
+        :param db_client: MongoDBClient instance.
+        :param collection_name: Collection holding one document per (post, media URL).
+        """
+        self.db_client = db_client
+        self.collection_name = collection_name
+        self.collection = db_client.db[collection_name]
+
+    def enqueue(self, post_collection, post, headers=None):
+        """
+        Queue every pending media URL of a post. Items go through the bulk writer, so a
+        post and its media items are written in the same flush cycle.
+        """
+        now = datetime.utcnow()
+        for kind, items in post.get("media", {}).items():
+            for item in items:
+                self.db_client.buffer_insert(self.collection_name, {
+                    "post_collection": post_collection,
+                    "post_url": post["url"],
+                    "media_url": item["url"],
+                    "kind": kind,
+                    "headers": headers or {},
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }, key=("post_url", "media_url"))
+
+    def claim(self, stale_after=600):
+        """
+        Atomically take the oldest due item. Items left in progress for stale_after seconds,
+        for example by a crashed worker, are claimed again.
+
+        :return: The claimed item, or None if nothing is due.
+        """
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "in_progress", "claimed_at": {"$lte": now - timedelta(seconds=stale_after)}},
+            ]},
+            {"$set": {"status": "in_progress", "claimed_at": now}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def complete(self, item):
+        """
+        Mark an item as done.
+        """
+        self.collection.update_one({"_id": item["_id"]}, {"$set": {"status": "done", "finished_at": datetime.utcnow()}})
+
+    def retry(self, item, error, delay, max_attempts):
+        """
+        Record a failed attempt and schedule the next one with exponential backoff.
+
+        :return: True if the item will be retried, False if it has failed permanently.
+        """
+        attempts = item.get("attempts", 0) + 1
+        if attempts >= max_attempts:
+            self.fail(item, error, attempts)
+            return False
+        self.collection.update_one({"_id": item["_id"]}, {"$set": {
+            "status": "pending",
+            "attempts": attempts,
+            "error": error,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay * 2 ** (attempts - 1)),
+        }})
+        return True
+
+    def fail(self, item, error, attempts=None):
+        """
+        Mark an item as permanently failed.
+        """
+        self.collection.update_one({"_id": item["_id"]}, {"$set": {
+            "status": "failed",
+            "attempts": attempts if attempts is not None else item.get("attempts", 0),
+            "error": error,
+            "finished_at": datetime.utcnow(),
+        }})
+
+    def remaining(self, post_url):
+        """
+        Count the items of a post that are not finished yet.
+        """
+        return self.collection.count_documents({"post_url": post_url, "status": {"$in": ["pending", "in_progress"]}})
+
+    def failed(self, post_url):
+        """
+        Count the items of a post that failed permanently.
+        """
+        return self.collection.count_documents({"post_url": post_url, "status": "failed"})
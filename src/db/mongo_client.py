@@ -1,17 +1,87 @@
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from src.db.bulk_writer import BulkWriter
+
+SOURCE_COLLECTIONS = ("dcinside", "nate", "fmkorea", "reddit", "x")
+
+# Indexes declared per collection as (keys, options)
+INDEXES = {
+    "dcinside": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("name", ASCENDING), ("collected_at", DESCENDING)], {}),
+    ],
+    "nate": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("keyword", ASCENDING), ("timestamp", DESCENDING)], {}),
+    ],
+    "fmkorea": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("name", ASCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "reddit": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("name", ASCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "x": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("name", ASCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "crawl_state": [
+        ([("source", ASCENDING), ("board", ASCENDING)], {"unique": True}),
+    ],
+    "media": [
+        ([("url", ASCENDING)], {"unique": True}),
+        ([("sha256", ASCENDING)], {}),
+    ],
+    "media_queue": [
+        ([("post_url", ASCENDING), ("media_url", ASCENDING)], {"unique": True}),
+        ([("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+    ],
+    "frontier": [
+        ([("source", ASCENDING), ("kind", ASCENDING), ("target", ASCENDING)], {"unique": True}),
+        ([("status", ASCENDING), ("priority", DESCENDING), ("not_before", ASCENDING)], {}),
+        ([("status", ASCENDING), ("lease_expires_at", ASCENDING)], {}),
+    ],
+}
+
+# Queries on the crawl and scoring paths, checked for collection scans at startup
+HOT_QUERIES = {
+    "dcinside": [({"url": ""}, None), ({"name": ""}, [("collected_at", DESCENDING)])],
+    "nate": [({"url": ""}, None), ({"keyword": ""}, [("timestamp", DESCENDING)])],
+    "fmkorea": [({"url": ""}, None), ({"name": ""}, [("_id", DESCENDING)])],
+    "reddit": [({"url": ""}, None), ({"name": ""}, [("_id", DESCENDING)])],
+    "x": [({"url": ""}, None), ({"name": ""}, [("_id", DESCENDING)])],
+    "crawl_state": [({"source": "", "board": ""}, None)],
+    "media": [({"url": ""}, None)],
+    "media_queue": [({"status": "pending"}, [("next_attempt_at", ASCENDING)]), ({"post_url": ""}, None)],
+    "frontier": [
+        ({"status": "queued"}, [("priority", DESCENDING), ("not_before", ASCENDING)]),
+        ({"status": "leased", "lease_expires_at": {"$lte": datetime(2000, 1, 1)}}, None),
+        ({"source": "", "kind": "", "target": ""}, None),
+    ],
+}
 
 
 class MongoDBClient:
-    def __init__(self, uri, db_name):
+    def __init__(self, uri, db_name, bulk_max_docs=500, bulk_max_bytes=4 * 1024 * 1024, bulk_flush_interval=5.0):
         """
         Initialize the MongoDB client.
 
         :param uri: MongoDB connection string.
         :param db_name: Name of the database to use.
+        :param bulk_max_docs: Documents buffered per collection before a bulk write.
+        :param bulk_max_bytes: Buffered BSON bytes per collection before a bulk write.
+        :param bulk_flush_interval: Seconds a buffer may wait before it is written.
         """
         self.client = MongoClient(uri)
         self.db = self.client[db_name]
+        self.writer = BulkWriter(
+            self.db,
+            max_docs=bulk_max_docs,
+            max_bytes=bulk_max_bytes,
+            flush_interval=bulk_flush_interval,
+        )
 
     def insert_data(self, collection_name, data):
         """
@@ -29,6 +99,38 @@ class MongoDBClient:
         except DuplicateKeyError:
             return False
 
+    def buffer_insert(self, collection_name, data, key="url", on_written=None):
+        """
+        Queue a document for a buffered bulk upsert keyed on key.
+        Documents whose key already exists are counted as duplicates and left unchanged.
+
+        :param collection_name: The collection to insert data into.
+        :param data: The document to insert.
+        :param key: The field, or tuple of fields, identifying duplicates.
+        :param on_written: Called once the document is stored, or found already stored.
+        """
+        self.writer.add(collection_name, data, key=key, on_written=on_written)
+
+    def flush_writes(self):
+        """
+        Write every buffered document now.
+
+        :return: List of per-collection flush reports.
+        """
+        return self.writer.flush()
+
+    def ping(self):
+        """
+        Check that the server answers.
+
+        :return: True if it does.
+        """
+        try:
+            self.client.admin.command("ping")
+            return True
+        except PyMongoError:
+            return False
+
     def fetch_data(self, collection_name, query=None, projection=None):
         """
         Fetch data from a MongoDB collection.
@@ -74,8 +176,53 @@ class MongoDBClient:
         collection = self.db[collection_name]
         collection.create_index(fields, unique=True)
 
+    def ensure_schema(self):
+        """
+        Create every declared index. Run once at startup; create_index is a no-op for
+        indexes that already exist.
+        """
+        for collection_name, indexes in INDEXES.items():
+            collection = self.db[collection_name]
+            for keys, options in indexes:
+                try:
+                    collection.create_index(keys, **options)
+                except PyMongoError as e:
+                    print(f"[MongoDB] Failed to create index {keys} on {collection_name}: {e}")
+        print(f"[MongoDB] Schema ready for {len(INDEXES)} collections.")
+        self.report_collection_scans()
+
+    def report_collection_scans(self):
+        """
+        Explain every hot query and report the ones planned as a collection scan.
+
+        :return: List of (collection name, filter, sort) tuples that scan the collection.
+        """
+        scans = []
+        for collection_name, queries in HOT_QUERIES.items():
+            for query, sort in queries:
+                cursor = self.db[collection_name].find(query).limit(1)
+                if sort:
+                    cursor = cursor.sort(sort)
+                try:
+                    plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+                except PyMongoError as e:
+                    print(f"[MongoDB] Could not explain query on {collection_name}: {e}")
+                    continue
+                if self._has_stage(plan, "COLLSCAN"):
+                    scans.append((collection_name, query, sort))
+                    print(f"[MongoDB] Collection scan on {collection_name}: filter={list(query)} sort={sort}")
+        return scans
+
+    @classmethod
+    def _has_stage(cls, plan, stage):
+        if plan.get("stage") == stage:
+            return True
+        children = plan.get("inputStages", []) + [plan[key] for key in ("inputStage", "queryPlan") if key in plan]
+        return any(cls._has_stage(child, stage) for child in children)
+
     def close_connection(self):
         """
-        Close the MongoDB connection.
+        Flush buffered writes and close the MongoDB connection.
         """
+        self.writer.close()
         self.client.close()
@@ -0,0 +1,155 @@
+import hashlib
+import heapq
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from src.db.mongo_client import SOURCE_COLLECTIONS
+
+
+def url_digest(url):
+    """
+    Return the 64-bit digest used to identify a URL.
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "big")
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Bloom filter over 64-bit digests.
+
+        :param capacity: Expected number of entries.
+        :param error_rate: False positive rate at capacity.
+        """
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing: derive every position from the two halves of the digest
+        h1 = digest & 0xFFFFFFFF
+        h2 = (digest >> 32) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class SeenUrlIndex:
+    def __init__(self, capacity=1_000_000, error_rate=0.01, merge_threshold=50_000):
+        """
+        Exact set of seen URLs stored as 64-bit digests, fronted by a Bloom filter.
+        Digests live in a sorted array (8 bytes per URL); recent inserts are kept in a
+        small set and merged into the array once it holds merge_threshold entries.
+
+        :param capacity: Expected number of URLs, used to size the Bloom filter.
+        :param error_rate: Bloom filter false positive rate at capacity.
+        :param merge_threshold: Pending inserts kept before merging into the sorted array.
+        """
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.merge_threshold = merge_threshold
+        self._sorted = array("Q")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sorted) + len(self._pending)
+
+    def _in_sorted(self, digest):
+        position = bisect_left(self._sorted, digest)
+        return position < len(self._sorted) and self._sorted[position] == digest
+
+    def __contains__(self, url):
+        digest = url_digest(url)
+        if digest not in self.bloom:
+            return False
+        with self._lock:
+            return digest in self._pending or self._in_sorted(digest)
+
+    def add(self, url):
+        """
+        Record a URL as seen.
+        """
+        digest = url_digest(url)
+        with self._lock:
+            if digest in self._pending or self._in_sorted(digest):
+                return
+            self.bloom.add(digest)
+            self._pending.add(digest)
+            if len(self._pending) >= self.merge_threshold:
+                self._merge()
+
+    def _merge(self):
+        self._sorted = array("Q", heapq.merge(self._sorted, sorted(self._pending)))
+        self._pending = set()
+
+    def load(self, digests, chunk_size=1_000_000):
+        """
+        Bulk-load digests into the sorted array. Digests are sorted in chunks and merged,
+        so loading never holds more than one chunk as Python ints.
+        """
+        runs = []
+        chunk = []
+        for digest in digests:
+            self.bloom.add(digest)
+            chunk.append(digest)
+            if len(chunk) >= chunk_size:
+                runs.append(array("Q", sorted(chunk)))
+                chunk = []
+        if chunk:
+            runs.append(array("Q", sorted(chunk)))
+
+        with self._lock:
+            merged = array("Q")
+            last = None
+            for digest in heapq.merge(self._sorted, sorted(self._pending), *runs):
+                if digest != last:
+                    merged.append(digest)
+                    last = digest
+            self._sorted = merged
+            self._pending = set()
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the index.
+        """
+        with self._lock:
+            pending = len(self._pending) * 40  # set slot plus int object, on 64-bit CPython
+            return len(self.bloom.bits) + self._sorted.itemsize * len(self._sorted) + pending
+
+    @classmethod
+    def from_mongo(cls, db_client, collections=SOURCE_COLLECTIONS, error_rate=0.01):
+        """
+        Build an index from the URLs stored in the given collections.
+        """
+        total = sum(db_client.db[name].estimated_document_count() for name in collections)
+        index = cls(capacity=max(total * 2, 1_000_000), error_rate=error_rate)
+        index.load(
+            url_digest(document["url"])
+            for name in collections
+            for document in db_client.db[name].find({"url": {"$exists": True}}, {"url": 1, "_id": 0}).batch_size(10_000)
+        )
+        print(f"[SeenIndex] Loaded {len(index)} URLs ({index.memory_bytes() // 1024} KiB)")
+        return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_seen_index(db_client):
+    """
+    Return the process-wide seen-URL index, loading it from MongoDB on first use.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SeenUrlIndex.from_mongo(db_client)
+        return _index
@@ -0,0 +1,111 @@
+import json
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stop_on_signals(*signums):
+    """
+    Return an event set when any of the given signals arrives.
+    """
+    stop = threading.Event()
+
+    def handle(signum, frame):
+        print(f"Received {signal.Signals(signum).name}, shutting down...")
+        stop.set()
+
+    for signum in signums:
+        signal.signal(signum, handle)
+    return stop
+
+
+class HealthServer:
+    def __init__(self, port, host="127.0.0.1", checks=None, reports=None, metrics=None):
+        """
+        Serve liveness and readiness probes on a local port.
+
+        GET /healthz answers 200 while the process is up. GET /readyz answers 200 when the
+        process is ready and every check passes, 503 otherwise, with the details as JSON.
+        GET /status answers with every report as JSON, and GET /metrics with the metrics
+        registry in the Prometheus text format.
+
+        :param port: Port to listen on.
+        :param host: Interface to bind, loopback by default.
+        :param checks: Dict of name -> callable returning truthy when healthy, run on each /readyz.
+        :param reports: Dict of name -> callable returning a JSON-serializable status, run on each /status.
+        :param metrics: MetricsRegistry served on /metrics.
+        """
+        self.host = host
+        self.port = port
+        self.checks = dict(checks or {})
+        self.reports = dict(reports or {})
+        self.metrics = metrics
+        self.state = "starting"
+        self._server = None
+        self._thread = None
+
+    def set_state(self, state):
+        """
+        Set the lifecycle state reported by the probes. Only "running" is ready.
+        """
+        self.state = state
+        print(f"[Health] State: {state}")
+
+    def readiness(self):
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                results[name] = bool(check())
+            except Exception:
+                results[name] = False
+        ready = self.state == "running" and all(results.values())
+        return ready, {"state": self.state, "checks": results}
+
+    def start(self):
+        health = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/healthz":
+                    self.respond(200, {"state": health.state})
+                elif self.path == "/readyz":
+                    ready, details = health.readiness()
+                    self.respond(200 if ready else 503, details)
+                elif self.path == "/status":
+                    self.respond(200, {name: report() for name, report in health.reports.items()})
+                elif self.path == "/metrics" and health.metrics:
+                    self.respond_text(health.metrics.render())
+                else:
+                    self.respond(404, {"error": "not found"})
+
+            def respond(self, status, body):
+                payload = json.dumps(body, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def respond_text(self, text):
+                payload = text.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Probes hit this every few seconds; keep them out of the crawl log
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="health-server", daemon=True)
+        self._thread.start()
+        print(f"[Health] Serving /healthz, /readyz, /status and /metrics on {self.host}:{self._server.server_address[1]}")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
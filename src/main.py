@@ -1,8 +1,12 @@
 import os
+import signal
 from dotenv import load_dotenv
 from src.scheduler.task_scheduler import TaskScheduler
-from src.db.mongo_client import MongoDBClient
 from src.config.settings import Settings
+from src.crawlers.transport import get_transport
+from src.lifecycle import HealthServer, stop_on_signals
+from src.metrics import REGISTRY
+from src.runtime import crawl_runtime
 
 def main():
     # Load environment variables
@@ -10,22 +14,40 @@ def main():
 
     # Load settings
     settings = Settings()
+    stop = stop_on_signals(signal.SIGTERM, signal.SIGINT)
 
-    # Initialize MongoDB client
-    db_client = MongoDBClient(uri=settings.mongodb_uri, db_name=settings.mongodb_name)
+    # Configure the shared crawl services, create indexes and load the seen-URL index
+    with crawl_runtime(settings) as runtime:
+        db_client = runtime.db_client
+        health = None
+        if settings.health_port:
+            health = HealthServer(settings.health_port, checks={"mongodb": db_client.ping}, metrics=REGISTRY)
+            health.start()
 
-    # Initialize and start the scheduler
-    scheduler = TaskScheduler(db_client, settings)
-    scheduler.start()
+        # Initialize and start the scheduler
+        scheduler = TaskScheduler(db_client, settings)
+        scheduler.start()
+        if health:
+            health.checks["scheduler"] = lambda: scheduler.scheduler.running
+            health.reports["hosts"] = get_transport().limiter.stats
+            health.reports["jobs"] = scheduler.stats
+            health.set_state("running")
 
-    try:
-        # Keep the main thread alive
+        # Block until SIGTERM or SIGINT; the scheduler runs on its own threads
         print("Press Ctrl+C to exit.")
-        while True:
-            pass
-    except (KeyboardInterrupt, SystemExit):
-        scheduler.stop()
-        db_client.close_connection()
+        stop.wait()
+
+        if health:
+            health.set_state("draining")
+        drained = scheduler.stop(timeout=settings.shutdown_timeout)
+        # Closing the pools waits for their running tasks, which past the deadline are the stuck crawls
+        runtime.close(wait=drained)
+        if health:
+            health.stop()
+
+    if not drained:
+        # Crawls past the deadline run on pool threads the interpreter would wait for at exit
+        os._exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cached parse to a slow Selenium render
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        """
+        Monotonic count per label values. inc() is a dict update under an uncontended lock,
+        cheap enough for every request and stored document.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        Distribution of observed values per label values. Bucket counts are kept per bucket
+        and only made cumulative when rendered.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Bucket counts, with the last slot for values above every bound, then sum and count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, labels=()):
+        """
+        Observe the seconds the block takes, including when it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def count(self, labels=()):
+        with self._lock:
+            series = self._series.get(labels)
+            return series[2] if series else 0
+
+    def render(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class GaugeCallback:
+    def __init__(self, name, documentation, labels, collect):
+        """
+        Gauge read from collect() at scrape time, for state another component already keeps.
+
+        :param collect: Callable returning a dict of label values tuple -> value.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.collect()
+        except Exception as e:
+            print(f"[Metrics] Error collecting {self.name}: {e}")
+            values = {}
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric, or return the one already registered under its name.
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge_callback(self, name, documentation, labels, collect):
+        """
+        Register a gauge read at scrape time. A later registration under the same name replaces it.
+        """
+        metric = GaugeCallback(name, documentation, labels, collect)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Crawl
+HTTP_REQUESTS = REGISTRY.counter("crawler_http_requests_total", "HTTP requests by host and status.", ("host", "status"))
+HTTP_BYTES = REGISTRY.counter("crawler_http_response_bytes_total", "Response body bytes read by host.", ("host",))
+HTTP_SECONDS = REGISTRY.histogram("crawler_http_request_seconds", "Time to response headers by host.", ("host",))
+SELENIUM_SECONDS = REGISTRY.histogram("crawler_selenium_page_seconds", "Selenium page render time.")
+DEDUPE_HITS = REGISTRY.counter("crawler_dedupe_hits_total", "Items skipped as already stored, by source and stage.", ("source", "stage"))
+
+# Parse
+PARSE_SECONDS = REGISTRY.histogram("crawler_parse_seconds", "Page parse time on the parse pool by parser.", ("parser",))
+
+# Archive
+ARCHIVE_BYTES = REGISTRY.counter("crawler_archive_bytes_total", "Page bytes archived, raw and compressed.", ("stage",))
+
+# Media
+MEDIA_BYTES = REGISTRY.counter("crawler_media_bytes_total", "Media bytes downloaded.")
+MEDIA_SECONDS = REGISTRY.histogram("crawler_media_download_seconds", "Media download time.")
+MEDIA_DOWNLOADS = REGISTRY.counter("crawler_media_downloads_total", "Media fetches by outcome.", ("outcome",))
+
+# MongoDB
+MONGO_WRITE_SECONDS = REGISTRY.histogram("crawler_mongo_bulk_write_seconds", "Bulk write latency by collection.", ("collection",))
+MONGO_BATCH_SIZE = REGISTRY.histogram("crawler_mongo_bulk_write_batch_size", "Documents per bulk write by collection.", ("collection",), SIZE_BUCKETS)
+MONGO_DOCUMENTS = REGISTRY.counter("crawler_mongo_documents_total", "Buffered documents written by collection and outcome.", ("collection", "outcome"))
+
+# Scheduler
+JOB_SECONDS = REGISTRY.histogram("crawler_job_seconds", "Scheduled crawl run time by platform.", ("platform",))
+JOB_RUNS = REGISTRY.counter("crawler_job_runs_total", "Scheduled crawl runs by platform and outcome.", ("platform", "outcome"))
@@ -0,0 +1,46 @@
+"""
+Run a single crawl of one keyword under a profiler, outside the scheduler.
+
+    python -m src.profile_crawl dcinside <gallery_id> --profile dcinside.prof --trace
+    python -m src.profile_crawl nate <keyword> --profiler pyinstrument --profile nate.html
+
+cProfile output opens with snakeviz or `python -m pstats`. With --trace every trace of the
+run is recorded, for src.trace_summary.
+"""
+import argparse
+import time
+from dotenv import load_dotenv
+from src.config.settings import Settings
+from src.runtime import crawl_runtime
+from src.scheduler.task_scheduler import INTERVAL_SETTINGS, TaskScheduler
+from src.tracing import profiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("platform", choices=sorted(INTERVAL_SETTINGS))
+    parser.add_argument("keyword", help="Board, gallery, subreddit or query to crawl")
+    parser.add_argument("--profiler", choices=("cprofile", "pyinstrument"), default="cprofile")
+    parser.add_argument("--profile", help="Output file, crawl-<platform>.prof or .html by default")
+    parser.add_argument("--trace", action="store_true", help="Record every trace of the run")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = Settings()
+    if args.trace:
+        settings.trace_sample_rate = 1.0
+    output = args.profile or f"crawl-{args.platform}.{'html' if args.profiler == 'pyinstrument' else 'prof'}"
+
+    with crawl_runtime(settings, ensure_schema=False) as runtime:
+        db_client = runtime.db_client
+        scheduler = TaskScheduler(db_client, settings)
+        started = time.perf_counter()
+        with profiled(output, args.profiler):
+            new_items = getattr(scheduler, f"crawl_{args.platform}")(args.keyword)
+            db_client.flush_writes()
+        print(f"Crawled {args.platform} {args.keyword} in {time.perf_counter() - started:.1f}s, "
+              f"{new_items if new_items is not None else 'unknown'} new items. Profile written to {output}")
+
+
+if __name__ == "__main__":
+    main()
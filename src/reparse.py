@@ -0,0 +1,148 @@
+"""
+Parse archived post pages again with the current parsers and update the stored posts,
+without fetching anything.
+
+    python -m src.reparse dcinside
+    python -m src.reparse nate --since 2024-12-01 --dry-run
+
+Only the newest archived copy of each post is parsed. Fields the parser could not find,
+including the placeholders it fills in for them, are left as stored.
+"""
+import argparse
+import asyncio
+import re
+from datetime import datetime
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from src.config.settings import Settings
+from src.crawlers.page_archive import DEFAULT_ROOT, PageArchive
+from src.crawlers.parse_pool import ParsePool
+from src.crawlers.parsing import configure_parser, parse_dcinside_post, parse_nate_post
+from src.db.mongo_client import MongoDBClient
+
+NATE_POST_PATH = re.compile(r"^/talk/\d+$")
+
+
+def dcinside_post(url):
+    parts = urlsplit(url)
+    return parts.netloc == "gall.dcinside.com" and "/board/view" in parts.path
+
+
+def nate_post(url):
+    parts = urlsplit(url)
+    return parts.netloc == "pann.nate.com" and bool(NATE_POST_PATH.match(parts.path))
+
+
+def dcinside_fields(page):
+    return {
+        "title": page["title"],
+        "views": page["views"],
+        "recommendations": page["recommendations"],
+        "content": page["content"],
+    }
+
+
+def nate_fields(page):
+    return {"title": page["title"], "content": page["content"], "best_comments": page["comments"]}
+
+
+# Values the parsers fill in when a selector finds nothing, e.g. after a layout change. They are
+# never written over stored fields.
+PLACEHOLDERS = {"title": "No Title", "content": "No Content", "views": 0, "recommendations": 0}
+
+
+def found_fields(fields):
+    """
+    Drop the fields a parser could not find from a dict of stored fields.
+    """
+    return {
+        key: value for key, value in fields.items()
+        if value not in (None, "", []) and not (key in PLACEHOLDERS and value == PLACEHOLDERS[key])
+    }
+
+
+# Source -> (archived URL filter, page parser, stored fields built from a parsed page)
+REPARSERS = {
+    "dcinside": (dcinside_post, parse_dcinside_post, dcinside_fields),
+    "nate": (nate_post, parse_nate_post, nate_fields),
+}
+
+
+async def parse_batch(pool, parser, batch):
+    return await asyncio.gather(*(pool.parse(parser, body) for _, body in batch), return_exceptions=True)
+
+
+def reparse(db, archive, source, pool, since=None, batch_size=200, dry_run=False):
+    """
+    Stream the newest archived page of every post of a source through its parser on the
+    parse pool and bulk-update the stored posts.
+
+    :param db: Database holding the post collections.
+    :param since: Only pages fetched at or after this datetime.
+    :return: Dict with the number of pages "parsed", parse "errors", posts "matched" and "modified".
+    """
+    matches, parser, fields = REPARSERS[source]
+    since_ts = since.timestamp() if since else None
+    entries = archive.latest(
+        lambda entry: matches(entry["url"]) and (since_ts is None or entry["fetched_at"] >= since_ts)
+    )
+    stats = {"pages": len(entries), "parsed": 0, "errors": 0, "matched": 0, "modified": 0}
+    collection = db[source]
+    reparsed_at = datetime.utcnow()
+
+    def flush(batch):
+        results = asyncio.run(parse_batch(pool, parser, batch))
+        operations = []
+        for (entry, _), page in zip(batch, results):
+            if isinstance(page, Exception):
+                print(f"[Reparse] Failed to parse {entry['url']}: {page}")
+                stats["errors"] += 1
+                continue
+            stats["parsed"] += 1
+            update = found_fields(fields(page))
+            if update:
+                update["reparsed_at"] = reparsed_at
+                operations.append(UpdateOne({"url": entry["url"]}, {"$set": update}))
+        if operations and not dry_run:
+            result = collection.bulk_write(operations, ordered=False)
+            stats["matched"] += result.matched_count
+            stats["modified"] += result.modified_count
+
+    batch = []
+    for record in archive.iter_pages(entries):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", choices=sorted(REPARSERS))
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only pages fetched since this date, e.g. 2024-12-01")
+    parser.add_argument("--batch-size", type=int, default=200, help="Pages parsed and written per bulk update")
+    parser.add_argument("--dry-run", action="store_true", help="Parse without updating MongoDB")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = Settings()
+    configure_parser(settings.html_parser)
+    pool = ParsePool(max_workers=settings.parse_workers)
+    archive = PageArchive(root=settings.archive_root or DEFAULT_ROOT)
+    db_client = MongoDBClient(uri=settings.mongodb_uri, db_name=settings.mongodb_name)
+    try:
+        stats = reparse(db_client.db, archive, args.source, pool, since=args.since,
+                        batch_size=args.batch_size, dry_run=args.dry_run)
+        print(f"[Reparse] {args.source}: {stats}")
+    finally:
+        pool.close()
+        archive.close()
+        db_client.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from src.crawlers.driver_pool import configure_driver_pool, close_driver_pool
+from src.crawlers.media_store import configure_media_store, close_media_store
+from src.crawlers.page_archive import configure_page_archive, close_page_archive
+from src.crawlers.parse_pool import configure_parse_pool, close_parse_pool
+from src.crawlers.parsing import configure_parser
+from src.crawlers.transport import configure_transport, close_transport
+from src.db.mongo_client import MongoDBClient
+from src.db.seen_index import get_seen_index
+from src.tracing import close_tracer, configure_tracer
+
+
+class CrawlRuntime:
+    def __init__(self, settings, ensure_schema=True):
+        """
+        Configure the process-wide crawl services every entry point shares: the HTTP
+        transport, page archive, HTML parser, parse pool, Selenium driver pool, tracer,
+        MongoDB client, seen-URL index and media store.
+
+        :param ensure_schema: Create the indexes before the seen-URL index is loaded.
+        """
+        self.settings = settings
+        configure_transport(settings)
+        configure_page_archive(settings)
+        configure_parser(settings.html_parser)
+        configure_parse_pool(settings)
+        configure_driver_pool(settings)
+        configure_tracer(settings)
+        self.db_client = MongoDBClient(
+            uri=settings.mongodb_uri,
+            db_name=settings.mongodb_name,
+            bulk_max_docs=settings.mongodb_bulk_max_docs,
+            bulk_max_bytes=settings.mongodb_bulk_max_bytes,
+            bulk_flush_interval=settings.mongodb_bulk_flush_interval,
+        )
+        if ensure_schema:
+            self.db_client.ensure_schema()
+        get_seen_index(self.db_client)
+        configure_media_store(self.db_client, settings)
+        self.closed = False
+
+    def close(self, wait=True):
+        """
+        Flush buffered writes and close every service. Closing again does nothing.
+
+        :param wait: Wait for parses and downloads still running. Pass False when crawls
+            overran the shutdown deadline, so closing does not wait on them.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.db_client.flush_writes()
+        close_driver_pool()
+        close_parse_pool(wait=wait)
+        close_media_store(wait=wait)
+        close_transport()
+        close_page_archive()
+        close_tracer()
+        self.db_client.close_connection()
+
+
+@contextmanager
+def crawl_runtime(settings, ensure_schema=True):
+    """
+    Run a block with the crawl services configured, closing them when it ends.
+    """
+    runtime = CrawlRuntime(settings, ensure_schema)
+    try:
+        yield runtime
+    finally:
+        runtime.close()
@@ -0,0 +1,194 @@
+import threading
+from src.crawlers.dcinside_crawler import DCInsideCrawler
+from src.crawlers.fm_korea_crawler import FMKoreaCrawler
+from src.crawlers.nate_crawler import NateCrawler
+from src.db.crawl_state import CrawlStateStore
+from src.db.frontier import CrawlFrontier, worker_id
+from src.scheduler.revisit import RevisitPlanner
+
+
+class FrontierWorker:
+    def __init__(self, db_client, settings, frontier=None, threads=1, sources=None, idle_sleep=5.0,
+                 retry_delay=60.0, sweep_interval=None):
+        """
+        Lease work items from the shared crawl frontier and crawl them. Any number of
+        workers on any number of nodes can run against the same frontier.
+
+        :param db_client: MongoDBClient instance.
+        :param settings: Application settings used to build the crawlers.
+        :param frontier: CrawlFrontier to lease from, built from the settings if omitted.
+        :param threads: Items crawled at once by this process.
+        :param sources: Only lease items of these sources.
+        :param idle_sleep: Seconds to wait when no item is due.
+        :param retry_delay: Seconds before a failed item is leased again.
+        :param sweep_interval: Seconds between sweeps of expired leases, the lease length by default.
+        """
+        self.db_client = db_client
+        self.settings = settings
+        self.frontier = frontier or CrawlFrontier(
+            db_client,
+            lease_seconds=settings.frontier_lease_seconds,
+            max_attempts=settings.frontier_max_attempts,
+        )
+        self.threads = threads
+        self.sources = sources
+        self.idle_sleep = idle_sleep
+        self.retry_delay = retry_delay
+        self.sweep_interval = sweep_interval or self.frontier.lease_seconds
+        # Board visits feed the post rate estimates the scheduler plans the next visits from
+        self.revisit = None
+        if settings.revisit_mode == "adaptive":
+            self.revisit = RevisitPlanner.from_settings(settings, CrawlStateStore(db_client))
+        self.owner = worker_id()
+        self.stats = {"done": 0, "retried": 0, "failed": 0, "lost": 0}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Crawlers run their own event loop per call, so each thread keeps its own instances
+        self._local = threading.local()
+
+    def crawler(self, source):
+        """
+        Return this thread's crawler for a source.
+        """
+        crawlers = self._local.__dict__.setdefault("crawlers", {})
+        if source not in crawlers:
+            if source == "dcinside":
+                crawlers[source] = DCInsideCrawler(
+                    self.db_client,
+                    max_per_host=self.settings.http_max_per_host,
+                    fetch_mode=self.settings.dcinside_fetch_mode,
+                    comment_fanout=self.settings.comment_fanout,
+                    comment_max_pages=self.settings.comment_max_pages,
+                )
+            elif source == "nate":
+                crawlers[source] = NateCrawler(
+                    self.db_client,
+                    max_per_host=self.settings.http_max_per_host,
+                    comment_fanout=self.settings.comment_fanout,
+                    comment_max_pages=self.settings.comment_max_pages,
+                )
+            elif source == "fmkorea":
+                crawlers[source] = FMKoreaCrawler(self.db_client)
+            else:
+                raise ValueError(f"No crawler for source: {source}")
+        return crawlers[source]
+
+    def handle(self, item):
+        """
+        Crawl one work item.
+
+        :return: False if the item should be retried.
+        """
+        source, kind, target, params = item["source"], item["kind"], item["target"], item.get("params", {})
+        crawler = self.crawler(source)
+        if kind == "post":
+            return crawler.process_post(target, params["board"])
+        if source == "dcinside":
+            new_items = crawler.fetch_posts(gallery_id=target, max_pages=params.get("max_pages", 1), frontier=self.frontier)
+        elif source == "nate":
+            new_items = crawler.fetch_posts(target, start_page=1, end_page=params.get("max_pages", 2), frontier=self.frontier)
+        else:
+            new_items = crawler.fetch_posts(target, max_pages=params.get("max_pages", 5))
+        if self.revisit:
+            self.revisit.observe(source, target, new_items)
+        return True
+
+    def work_once(self):
+        """
+        Lease and crawl one item, heartbeating its lease until the crawl ends.
+
+        :return: False if no item was due.
+        """
+        item = self.frontier.lease(self.owner, self.sources)
+        if not item:
+            return False
+
+        lost = threading.Event()
+        finished = threading.Event()
+
+        def heartbeat():
+            while not finished.wait(self.frontier.lease_seconds / 3):
+                if not self.frontier.heartbeat(item, self.owner):
+                    lost.set()
+                    return
+
+        beat = threading.Thread(target=heartbeat, name="frontier-heartbeat", daemon=True)
+        beat.start()
+        try:
+            succeeded, error = self.handle(item), "crawl returned no result"
+        except Exception as e:
+            succeeded, error = False, str(e)
+            print(f"[Frontier] Error crawling {item['source']} {item['kind']} {item['target']}: {e}")
+        finally:
+            finished.set()
+            beat.join()
+
+        if lost.is_set():
+            # Another worker holds the item now; the store upserts make the overlap harmless
+            outcome = "lost"
+        elif succeeded:
+            # Buffered posts must reach MongoDB before the item is marked done, or a crash would lose them
+            self.db_client.flush_writes()
+            outcome = "done" if self.frontier.complete(item, self.owner) else "lost"
+        else:
+            retried = self.frontier.retry(item, self.owner, error, self.retry_delay)
+            outcome = "retried" if retried else "failed"
+        with self._lock:
+            self.stats[outcome] += 1
+        return True
+
+    def _run_thread(self):
+        while not self._stop.is_set():
+            try:
+                if not self.work_once():
+                    self._stop.wait(self.idle_sleep)
+            except Exception as e:
+                print(f"[Frontier] Worker error: {e}")
+                self._stop.wait(self.idle_sleep)
+
+    def sweep(self):
+        """
+        Requeue the items whose lease expired. Items out of attempts are failed here, since
+        lease() skips them and they would otherwise stay leased, and never be queued again.
+
+        :return: Number of items requeued.
+        """
+        requeued = self.frontier.requeue_expired()
+        if requeued:
+            print(f"[Frontier] Requeued {requeued} items with expired leases")
+        return requeued
+
+    def _run_sweeper(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[Frontier] Sweep error: {e}")
+
+    def run(self):
+        """
+        Crawl items on the configured number of threads until stop() is called.
+        """
+        print(f"[Frontier] Worker {self.owner} started with {self.threads} threads")
+        workers = [
+            threading.Thread(target=self._run_thread, name=f"frontier-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        threading.Thread(target=self._run_sweeper, name="frontier-sweeper", daemon=True).start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            print("[Frontier] Stopping, finishing leased items...")
+            self.stop()
+            for worker in workers:
+                worker.join()
+        print(f"[Frontier] Worker {self.owner} stopped: {self.stats}")
+
+    def stop(self):
+        """
+        Stop leasing new items. Items being crawled are finished first.
+        """
+        self._stop.set()
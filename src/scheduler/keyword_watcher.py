@@ -0,0 +1,90 @@
+import threading
+from pymongo.errors import OperationFailure, PyMongoError
+
+# ChangeStreamHistoryLost, and ChangeStreamFatalError raised by older servers: the resume
+# token fell off the oplog, so the stream has to restart from now
+HISTORY_LOST_CODES = {280, 286}
+# Raised when the server has no change streams, e.g. a standalone mongod
+UNSUPPORTED_CODES = {40573}
+
+
+class KeywordWatcher:
+    def __init__(self, collection, on_change, poll_interval=30.0):
+        """
+        Call on_change whenever the keywords collection changes. Changes are read from a
+        change stream, or by polling the collection on a standalone mongod, which has none.
+
+        :param collection: The keywords collection.
+        :param on_change: Called with no arguments after every change, and once at start.
+        :param poll_interval: Seconds between reads when polling, and before reopening a failed stream.
+        """
+        self.collection = collection
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.mode = None
+        # Where a reopened change stream carries on from
+        self.resume_token = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="keyword-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"[Keywords] Error applying keyword change: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._watch()
+            except OperationFailure as e:
+                if e.code in HISTORY_LOST_CODES:
+                    # Changes since the token are gone; reopening without it rereads the keywords
+                    print(f"[Keywords] Change stream history lost, restarting with a full resync: {e}")
+                    self.resume_token = None
+                elif e.code in UNSUPPORTED_CODES:
+                    # Change streams need a replica set or sharded cluster
+                    print(f"[Keywords] Change stream unavailable, polling every {self.poll_interval}s: {e}")
+                    self._poll()
+                else:
+                    print(f"[Keywords] Change stream failed, reopening: {e}")
+                    self._stop.wait(self.poll_interval)
+            except PyMongoError as e:
+                print(f"[Keywords] Change stream failed, reopening: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _watch(self):
+        """
+        Follow the change stream until stopped, keeping the token to resume it from after a failure.
+        """
+        with self.collection.watch(resume_after=self.resume_token, max_await_time_ms=1000) as stream:
+            self.mode = "change stream"
+            # Changes made before the stream opened are picked up by this read
+            self._notify()
+            while not self._stop.is_set():
+                change = stream.try_next()
+                self.resume_token = stream.resume_token
+                if change:
+                    self._notify()
+
+    def _poll(self):
+        self.mode = "polling"
+        last = None
+        while not self._stop.is_set():
+            try:
+                current = list(self.collection.find({}).sort("_id", 1))
+                if current != last:
+                    last = current
+                    self._notify()
+            except PyMongoError as e:
+                print(f"[Keywords] Error polling keywords: {e}")
+            self._stop.wait(self.poll_interval)
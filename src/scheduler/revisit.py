@@ -0,0 +1,131 @@
+import math
+import threading
+from datetime import datetime
+
+
+class RevisitPlanner:
+    def __init__(self, crawl_state=None, target_new=5.0, min_interval=120.0, max_interval=6 * 3600.0,
+                 horizon=6 * 3600.0, budget=0.0):
+        """
+        Plan when each board is visited next from an estimate of its post arrival rate.
+        Visits are spaced so each one finds about target_new new posts: hot boards are
+        visited often and quiet ones rarely.
+
+        The rate is an exponentially weighted average of the new posts found per second on
+        each visit, weighted by how long the visit covered, so it follows bursts within about
+        one horizon while a single quiet visit barely moves a long-standing estimate.
+
+        :param crawl_state: CrawlStateStore persisting the estimates, or None to keep them in memory.
+        :param target_new: New posts a visit should find on average.
+        :param min_interval: Shortest time between visits of a board, in seconds.
+        :param max_interval: Longest time between visits of a board, in seconds.
+        :param horizon: Time constant of the rate average, in seconds.
+        :param budget: Board visits per hour across all boards, 0 for unlimited. When the planned
+            intervals would exceed it, all of them are stretched by the same factor.
+        """
+        self.crawl_state = crawl_state
+        self.target_new = target_new
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.horizon = horizon
+        self.budget = budget
+        # (source, board) -> [post rate, last visit time]
+        self._states = {}
+        # (source, board) -> interval before the budget is applied, for every board planned so far
+        self._planned = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, crawl_state=None):
+        return cls(
+            crawl_state,
+            target_new=settings.revisit_target_new,
+            min_interval=settings.revisit_min_interval * 60,
+            max_interval=settings.revisit_max_interval * 60,
+            horizon=settings.revisit_horizon * 60,
+            budget=settings.revisit_budget,
+        )
+
+    def observe(self, source, board, new_items, now=None):
+        """
+        Update the arrival rate of a board from a visit that found new_items new posts.
+        The first visit of a board only records its time, since it finds the whole backlog.
+
+        :return: The updated rate in posts per second, or None if there is no estimate yet.
+        """
+        now = now or datetime.utcnow()
+        key = (source, board)
+        # Frontier workers on other nodes visit the same boards, so the stored estimate wins
+        stored = list(self.crawl_state.get_revisit(source, board)) if self.crawl_state else None
+        with self._lock:
+            if stored is not None:
+                self._states[key] = stored
+            rate, visited_at = self._states.get(key, [None, None])
+            if visited_at is not None and now > visited_at:
+                elapsed = (now - visited_at).total_seconds()
+                observed = new_items / elapsed
+                if rate is None:
+                    rate = observed
+                else:
+                    weight = 1 - math.exp(-elapsed / self.horizon)
+                    rate += weight * (observed - rate)
+            self._states[key] = [rate, now]
+            if rate is not None:
+                self._planned[key] = self._base_interval(rate)
+        if self.crawl_state:
+            self.crawl_state.update_revisit(source, board, rate, now)
+        return rate
+
+    def interval(self, source, board, default):
+        """
+        Return the seconds until the next visit of a board.
+
+        :param default: Interval in seconds used while the board has no rate estimate.
+        """
+        key = (source, board)
+        stored = list(self.crawl_state.get_revisit(source, board)) if self.crawl_state else None
+        with self._lock:
+            if stored is not None:
+                self._states[key] = stored
+            rate = self._states.get(key, [None, None])[0]
+            if rate is None:
+                base = min(max(default, self.min_interval), self.max_interval)
+            else:
+                base = self._base_interval(rate)
+            self._planned[key] = base
+            return min(base * self._stretch(), self.max_interval)
+
+    def _base_interval(self, rate):
+        if rate <= 0:
+            return self.max_interval
+        return min(max(self.target_new / rate, self.min_interval), self.max_interval)
+
+    def _stretch(self):
+        # Called with the lock held
+        if not self.budget:
+            return 1.0
+        visits_per_hour = sum(3600 / interval for interval in self._planned.values())
+        return max(visits_per_hour / self.budget, 1.0)
+
+    def forget(self, source, board):
+        """
+        Stop counting a board against the budget, for example after its keyword was removed.
+        """
+        with self._lock:
+            self._states.pop((source, board), None)
+            self._planned.pop((source, board), None)
+
+    def stats(self):
+        """
+        Return the rate in posts per hour and the planned interval in seconds of every board.
+        """
+        with self._lock:
+            stretch = self._stretch()
+            return {
+                f"{source}:{board}": {
+                    "posts_per_hour": None if state[0] is None else state[0] * 3600,
+                    "interval": min(self._planned[(source, board)] * stretch, self.max_interval)
+                    if (source, board) in self._planned else None,
+                }
+                for (source, board), state in self._states.items()
+            }
@@ -1,40 +1,154 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from src.crawlers.nate_crawler import NateCrawler
 from src.crawlers.dcinside_crawler import DCInsideCrawler
+from src.crawlers.fm_korea_crawler import FMKoreaCrawler
+from src.crawlers.reddit_crawler import RedditCrawler
+from src.crawlers.x_crawler import XCrawler
+from src.crawlers.media_store import get_media_store
+from src.crawlers.media_worker import MediaWorker
+from src.db.crawl_state import CrawlStateStore
+from src.db.frontier import CrawlFrontier
+from src.metrics import JOB_RUNS, JOB_SECONDS
+from src.scheduler.keyword_watcher import KeywordWatcher
+from src.scheduler.revisit import RevisitPlanner
+
+# Platform in the keywords document -> setting holding its crawl interval in minutes
+INTERVAL_SETTINGS = {
+    "nate": "nate_interval",
+    "dcinside": "dcinside_interval",
+    "fmkorea": "fm_korea_interval",
+    "reddit": "reddit_interval",
+    "x": "x_interval",
+}
+
+# List pages crawled per board. These platforms are crawled by src.worker processes when the frontier is enabled,
+# and their visits are planned from post velocity in adaptive revisit mode.
+PAGES_PER_BOARD = {"nate": 2, "dcinside": 1, "fmkorea": 5}
+
 
 class TaskScheduler:
     def __init__(self, db_client, settings):
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = BackgroundScheduler(
+            executors={"default": ThreadPoolExecutor(settings.scheduler_max_workers)},
+            # A crawl still running at its next tick is skipped instead of overlapped
+            job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 60},
+        )
+        self.scheduler.add_listener(self.on_job_skipped, EVENT_JOB_MAX_INSTANCES)
         self.db_client = db_client
         self.settings = settings
+        self.media_worker = MediaWorker(
+            db_client,
+            get_media_store(db_client),
+            bandwidth=settings.media_bandwidth_limit,
+            max_bytes=settings.media_max_bytes,
+            max_attempts=settings.media_max_attempts,
+            retry_delay=settings.media_retry_delay,
+        )
+        # In frontier mode jobs only queue boards; src.worker processes crawl them
+        self.frontier = None
+        if settings.crawl_mode == "frontier":
+            self.frontier = CrawlFrontier(
+                db_client,
+                lease_seconds=settings.frontier_lease_seconds,
+                max_attempts=settings.frontier_max_attempts,
+            )
+        # Board platforms are revisited at a pace following their post rate instead of a fixed interval
+        self.revisit = None
+        if settings.revisit_mode == "adaptive":
+            self.revisit = RevisitPlanner.from_settings(settings, CrawlStateStore(db_client))
+        self.job_stats = {}
+        self._stats_lock = threading.Lock()
+        # (platform, keyword) pairs with a crawl job, kept in step with the keywords collection
+        self.keyword_jobs = set()
+        self._keywords_lock = threading.Lock()
+        # Jobs currently running, waited on by stop()
+        self.in_flight = 0
+        self._idle = threading.Condition()
+        self.keyword_watcher = KeywordWatcher(db_client.db["keywords"], self.sync_keywords, settings.keyword_poll_interval)
 
     def register_tasks(self):
         """
-        Register tasks dynamically for each platform's keywords.
-        """
-        keywords = self.fetch_keywords()
-        for platform, platform_keywords in keywords.items():
-            if platform == "nate" and platform_keywords:
-                self.scheduler.add_job(
-                    self.run_nate_crawler,
-                    # IntervalTrigger(minutes=self.settings.nate_interval),
-                    args=[platform_keywords],
-                    id=f"nate_crawler",
-                    replace_existing=True
-                )
-            # elif platform == "dcinside" and platform_keywords:
-            #     self.scheduler.add_job(
-            #         self.run_dcinside_crawler,
-            #         IntervalTrigger(minutes=self.settings.dcinside_interval),
-            #         args=[platform_keywords],
-            #         id=f"dcinside_crawler",
-            #         replace_existing=True
-            #     )
-            # Add other platforms (FM Korea, Reddit, etc.) here as needed
-
-        print("[Scheduler] All tasks have been registered.")
+        Register one interval job per platform keyword, plus the media worker.
+        """
+        self.sync_keywords()
+
+        self.scheduler.add_job(
+            self.run_media_worker,
+            IntervalTrigger(seconds=self.settings.media_worker_interval),
+            id="media_worker",
+            replace_existing=True
+        )
+
+        print(f"[Scheduler] {len(self.scheduler.get_jobs())} tasks have been registered.")
+
+    def add_crawl_job(self, platform, keyword):
+        """
+        Schedule a crawl of one keyword at its platform's interval. First runs are spread over
+        the start-up window and every run is jittered, so keywords do not hit a site together.
+        """
+        interval = timedelta(minutes=getattr(self.settings, INTERVAL_SETTINGS[platform]))
+        spread = min(interval.total_seconds(), self.settings.scheduler_start_spread)
+        job_id = f"{platform}:{keyword}"
+        self.scheduler.add_job(
+            self.run_crawler,
+            IntervalTrigger(seconds=interval.total_seconds(), jitter=self.settings.scheduler_jitter),
+            args=[platform, keyword],
+            id=job_id,
+            name=job_id,
+            next_run_time=datetime.now() + timedelta(seconds=random.uniform(0, spread)),
+            replace_existing=True
+        )
+
+    def remove_crawl_job(self, platform, keyword):
+        """
+        Unschedule the crawl of one keyword. A run already in progress finishes normally.
+        """
+        try:
+            self.scheduler.remove_job(f"{platform}:{keyword}")
+        except JobLookupError:
+            pass
+        if self.revisit:
+            self.revisit.forget(platform, keyword)
+
+    def sync_keywords(self):
+        """
+        Bring the crawl jobs in line with the keywords document, adding jobs for new keywords
+        and removing those of dropped ones. Jobs of unchanged keywords are left alone.
+
+        :return: Lists of the (platform, keyword) pairs added and removed.
+        """
+        with self._keywords_lock:
+            wanted = set()
+            for platform, platform_keywords in self.fetch_keywords().items():
+                if platform not in INTERVAL_SETTINGS:
+                    print(f"[Scheduler] No crawler for platform: {platform}")
+                    continue
+                wanted.update((platform, keyword) for keyword in platform_keywords or [])
+
+            added = sorted(wanted - self.keyword_jobs)
+            removed = sorted(self.keyword_jobs - wanted)
+            for platform, keyword in added:
+                self.add_crawl_job(platform, keyword)
+            for platform, keyword in removed:
+                self.remove_crawl_job(platform, keyword)
+            self.keyword_jobs = wanted
+
+        if added or removed:
+            print(
+                f"[Scheduler] {datetime.now():%Y-%m-%d %H:%M:%S} Keywords changed: "
+                f"added {[f'{p}:{k}' for p, k in added]}, removed {[f'{p}:{k}' for p, k in removed]}"
+            )
+        return added, removed
 
     def fetch_keywords(self):
         collection = self.db_client.db["keywords"]
@@ -44,23 +158,150 @@ class TaskScheduler:
             return {}
         return {key: value for key, value in document.items() if key != "_id"}
 
-    def run_nate_crawler(self, keywords):
-        print(f"[Scheduler] Running Nate Pann crawler for keywords: {keywords}")
+    def run_crawler(self, platform, keyword):
+        """
+        Crawl one keyword of a platform and record how long it took.
+        """
+        job_id = f"{platform}:{keyword}"
+        started = time.monotonic()
+        failed = False
+        new_items = None
+        with self.running():
+            try:
+                if self.frontier and platform in PAGES_PER_BOARD:
+                    self.frontier.enqueue_board(platform, keyword, {"max_pages": PAGES_PER_BOARD[platform]})
+                else:
+                    new_items = getattr(self, f"crawl_{platform}")(keyword)
+            except Exception as e:
+                failed = True
+                print(f"[Scheduler] Error in {platform} crawler for {keyword}: {e}")
+            self.record_run(job_id, time.monotonic() - started, failed)
+            if self.revisit and platform in PAGES_PER_BOARD:
+                self.plan_next_visit(platform, keyword, new_items)
+
+    def plan_next_visit(self, platform, keyword, new_items=None):
+        """
+        Move the next run of a board job to the time its post rate calls for.
+
+        :param new_items: New posts the run found, or None if it was not crawled here, in which
+            case the estimate kept by the frontier workers is used.
+        """
+        if new_items is not None:
+            self.revisit.observe(platform, keyword, new_items)
+        default = getattr(self.settings, INTERVAL_SETTINGS[platform]) * 60
+        interval = self.revisit.interval(platform, keyword, default)
+        delay = interval + random.uniform(0, self.settings.scheduler_jitter)
         try:
-            nate_crawler = NateCrawler(self.db_client)
-            for keyword in keywords:
-                nate_crawler.fetch_posts(keyword, start_page=1, end_page=2)
-        except Exception as e:
-            print(f"[Scheduler] Error in Nate Pann crawler: {e}")
-
-    def run_dcinside_crawler(self, keywords):
-        print(f"[Scheduler] Running DCInside crawler for keywords: {keywords}")
+            self.scheduler.modify_job(f"{platform}:{keyword}", next_run_time=datetime.now() + timedelta(seconds=delay))
+        except JobLookupError:
+            # The job was removed while it ran
+            pass
+
+    def crawl_nate(self, keyword):
+        print(f"[Scheduler] Running Nate Pann crawler for keyword: {keyword}")
+        nate_crawler = NateCrawler(
+            self.db_client,
+            max_per_host=self.settings.http_max_per_host,
+            comment_fanout=self.settings.comment_fanout,
+            comment_max_pages=self.settings.comment_max_pages,
+        )
+        return nate_crawler.fetch_posts(keyword, start_page=1, end_page=PAGES_PER_BOARD["nate"])
+
+    def crawl_dcinside(self, keyword):
+        print(f"[Scheduler] Running DCInside crawler for gallery: {keyword}")
+        dc_crawler = DCInsideCrawler(
+            self.db_client,
+            max_per_host=self.settings.http_max_per_host,
+            fetch_mode=self.settings.dcinside_fetch_mode,
+            comment_fanout=self.settings.comment_fanout,
+            comment_max_pages=self.settings.comment_max_pages,
+        )
+        new_items = dc_crawler.fetch_posts(gallery_id=keyword, max_pages=PAGES_PER_BOARD["dcinside"])
+        print(f"[Scheduler] DCInside fetch stats for {keyword}: {dc_crawler.fetch_stats}")
+        print(f"[Scheduler] Selenium driver pool: {dc_crawler.driver_pool.metrics()}")
+        return new_items
+
+    def crawl_fmkorea(self, keyword):
+        print(f"[Scheduler] Running FM Korea crawler for board: {keyword}")
+        return FMKoreaCrawler(self.db_client).fetch_posts(keyword, max_pages=PAGES_PER_BOARD["fmkorea"])
+
+    def crawl_reddit(self, keyword):
+        print(f"[Scheduler] Running Reddit crawler for subreddit: {keyword}")
+        RedditCrawler(
+            self.db_client,
+            self.settings.reddit_client_id,
+            self.settings.reddit_client_secret,
+            self.settings.reddit_user_agent,
+        ).fetch_posts(keyword)
+
+    def crawl_x(self, keyword):
+        print(f"[Scheduler] Running X crawler for query: {keyword}")
+        XCrawler(
+            self.db_client,
+            self.settings.x_api_key,
+            self.settings.x_api_secret,
+            self.settings.x_access_token,
+            self.settings.x_access_secret,
+        ).fetch_tweets(keyword)
+
+    def run_media_worker(self):
+        with self.running():
+            try:
+                self.media_worker.drain()
+            except Exception as e:
+                print(f"[Scheduler] Error in media worker: {e}")
+
+    @contextmanager
+    def running(self):
+        """
+        Count a job as in flight while the block runs.
+        """
+        with self._idle:
+            self.in_flight += 1
         try:
-            dc_crawler = DCInsideCrawler(self.db_client)
-            for keyword in keywords:
-                dc_crawler.fetch_posts(gallery_id=keyword, max_pages=1)
-        except Exception as e:
-            print(f"[Scheduler] Error in DCInside crawler: {e}")
+            yield
+        finally:
+            with self._idle:
+                self.in_flight -= 1
+                self._idle.notify_all()
+
+    def _job_stats(self, job_id):
+        # Called with the stats lock held
+        return self.job_stats.setdefault(job_id, {
+            "runs": 0, "failures": 0, "skipped": 0, "last_seconds": 0.0, "max_seconds": 0.0, "total_seconds": 0.0,
+        })
+
+    def record_run(self, job_id, seconds, failed=False):
+        platform = (job_id.split(":", 1)[0],)
+        JOB_SECONDS.observe(seconds, platform)
+        JOB_RUNS.inc(labels=platform + ("failed" if failed else "ok",))
+        with self._stats_lock:
+            stats = self._job_stats(job_id)
+            stats["runs"] += 1
+            stats["failures"] += int(failed)
+            stats["last_seconds"] = seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["total_seconds"] += seconds
+            stats["last_run"] = datetime.now()
+
+    def on_job_skipped(self, event):
+        """
+        Count ticks skipped because the previous run of the job was still going.
+        """
+        JOB_RUNS.inc(labels=(event.job_id.split(":", 1)[0], "skipped"))
+        with self._stats_lock:
+            self._job_stats(event.job_id)["skipped"] += 1
+        print(f"[Scheduler] Skipped {event.job_id}: previous run still in progress")
+
+    def stats(self):
+        """
+        Return run-duration statistics per job, with the mean duration in seconds.
+        """
+        with self._stats_lock:
+            return {
+                job_id: {**stats, "mean_seconds": stats["total_seconds"] / stats["runs"] if stats["runs"] else 0.0}
+                for job_id, stats in self.job_stats.items()
+            }
 
     def start(self):
         """
@@ -69,12 +310,26 @@ class TaskScheduler:
         print("[Scheduler] Starting the scheduler...")
         self.register_tasks()
         self.scheduler.start()
+        self.keyword_watcher.start()
         print("[Scheduler] Scheduler started successfully.")
 
-    def stop(self):
+    def stop(self, timeout=None):
         """
-        Stop the scheduler.
+        Stop dispatching jobs and wait for the running ones to finish.
+
+        :param timeout: Seconds to wait for running jobs, or None to wait for all of them.
+        :return: True if every running job finished in time.
         """
         print("[Scheduler] Stopping the scheduler...")
-        self.scheduler.shutdown()
-        print("[Scheduler] Scheduler stopped.")
+        self.keyword_watcher.stop()
+        if not self.scheduler.running:
+            return True
+        self.scheduler.pause()
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self.in_flight == 0, timeout)
+        self.scheduler.shutdown(wait=drained)
+        if drained:
+            print("[Scheduler] Scheduler stopped.")
+        else:
+            print(f"[Scheduler] Scheduler stopped with {self.in_flight} jobs still running after {timeout}s.")
+        return drained
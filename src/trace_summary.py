@@ -0,0 +1,143 @@
+"""
+Summarize a crawl trace log written by src.tracing.
+
+Prints per-stage latency percentiles, the share of each trace's wall time spent on its
+critical path in every stage, and the slowest traces with their stage breakdown:
+    python -m src.trace_summary data/traces.jsonl --top 10
+    python -m src.trace_summary data/traces.jsonl --source nate --name post
+"""
+import argparse
+import json
+import math
+from collections import defaultdict
+
+
+def load(path, source=None, name=None):
+    traces = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The last line of a log being appended to may be partial
+                continue
+            if (source and record["source"] != source) or (name and record["name"] != name):
+                continue
+            traces.append(record)
+    return traces
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    index = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def critical_path(trace):
+    """
+    Attribute the wall time of a trace to the stages on its critical path.
+
+    Walking back from the end of each span, the child that finished last is taken as what
+    the span waited on, then the child that finished last before that one started, and so
+    on. Time not covered by a chosen child counts as the span's own time; the trace's own
+    time is reported as "other".
+
+    :return: Dict of stage name -> seconds, summing to the trace duration.
+    """
+    spans = [span for span in trace["spans"] if span["duration"] is not None]
+    children = defaultdict(list)
+    for index, span in enumerate(trace["spans"]):
+        if span["duration"] is not None:
+            children[span["parent"]].append(index)
+    breakdown = defaultdict(float)
+
+    def walk(node, name, start, end):
+        cursor = end
+        for child in sorted(children[node], key=lambda i: trace["spans"][i]["start"] + trace["spans"][i]["duration"], reverse=True):
+            span = trace["spans"][child]
+            child_end = span["start"] + span["duration"]
+            if child_end > cursor + 1e-9 or span["start"] < start - 1e-9:
+                continue
+            breakdown[name] += cursor - child_end
+            walk(child, span["name"], span["start"], child_end)
+            cursor = span["start"]
+        breakdown[name] += max(cursor - start, 0.0)
+
+    if spans or trace["duration"]:
+        walk(None, "other", 0.0, trace["duration"])
+    return dict(breakdown)
+
+
+def stage_totals(trace):
+    """
+    Sum the span durations of a trace per stage name.
+    """
+    totals = defaultdict(float)
+    for span in trace["spans"]:
+        if span["duration"] is not None:
+            totals[span["name"]] += span["duration"]
+    return totals
+
+
+def summarize(traces, top=10):
+    lines = []
+    by_name = defaultdict(list)
+    for trace in traces:
+        by_name[trace["name"]].append(trace)
+
+    for name, group in sorted(by_name.items()):
+        stages = defaultdict(list)
+        critical = defaultdict(float)
+        wall = 0.0
+        for trace in group:
+            stages["(total)"].append(trace["duration"])
+            for stage, seconds in stage_totals(trace).items():
+                stages[stage].append(seconds)
+            for stage, seconds in critical_path(trace).items():
+                critical[stage] += seconds
+            wall += trace["duration"]
+        errors = sum(1 for trace in group if trace.get("error"))
+
+        lines.append(f"== {name}: {len(group)} traces, {errors} errors ==")
+        lines.append(f"{'stage':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'critical':>10}")
+        for stage, values in sorted(stages.items(), key=lambda item: -sum(item[1])):
+            values.sort()
+            share = critical.get(stage, 0.0) / wall if wall and stage != "(total)" else None
+            lines.append(
+                f"{stage:<18}{len(values):>7}"
+                f"{percentile(values, 0.5) * 1000:>10.1f}{percentile(values, 0.95) * 1000:>10.1f}{percentile(values, 0.99) * 1000:>10.1f}"
+                f"{'' if share is None else f'{share:.0%}':>10}"
+            )
+        if "other" in critical and wall:
+            lines.append(f"{'other':<18}{'':>7}{'':>10}{'':>10}{'':>10}{critical['other'] / wall:>10.0%}")
+
+        lines.append(f"-- slowest {min(top, len(group))} --")
+        for trace in sorted(group, key=lambda trace: trace["duration"], reverse=True)[:top]:
+            path = critical_path(trace)
+            breakdown = ", ".join(f"{stage} {seconds * 1000:.0f}" for stage, seconds in sorted(path.items(), key=lambda item: -item[1]) if seconds >= 0.0005)
+            lines.append(f"{trace['duration'] * 1000:>9.0f} ms  {trace['source']} {trace['target']}  [{breakdown}]")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Trace log")
+    parser.add_argument("--top", type=int, default=10, help="Slowest traces listed per trace name")
+    parser.add_argument("--source", help="Only traces of this source, e.g. dcinside or nate")
+    parser.add_argument("--name", help="Only traces of this name: cycle or post")
+    args = parser.parse_args()
+
+    traces = load(args.path, source=args.source, name=args.name)
+    if not traces:
+        print("No traces found.")
+        return
+    print(summarize(traces, top=args.top))
+
+
+if __name__ == "__main__":
+    main()
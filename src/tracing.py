@@ -0,0 +1,193 @@
+import contextvars
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/traces.jsonl"))
+
+# The sampled trace the running code belongs to, and the span it is inside
+_trace = contextvars.ContextVar("trace", default=None)
+_span = contextvars.ContextVar("span", default=None)
+
+
+class Trace:
+    def __init__(self, name, source, target, parent_id=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.source = source
+        self.target = target
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.error = None
+        # Spans are opened from the event loop and fetch threads at once
+        self._lock = threading.Lock()
+
+    def add_span(self, record):
+        """
+        Append a span and return its index, which the spans opened inside it refer to.
+        """
+        with self._lock:
+            self.spans.append(record)
+            return len(self.spans) - 1
+
+    def record(self):
+        return {
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "source": self.source,
+            "target": self.target,
+            "start": self.started_at,
+            "duration": time.perf_counter() - self.started,
+            "error": self.error,
+            "spans": self.spans,
+        }
+
+
+class Tracer:
+    def __init__(self, path=DEFAULT_PATH, sample_rate=0.0):
+        """
+        Record sampled crawl traces as JSON lines appended to path. A trace covers one list
+        crawl or one post; spans inside it time the stages of the crawl path.
+
+        :param path: Trace log file.
+        :param sample_rate: Fraction of traces recorded. Posts of a sampled list crawl are always recorded.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._file = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name, source, target):
+        parent = _trace.get()
+        if parent is None and random.random() >= self.sample_rate:
+            yield None
+            return
+        current = Trace(name, source, target, parent.trace_id if parent else None)
+        trace_token, span_token = _trace.set(current), _span.set(None)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = repr(e)
+            raise
+        finally:
+            _trace.reset(trace_token)
+            _span.reset(span_token)
+            self.write(current.record())
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@contextmanager
+def span(name):
+    """
+    Time a stage of the current trace. Does nothing outside a sampled trace.
+    """
+    current = _trace.get()
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    record = {"name": name, "parent": _span.get(), "start": started - current.started, "duration": None}
+    token = _span.set(current.add_span(record))
+    try:
+        yield
+    finally:
+        _span.reset(token)
+        record["duration"] = time.perf_counter() - started
+
+
+def trace(name, source, target):
+    """
+    Start a trace on the shared tracer, nested under the current trace if there is one.
+    """
+    return get_tracer().trace(name, source, target)
+
+
+@contextmanager
+def profiled(path, profiler="cprofile"):
+    """
+    Profile the block and write the result to path.
+
+    cProfile writes pstats data for snakeviz or pstats; pyinstrument, if installed, writes an
+    HTML report. Both only see the calling thread, so blocking calls handed to fetch threads
+    show up as time waiting on them.
+    """
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        session = Profiler(async_mode="enabled")
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            with open(path, "w", encoding="utf-8") as report:
+                report.write(session.output_html())
+        return
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(path)
+
+
+_tracer = None
+_lock = threading.Lock()
+
+
+def configure_tracer(settings):
+    """
+    Replace the shared tracer with one built from the application settings.
+    """
+    global _tracer
+    with _lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = Tracer(path=settings.trace_path or DEFAULT_PATH, sample_rate=settings.trace_sample_rate)
+    return _tracer
+
+
+def get_tracer():
+    """
+    Return the shared tracer, creating one that records nothing if needed.
+    """
+    global _tracer
+    with _lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def close_tracer():
+    """
+    Close the shared tracer's log file, if one was opened.
+    """
+    global _tracer
+    with _lock:
+        if _tracer is not None:
+            _tracer.close()
+            _tracer = None
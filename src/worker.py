@@ -0,0 +1,49 @@
+import signal
+import threading
+from dotenv import load_dotenv
+from src.config.settings import Settings
+from src.crawlers.transport import get_transport
+from src.lifecycle import HealthServer, stop_on_signals
+from src.metrics import REGISTRY
+from src.runtime import crawl_runtime
+from src.scheduler.frontier_worker import FrontierWorker
+
+def main():
+    """
+    Run a crawl worker that leases items from the shared crawl frontier.
+    Start one per node, or several, next to a scheduler running with CRAWL_MODE=frontier.
+    """
+    load_dotenv()
+    settings = Settings()
+    stop = stop_on_signals(signal.SIGTERM, signal.SIGINT)
+
+    with crawl_runtime(settings) as runtime:
+        db_client = runtime.db_client
+        worker = FrontierWorker(db_client, settings, threads=settings.frontier_worker_threads)
+        health = None
+        if settings.worker_health_port:
+            health = HealthServer(
+                settings.worker_health_port,
+                checks={"mongodb": db_client.ping},
+                reports={"hosts": get_transport().limiter.stats, "items": lambda: worker.stats},
+                metrics=REGISTRY,
+            )
+            health.start()
+            health.set_state("running")
+
+        def drain():
+            stop.wait()
+            if health:
+                health.set_state("draining")
+            # Leased items are finished before run() returns
+            worker.stop()
+
+        threading.Thread(target=drain, name="signal-watch", daemon=True).start()
+        try:
+            worker.run()
+        finally:
+            if health:
+                health.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+from src.crawlers.comments import collect_comments
+
+def thread(count, page_size, newest_first):
+    """
+    Build a fake paginated thread of count comments with ids 1..count in posting order.
+    """
+    ids = list(range(count, 0, -1)) if newest_first else list(range(1, count + 1))
+    pages = [ids[i:i + page_size] for i in range(0, count, page_size)] or [[]]
+    return pages
+
+class TestCollectComments(unittest.TestCase):
+    def collect(self, count, newest_first, known_ids=(), fanout=3):
+        pages = thread(count, 10, newest_first)
+        requested = []
+        in_flight = {"now": 0, "peak": 0}
+
+        async def fetch_page(page):
+            requested.append(page)
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return {
+                "comments": [{"id": str(no)} for no in pages[page - 1]],
+                "total": count,
+                "pages": len(pages),
+            }
+
+        comments = asyncio.run(collect_comments(fetch_page, known_ids=known_ids, fanout=fanout, newest_first=newest_first))
+        return [int(comment["id"]) for comment in comments], requested, in_flight["peak"]
+
+    def test_full_thread(self):
+        ids, requested, peak = self.collect(95, newest_first=False)
+        self.assertEqual(ids, list(range(1, 96)), "Every page should be collected in page order.")
+        self.assertEqual(sorted(requested), list(range(1, 11)))
+        self.assertLessEqual(peak, 3, "No more than fanout pages should be requested at once.")
+
+    def test_refresh_oldest_first(self):
+        ids, requested, _ = self.collect(95, newest_first=False, known_ids=[str(no) for no in range(1, 81)])
+        self.assertEqual(ids, list(range(81, 96)))
+        self.assertEqual(requested[0], 1)
+        self.assertNotIn(2, requested, "Pages holding only stored comments should not be fetched.")
+
+    def test_refresh_newest_first(self):
+        ids, requested, _ = self.collect(95, newest_first=True, known_ids=[str(no) for no in range(1, 91)], fanout=1)
+        self.assertEqual(ids, [95, 94, 93, 92, 91])
+        self.assertEqual(requested, [1], "A refresh should stop once the new comments are found.")
+
+    def test_nothing_new(self):
+        ids, requested, _ = self.collect(40, newest_first=False, known_ids=[str(no) for no in range(1, 41)])
+        self.assertEqual((ids, requested), ([], [1]))
+
+    def test_duplicates_across_pages(self):
+        async def fetch_page(page):
+            # A comment posted between requests shifts the last comment of page 1 onto page 2
+            return {"comments": [{"id": str(no)} for no in ([1, 2, 3] if page == 1 else [3, 4])], "total": None, "pages": 2}
+
+        comments = asyncio.run(collect_comments(fetch_page))
+        self.assertEqual([comment["id"] for comment in comments], ["1", "2", "3", "4"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,12 +17,14 @@ class TestCrawlers(unittest.TestCase):
     def test_dcinside_crawler(self):
         crawler = DCInsideCrawler(self.db_client)
         crawler.fetch_posts(gallery_id="example_gallery", max_pages=1)
+        self.db_client.flush_writes()
         data = self.db_client.fetch_data("dcinside")
         self.assertTrue(len(data) > 0, "DCInsideCrawler should fetch data.")
 
     def test_fm_korea_crawler(self):
         crawler = FMKoreaCrawler(self.db_client)
         crawler.fetch_posts(board_id="example_board", max_pages=1)
+        self.db_client.flush_writes()
         data = self.db_client.fetch_data("fmkorea")
         self.assertTrue(len(data) > 0, "FMKoreaCrawler should fetch data.")
 
@@ -34,6 +36,7 @@ class TestCrawlers(unittest.TestCase):
             user_agent="dummy_user_agent"
         )
         crawler.fetch_posts(subreddit_name="example_subreddit", limit=1)
+        self.db_client.flush_writes()
         data = self.db_client.fetch_data("reddit")
         self.assertTrue(len(data) > 0, "RedditCrawler should fetch data.")
 
@@ -46,6 +49,7 @@ class TestCrawlers(unittest.TestCase):
             access_secret="dummy_access_secret"
         )
         crawler.fetch_tweets(query="example_query", count=1)
+        self.db_client.flush_writes()
         data = self.db_client.fetch_data("x")
         self.assertTrue(len(data) > 0, "XCrawler should fetch data.")
 
@@ -1,5 +1,8 @@
 import unittest
+from pymongo.errors import AutoReconnect
+from src.db.bulk_writer import BulkWriter
 from src.db.mongo_client import MongoDBClient
+from src.db.crawl_state import CrawlStateStore, stored_high_water
 
 class TestDB(unittest.TestCase):
     def setUp(self):
@@ -31,5 +34,71 @@ class TestDB(unittest.TestCase):
         result = self.db_client.delete_data("test_collection", {"title": "Test Title"})
         self.assertEqual(result.deleted_count, 1, "Data should be deleted successfully.")
 
+    def test_buffered_insert(self):
+        self.db_client.buffer_insert("test_collection", {"title": "First", "url": "http://example.com"})
+        self.db_client.buffer_insert("test_collection", {"title": "Second", "url": "http://example.com"})
+        self.db_client.buffer_insert("test_collection", {"title": "Other", "url": "http://example.org"})
+        reports = self.db_client.flush_writes()
+        self.assertEqual(reports[0]["inserted"], 2, "Unique URLs should be inserted.")
+        self.assertEqual(reports[0]["duplicates"], 1, "Repeated URLs should be reported as duplicates.")
+        fetched = self.db_client.fetch_data("test_collection", {"url": "http://example.com"})
+        self.assertEqual(fetched[0]["title"], "First", "The first buffered document should win.")
+
+    def test_buffered_insert_callbacks(self):
+        written = []
+        self.db_client.insert_data("test_collection", {"title": "Stored", "url": "http://example.com"})
+        self.db_client.buffer_insert("test_collection", {"title": "Again", "url": "http://example.com"},
+                                     on_written=lambda: written.append("duplicate"))
+        self.db_client.buffer_insert("test_collection", {"title": "New", "url": "http://example.org"},
+                                     on_written=lambda: written.append("new"))
+        self.assertEqual(written, [], "Callbacks should wait for the flush.")
+        self.db_client.flush_writes()
+        self.assertEqual(written, ["duplicate", "new"], "Stored and already stored documents should be reported.")
+
+    def test_failed_write_skips_callbacks(self):
+        class Unreachable:
+            def bulk_write(self, operations, ordered=True):
+                raise AutoReconnect("connection lost")
+
+        writer = BulkWriter({"test_collection": Unreachable()})
+        written = []
+        writer.add("test_collection", {"url": "http://example.net"}, on_written=lambda: written.append("lost"))
+        self.assertEqual(writer.flush()[0]["failed"], 1)
+        self.assertEqual(written, [], "Documents that were not stored should not be reported.")
+
+    def test_ensure_schema(self):
+        self.db_client.ensure_schema()
+        indexes = self.db_client.db["dcinside"].index_information()
+        self.assertTrue(indexes["url_1"].get("unique"), "Source collections should have a unique url index.")
+        self.assertEqual(self.db_client.report_collection_scans(), [], "Hot queries should not scan collections.")
+
+class TestCrawlState(unittest.TestCase):
+    def setUp(self):
+        self.db_client = MongoDBClient(uri="mongodb://localhost:27017", db_name="test_db")
+        self.crawl_state = CrawlStateStore(self.db_client)
+
+    def tearDown(self):
+        self.db_client.client.drop_database("test_db")
+
+    def test_high_water_defaults_to_zero(self):
+        self.assertEqual(self.crawl_state.get_high_water("dcinside", "example_gallery"), 0)
+
+    def test_high_water_only_moves_up(self):
+        self.crawl_state.update_high_water("dcinside", "example_gallery", 120)
+        self.crawl_state.update_high_water("dcinside", "example_gallery", 100)
+        self.assertEqual(self.crawl_state.get_high_water("dcinside", "example_gallery"), 120,
+                         "High-water mark should never decrease.")
+        self.assertEqual(self.crawl_state.get_high_water("nate", "example_gallery"), 0,
+                         "Boards should be tracked per source.")
+
+    def test_stored_high_water_stops_below_failures(self):
+        self.assertEqual(stored_high_water(100, [101, 102, 103], {101, 102, 103}), 103)
+        self.assertEqual(stored_high_water(100, [104, 101, 102, 103], {101, 103, 104}), 101,
+                         "Posts from the lowest failed one up should be tried again.")
+        self.assertEqual(stored_high_water(100, [101, 102], set()), 100)
+        self.assertEqual(stored_high_water(100, [], set()), 100)
+        self.assertEqual(stored_high_water(100, [90, 101], {101}), 101,
+                         "A failed post below the mark should not hold the mark back.")
+
 if __name__ == "__main__":
     unittest.main()
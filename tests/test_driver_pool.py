@@ -0,0 +1,80 @@
+import threading
+import unittest
+from src.crawlers.driver_pool import ChromeDriverPool
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.quit_count = 0
+        self.page_source = f"<html>driver {number}</html>"
+
+    def get(self, url):
+        self.url = url
+
+    def quit(self):
+        self.quit_count += 1
+
+
+class TestChromeDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.pool = ChromeDriverPool(size=2, max_pages_per_driver=3, page_timeout=1, driver_factory=self.start_driver)
+
+    def start_driver(self):
+        driver = FakeDriver(len(self.started))
+        self.started.append(driver)
+        return driver
+
+    def test_driver_is_reused(self):
+        for _ in range(2):
+            self.assertEqual(self.pool.fetch("https://gall.dcinside.com/1"), "<html>driver 0</html>")
+        self.assertEqual(len(self.started), 1, "An idle driver should be reused instead of starting Chrome again.")
+
+    def test_recycled_after_max_pages(self):
+        for _ in range(4):
+            self.pool.fetch("https://gall.dcinside.com/1")
+        self.assertEqual(len(self.started), 2)
+        self.assertEqual(self.started[0].quit_count, 1, "A driver should be quit after max_pages_per_driver pages.")
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics["pages"], metrics["retired_drivers"], metrics["driver_restarts"]), (4, 1, 0))
+
+    def test_broken_driver_is_replaced(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.driver():
+                raise RuntimeError("chrome not reachable")
+        self.assertEqual(self.started[0].quit_count, 1, "A driver that failed should not return to the pool.")
+        self.assertEqual(self.pool.fetch("https://gall.dcinside.com/1"), "<html>driver 1</html>")
+        self.assertEqual(self.pool.metrics()["driver_restarts"], 1)
+
+    def test_size_bounds_live_drivers(self):
+        release = threading.Event()
+        holding = threading.Barrier(3)
+
+        def hold():
+            with self.pool.driver():
+                holding.wait()
+                release.wait(5)
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        holding.wait()
+        self.assertFalse(self.pool._slots.acquire(blocking=False), "No third driver should be checked out.")
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.pool.metrics()["live_drivers"], 2)
+
+    def test_close(self):
+        with self.pool.driver():
+            with self.pool.driver():
+                pass
+            self.pool.close()
+            self.assertEqual(self.started[1].quit_count, 1, "Idle drivers should be quit on close.")
+        self.assertEqual(self.started[0].quit_count, 1, "A driver returned after close should be quit.")
+        self.assertEqual(self.pool.metrics()["live_drivers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
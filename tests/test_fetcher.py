@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.crawlers.fetcher import AsyncFetcher
+
+class TestAsyncFetcher(unittest.TestCase):
+    def setUp(self):
+        self.fetcher = AsyncFetcher(max_per_host=2, max_workers=8)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+
+    def fake_request(self, host):
+        with self.lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight[host] -= 1
+        return host
+
+    def test_per_host_limit(self):
+        async def crawl():
+            urls = [f"https://{host}/page/{i}" for host in ("a.example", "b.example") for i in range(6)]
+            return await asyncio.gather(*(
+                self.fetcher.submit(url, self.fake_request, url.split("/")[2]) for url in urls
+            ))
+
+        results = self.fetcher.run(crawl())
+        self.assertEqual(len(results), 12, "Every request should complete.")
+        self.assertEqual(self.peak["a.example"], 2, "In-flight requests per host should be capped.")
+        self.assertEqual(self.peak["b.example"], 2, "Hosts should be limited independently.")
+
+    def test_reuse_across_runs(self):
+        async def crawl():
+            return await self.fetcher.submit("https://a.example/", self.fake_request, "a.example")
+
+        self.assertEqual(self.fetcher.run(crawl()), "a.example")
+        self.assertEqual(self.fetcher.run(crawl()), "a.example", "Fetcher should work on a new event loop.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+from src.db.mongo_client import MongoDBClient
+from src.db.frontier import CrawlFrontier
+
+class TestCrawlFrontier(unittest.TestCase):
+    def setUp(self):
+        self.db_client = MongoDBClient(uri="mongodb://localhost:27017", db_name="test_db")
+        self.db_client.ensure_schema()
+        self.frontier = CrawlFrontier(self.db_client, lease_seconds=60, max_attempts=2)
+
+    def tearDown(self):
+        self.db_client.client.drop_database("test_db")
+
+    def test_enqueue_deduplicates(self):
+        self.assertTrue(self.frontier.enqueue_board("nate", "ranking"))
+        self.assertFalse(self.frontier.enqueue_board("nate", "ranking"), "A queued item should not be queued twice.")
+        self.assertEqual(self.frontier.enqueue_posts("nate", "ranking", ["https://pann.nate.com/talk/1"] * 3), 1)
+
+    def test_posts_lease_before_boards(self):
+        self.frontier.enqueue_board("nate", "ranking")
+        self.frontier.enqueue_posts("nate", "ranking", ["https://pann.nate.com/talk/1"])
+        self.assertEqual(self.frontier.lease("worker-a")["kind"], "post")
+
+    def test_lease_is_exclusive(self):
+        for no in range(50):
+            self.frontier.enqueue_posts("nate", "ranking", [f"https://pann.nate.com/talk/{no}"])
+        leased = []
+        lock = threading.Lock()
+
+        def work(owner):
+            while item := self.frontier.lease(owner):
+                with lock:
+                    leased.append(item["target"])
+                self.frontier.complete(item, owner)
+
+        threads = [threading.Thread(target=work, args=(f"worker-{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(leased), 50)
+        self.assertEqual(len(set(leased)), 50, "No item should be leased by two workers.")
+        self.assertEqual(self.frontier.stats(), {"done": 50})
+
+    def test_expired_lease_is_taken_over(self):
+        frontier = CrawlFrontier(self.db_client, lease_seconds=0.2, max_attempts=3)
+        frontier.enqueue_board("dcinside", "example_gallery")
+        crashed = frontier.lease("worker-a")
+        self.assertIsNone(frontier.lease("worker-b"), "A live lease should not be taken over.")
+        time.sleep(0.3)
+        taken = frontier.lease("worker-b")
+        self.assertEqual(taken["_id"], crashed["_id"], "An expired lease should return to the queue.")
+        self.assertFalse(frontier.heartbeat(crashed, "worker-a"), "The old owner should learn it lost the lease.")
+        self.assertFalse(frontier.complete(crashed, "worker-a"))
+        self.assertTrue(frontier.complete(taken, "worker-b"))
+
+    def test_retry_until_failed(self):
+        self.frontier.enqueue_board("dcinside", "example_gallery")
+        item = self.frontier.lease("worker-a")
+        self.assertTrue(self.frontier.retry(item, "worker-a", "timeout", delay=0))
+        item = self.frontier.lease("worker-a")
+        self.assertFalse(self.frontier.retry(item, "worker-a", "timeout", delay=0))
+        self.assertEqual(self.frontier.stats(), {"failed": 1})
+        self.assertTrue(self.frontier.enqueue_board("dcinside", "example_gallery"), "Failed boards should be queued again.")
+
+    def test_exhausted_expired_lease_fails(self):
+        frontier = CrawlFrontier(self.db_client, lease_seconds=0.1, max_attempts=2)
+        frontier.enqueue_board("dcinside", "example_gallery")
+        frontier.enqueue_board("nate", "ranking")
+        for _ in range(2):
+            self.assertIsNotNone(frontier.lease("worker-a", sources=["dcinside"]))
+            time.sleep(0.2)
+        frontier.lease("worker-a", sources=["nate"])
+        time.sleep(0.2)
+        self.assertIsNone(frontier.lease("worker-b", sources=["dcinside"]), "An exhausted item should not be leased.")
+        self.assertEqual(frontier.requeue_expired(), 1)
+        self.assertEqual(frontier.stats(), {"failed": 1, "queued": 1})
+        self.assertTrue(frontier.enqueue_board("dcinside", "example_gallery"), "The board should be crawled again.")
+
+if __name__ == "__main__":
+    unittest.main()
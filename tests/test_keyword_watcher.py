@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+from pymongo.errors import OperationFailure
+from src.scheduler.keyword_watcher import KeywordWatcher
+
+
+class FakeStream:
+    """
+    Yield the scripted changes, then raise the scripted error or wait for more.
+    """
+
+    def __init__(self, changes, error=None):
+        self.changes = list(changes)
+        self.error = error
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def try_next(self):
+        if self.changes:
+            change = self.changes.pop(0)
+            self.resume_token = change["_id"]
+            return change
+        if self.error:
+            raise self.error
+        time.sleep(0.01)
+        return None
+
+
+class FakeCollection:
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.resumed_after = []
+        self.reads = 0
+
+    def watch(self, resume_after=None, max_await_time_ms=None):
+        self.resumed_after.append(resume_after)
+        stream = self.streams.pop(0)
+        if isinstance(stream, Exception):
+            raise stream
+        return stream
+
+    def find(self, query):
+        self.reads += 1
+        return self
+
+    def sort(self, key, direction):
+        return [{"_id": 1, "nate": ["a"]}]
+
+
+class TestKeywordWatcher(unittest.TestCase):
+    def watch(self, collection, notifications):
+        """
+        Run a watcher until it has notified the given number of times.
+        """
+        calls = []
+        done = threading.Event()
+
+        def on_change():
+            calls.append(1)
+            if len(calls) >= notifications:
+                done.set()
+
+        watcher = KeywordWatcher(collection, on_change, poll_interval=0)
+        watcher.start()
+        self.assertTrue(done.wait(5), f"Expected {notifications} notifications, got {len(calls)}.")
+        watcher.stop()
+        return watcher, len(calls)
+
+    def test_history_lost_restarts_without_token(self):
+        lost = OperationFailure("Resume of change stream was not possible", code=286)
+        collection = FakeCollection([FakeStream([{"_id": "t1"}], error=lost), FakeStream([])])
+        watcher, calls = self.watch(collection, 3)
+        self.assertEqual(collection.resumed_after, [None, None], "An expired token should not be resumed from.")
+        self.assertEqual(calls, 3, "The restarted stream should resync the keywords once.")
+        self.assertEqual((watcher.mode, collection.reads), ("change stream", 0))
+
+    def test_failed_stream_resumes_from_token(self):
+        failure = OperationFailure("interrupted", code=11601)
+        collection = FakeCollection([FakeStream([{"_id": "t1"}], error=failure), FakeStream([])])
+        watcher, _ = self.watch(collection, 3)
+        self.assertEqual(collection.resumed_after, [None, "t1"])
+        self.assertEqual(watcher.mode, "change stream", "Only a missing change stream should fall back to polling.")
+
+    def test_unsupported_change_streams_are_polled(self):
+        unsupported = OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+        collection = FakeCollection([unsupported])
+        watcher, calls = self.watch(collection, 1)
+        self.assertEqual((watcher.mode, calls), ("polling", 1))
+        self.assertGreaterEqual(collection.reads, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import json
+import unittest
+import urllib.error
+import urllib.request
+from src.lifecycle import HealthServer
+
+
+class TestHealthServer(unittest.TestCase):
+    def setUp(self):
+        self.mongodb_up = True
+        self.health = HealthServer(0, checks={"mongodb": lambda: self.mongodb_up})
+        self.health.start()
+
+    def tearDown(self):
+        self.health.stop()
+
+    def get(self, path):
+        url = f"http://127.0.0.1:{self.health._server.server_address[1]}{path}"
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_readiness_follows_state(self):
+        self.assertEqual(self.get("/readyz")[0], 503, "A starting process should not be ready.")
+        self.health.set_state("running")
+        self.assertEqual(self.get("/readyz"), (200, {"state": "running", "checks": {"mongodb": True}}))
+        self.health.set_state("draining")
+        self.assertEqual(self.get("/readyz")[0], 503, "A draining process should stop taking traffic.")
+        self.assertEqual(self.get("/healthz"), (200, {"state": "draining"}), "A draining process is still alive.")
+
+    def test_failing_check(self):
+        self.health.set_state("running")
+        self.mongodb_up = False
+        self.assertEqual(self.get("/readyz"), (503, {"state": "running", "checks": {"mongodb": False}}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+import requests
+from src.crawlers.media_store import MediaStore, MediaTooLargeError
+from src.crawlers.media_worker import BandwidthBudget, MediaWorker
+from src.db.media_queue import MediaQueue
+from src.db.mongo_client import MongoDBClient
+
+IMAGE = b"\x89PNG" + bytes(range(256)) * 8
+
+
+class FakeTransport:
+    """
+    Serve media bodies from a dict of URL -> (status, body, headers), counting requests.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def request(self, method, url, headers=None, stream=False):
+        self.requests.append(url)
+        if url not in self.files:
+            raise requests.exceptions.ConnectionError(f"cannot reach {url}")
+        status, body, response_headers = self.files[url]
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers.update(response_headers)
+        response.raw = io.BytesIO(body)
+        return response
+
+
+class MediaTestCase(unittest.TestCase):
+    files = {}
+
+    def setUp(self):
+        self.db_client = MongoDBClient(uri="mongodb://localhost:27017", db_name="test_db")
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MediaStore(self.db_client, root=self.directory.name, max_workers=2, chunk_size=512)
+        self.transport = FakeTransport(dict(self.files))
+        patcher = mock.patch("src.crawlers.media_store.get_transport", return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+        self.db_client.client.drop_database("test_db")
+
+
+class TestMediaStore(MediaTestCase):
+    files = {
+        "https://dcimg.example/a.png": (200, IMAGE, {"Content-Type": "image/png"}),
+        "https://cdn.example/copy.png": (200, IMAGE, {"Content-Type": "image/png"}),
+        "https://dcimg.example/huge.mp4": (200, b"x" * 4096, {"Content-Type": "video/mp4", "Content-Length": "4096"}),
+        "https://dcimg.example/undeclared.mp4": (200, b"x" * 4096, {"Content-Type": "video/mp4"}),
+    }
+
+    def test_known_url_is_not_downloaded_again(self):
+        first = self.store.fetch("https://dcimg.example/a.png")
+        second = self.store.fetch("https://dcimg.example/a.png")
+        self.assertEqual(first, second)
+        self.assertEqual(self.transport.requests, ["https://dcimg.example/a.png"])
+        self.assertEqual(self.store.stats["known_url"], 1)
+
+    def test_same_content_is_stored_once(self):
+        first = self.store.fetch("https://dcimg.example/a.png")
+        second = self.store.fetch("https://cdn.example/copy.png")
+        self.assertEqual(first["path"], second["path"], "Identical files should share one stored copy.")
+        self.assertTrue(first["path"].endswith(".png"))
+        with open(first["path"], "rb") as file:
+            self.assertEqual(file.read(), IMAGE)
+        self.assertEqual(self.store.stats["known_content"], 1)
+        self.assertEqual(self.db_client.db["media"].count_documents({}), 2, "Both URLs should map to the file.")
+
+    def test_size_cap(self):
+        with self.assertRaises(MediaTooLargeError):
+            self.store.fetch("https://dcimg.example/huge.mp4", max_bytes=1024)
+        with self.assertRaises(MediaTooLargeError):
+            self.store.fetch("https://dcimg.example/undeclared.mp4", max_bytes=1024)
+        self.assertEqual(os.listdir(os.path.join(self.directory.name, "tmp")), [],
+                         "A download over the cap should not leave a partial file behind.")
+        self.assertIsNone(self.store.lookup("https://dcimg.example/undeclared.mp4"))
+
+
+class TestMediaWorker(MediaTestCase):
+    files = {
+        "https://dcimg.example/a.png": (200, IMAGE, {"Content-Type": "image/png"}),
+        "https://dcimg.example/huge.mp4": (200, b"x" * 4096, {"Content-Type": "video/mp4", "Content-Length": "4096"}),
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.worker = MediaWorker(self.db_client, self.store, max_bytes=3000, max_attempts=3, retry_delay=10)
+        self.queue = MediaQueue(self.db_client)
+
+    def store_post(self, images):
+        post = {
+            "url": "https://gall.dcinside.com/board/view/?id=test&no=1",
+            "media": {"images": [{"url": url, "status": "pending"} for url in images], "videos": []},
+            "media_status": "pending",
+        }
+        self.db_client.db["dcinside"].insert_one(dict(post))
+        self.queue.enqueue("dcinside", post)
+        self.db_client.flush_writes()
+        return post["url"]
+
+    def test_every_copy_of_a_url_is_attached(self):
+        post_url = self.store_post(["https://dcimg.example/a.png", "https://dcimg.example/a.png"])
+        self.assertEqual(self.worker.run_once(), 1)
+        post = self.db_client.db["dcinside"].find_one({"url": post_url})
+        self.assertEqual([image["status"] for image in post["media"]["images"]], ["done", "done"])
+        self.assertEqual(post["media_status"], "complete")
+
+    def test_retry_backoff_then_fail(self):
+        post_url = self.store_post(["https://dcimg.example/gone.png"])
+        for attempt in range(1, 3):
+            item = self.queue.claim()
+            started = datetime.utcnow()
+            self.assertEqual(self.worker.process(item), "retry")
+            item = self.queue.collection.find_one({"_id": item["_id"]})
+            self.assertEqual(item["attempts"], attempt)
+            delay = (item["next_attempt_at"] - started).total_seconds()
+            self.assertAlmostEqual(delay, 10 * 2 ** (attempt - 1), delta=1, msg="Retries should back off exponentially.")
+            self.assertIsNone(self.queue.claim(), "An item should not be claimed before its next attempt.")
+            self.queue.collection.update_one({"_id": item["_id"]}, {"$set": {"next_attempt_at": datetime.utcnow()}})
+        self.assertEqual(self.worker.process(self.queue.claim()), "failed")
+        post = self.db_client.db["dcinside"].find_one({"url": post_url})
+        self.assertEqual(post["media"]["images"][0]["status"], "failed")
+        self.assertEqual(post["media_status"], "partial")
+
+    def test_oversized_file_fails_without_retry(self):
+        self.store_post(["https://dcimg.example/huge.mp4"])
+        self.assertEqual(self.worker.process(self.queue.claim()), "failed")
+        self.assertEqual(self.queue.collection.find_one()["status"], "failed")
+
+    def test_stale_claim_is_taken_again(self):
+        self.store_post(["https://dcimg.example/a.png"])
+        item = self.queue.claim()
+        self.queue.collection.update_one({"_id": item["_id"]}, {"$set": {"claimed_at": datetime.utcnow() - timedelta(hours=1)}})
+        self.assertEqual(self.queue.claim()["_id"], item["_id"], "A crashed worker's item should be claimed again.")
+
+
+class TestBandwidthBudget(unittest.TestCase):
+    def test_unlimited(self):
+        started = time.monotonic()
+        BandwidthBudget(0).consume(10 ** 9)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    def test_paces_after_the_burst(self):
+        budget = BandwidthBudget(bytes_per_second=10_000)
+        started = time.monotonic()
+        budget.consume(10_000)
+        self.assertLess(time.monotonic() - started, 0.05, "A full bucket should not wait.")
+        budget.consume(3_000)
+        self.assertAlmostEqual(time.monotonic() - started, 0.3, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from src.metrics import MetricsRegistry
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        requests = self.registry.counter("requests_total", "Requests.", ("host", "status"))
+        requests.inc(labels=("a.com", "200"))
+        requests.inc(2, ("a.com", "200"))
+        requests.inc(labels=('b"c', "500"))
+        self.assertEqual(requests.value(("a.com", "200")), 3)
+        text = self.registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{host="a.com",status="200"} 3', text)
+        self.assertIn('requests_total{host="b\\"c",status="500"} 1', text)
+
+    def test_histogram(self):
+        latency = self.registry.histogram("latency_seconds", "Latency.", ("host",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            latency.observe(value, ("a.com",))
+        lines = self.registry.render().splitlines()
+        self.assertIn('latency_seconds_bucket{host="a.com",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{host="a.com",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{host="a.com",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{host="a.com"} 2.65', lines)
+        self.assertIn('latency_seconds_count{host="a.com"} 4', lines)
+
+    def test_histogram_time(self):
+        latency = self.registry.histogram("parse_seconds", "Parse time.")
+        with self.assertRaises(ValueError):
+            with latency.time():
+                raise ValueError()
+        self.assertEqual(latency.count(), 1, "Failed blocks should still be timed")
+
+    def test_gauge_callback(self):
+        self.registry.gauge_callback("rate", "Rate.", ("host",), lambda: {("a.com",): 1.5})
+        self.assertIn('rate{host="a.com"} 1.5', self.registry.render())
+        # Re-registering replaces the callback, as a reconfigured transport does
+        self.registry.gauge_callback("rate", "Rate.", ("host",), lambda: {("a.com",): 3})
+        self.assertIn('rate{host="a.com"} 3', self.registry.render())
+
+    def test_register_returns_existing(self):
+        first = self.registry.counter("jobs_total", "Jobs.")
+        self.assertIs(self.registry.counter("jobs_total", "Jobs."), first)
+
+if __name__ == "__main__":
+    unittest.main()
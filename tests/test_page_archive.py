@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from src.crawlers.page_archive import PageArchive
+from src.crawlers.parse_pool import ParsePool
+from src.reparse import reparse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures")
+POST_URL = "https://pann.nate.com/talk/370000000"
+
+
+class FakeResult:
+    def __init__(self, count):
+        self.matched_count = self.modified_count = count
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.operations = []
+        self.documents = {document["url"]: dict(document) for document in documents}
+
+    def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+        for operation in operations:
+            document = self.documents.get(operation._filter["url"])
+            if document is not None:
+                document.update(operation._doc["$set"])
+        return FakeResult(len(operations))
+
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(root=self.directory.name, segment_bytes=4096)
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def test_round_trip_across_segments(self):
+        bodies = {f"https://example.com/{i}": os.urandom(1500) for i in range(10)}
+        for url, body in bodies.items():
+            self.archive.append(url, body, "application/octet-stream")
+        self.assertGreater(len(self.archive.segments()), 1, "Full segments should be rotated")
+        entries = self.archive.latest()
+        self.assertEqual({entry["url"]: body for entry, body in self.archive.iter_pages(entries)}, bodies)
+
+    def test_compresses(self):
+        with open(os.path.join(FIXTURES, "nate_post.html"), "rb") as file:
+            html = file.read()
+        entry = self.archive.append(POST_URL, html, "text/html")
+        self.assertLess(entry["length"], len(html) / 3)
+        self.assertEqual(self.archive.read(entry), html)
+
+    def test_latest_keeps_newest_fetch(self):
+        self.archive.append(POST_URL, b"old", fetched_at=100)
+        self.archive.append(POST_URL, b"new", fetched_at=200)
+        self.archive.append("https://pann.nate.com/talk/1", b"other", fetched_at=150)
+        entries = self.archive.latest(lambda entry: entry["url"] == POST_URL)
+        self.assertEqual([self.archive.read(entry) for entry in entries], [b"new"])
+
+    def test_reopen_and_torn_index_line(self):
+        self.archive.append(POST_URL, b"first")
+        self.archive.close()
+        with open(self.archive.index_path(1), "a", encoding="utf-8") as index:
+            index.write('{"url": "https://pann.nate.com/ta')
+        reopened = PageArchive(root=self.directory.name)
+        reopened.append(POST_URL, b"second", fetched_at=2e9)
+        self.assertEqual([body for _, body in reopened.iter_pages(reopened.latest())], [b"second"])
+        reopened.close()
+
+    def test_writers_sharing_a_root(self):
+        # Worker processes on one node append to the same segments in turn
+        other = PageArchive(root=self.directory.name, segment_bytes=4096)
+        self.addCleanup(other.close)
+        bodies = {}
+        for i in range(12):
+            url = f"https://example.com/{i}"
+            bodies[url] = os.urandom(700)
+            (self.archive if i % 2 else other).append(url, bodies[url])
+        entries = self.archive.latest()
+        self.assertGreater(len(self.archive.segments()), 1)
+        self.assertEqual({entry["url"]: body for entry, body in self.archive.iter_pages(entries)}, bodies,
+                         "Every index entry should point at its own frame")
+
+    def test_reparse(self):
+        with open(os.path.join(FIXTURES, "nate_post.html"), "rb") as file:
+            self.archive.append(POST_URL, file.read(), "text/html")
+        self.archive.append("https://pann.nate.com/talk/c20001?page=1", b"<html></html>", "text/html")
+        collection = FakeCollection()
+        pool = ParsePool(max_workers=1)
+        try:
+            stats = reparse({"nate": collection}, self.archive, "nate", pool)
+        finally:
+            pool.close()
+        self.assertEqual(stats["pages"], 1, "Only post pages should be parsed")
+        self.assertEqual(stats["modified"], 1)
+        operation = collection.operations[0]
+        self.assertEqual(operation._filter, {"url": POST_URL})
+        self.assertIn("content", operation._doc["$set"])
+
+    def test_reparse_keeps_fields_not_found(self):
+        url = "https://gall.dcinside.com/mgallery/board/view/?id=bench&no=1"
+        stored = {"url": url, "title": "제목", "views": 1200, "recommendations": 40, "content": "본문"}
+        # A layout change: none of the post selectors match any more
+        self.archive.append(url, b"<html><body><div class='new_layout'>\xeb\xb3\xb8\xeb\xac\xb8</div></body></html>")
+        self.archive.append(POST_URL, b"<html><div id='contentArea'>new body</div></html>")
+        collections = {
+            "dcinside": FakeCollection([stored]),
+            "nate": FakeCollection([{"url": POST_URL, "title": "Nate title", "content": "old body"}]),
+        }
+        pool = ParsePool(max_workers=1)
+        try:
+            dcinside_stats = reparse(collections, self.archive, "dcinside", pool)
+            reparse(collections, self.archive, "nate", pool)
+        finally:
+            pool.close()
+        self.assertEqual(dcinside_stats["parsed"], 1)
+        self.assertEqual(collections["dcinside"].operations, [])
+        self.assertEqual(collections["dcinside"].documents[url], stored)
+        nate_post = collections["nate"].documents[POST_URL]
+        self.assertEqual((nate_post["title"], nate_post["content"]), ("Nate title", "new body"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import pickle
+import unittest
+from bs4 import BeautifulSoup
+from src.crawlers import parsing
+from src.crawlers.parse_pool import ParsePool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name + ".html"), "rb") as file:
+        return file.read()
+
+class TestParsing(unittest.TestCase):
+    def assertSameSelection(self, html, strainer, selectors):
+        full = BeautifulSoup(html, "html.parser")
+        for parser in parsing.available_parsers():
+            strained = parsing.make_soup(html, strainer, parser=parser)
+            for selector in selectors:
+                self.assertEqual(
+                    [str(el) for el in strained.select(selector)],
+                    [str(el) for el in full.select(selector)],
+                    f"{parser} strained parse should keep {selector}",
+                )
+
+    def test_dcinside_pages(self):
+        self.assertSameSelection(load("dcinside_list"), parsing.DCINSIDE_LIST, ["tbody tr.ub-content"])
+        self.assertSameSelection(
+            load("dcinside_post"), parsing.DCINSIDE_POST,
+            [".title_subject", ".gall_count", ".gall_recommend", ".writing_view_box"],
+        )
+
+    def test_nate_pages(self):
+        self.assertSameSelection(load("nate_list"), parsing.NATE_LIST, ["tbody tr h2 a"])
+        self.assertSameSelection(
+            load("nate_post"), parsing.NATE_POST,
+            ["div.post-tit-info h1", "div#contentArea", "div.cmt_best dl.cmt_item"],
+        )
+
+    def test_strainer_skips_page_chrome(self):
+        soup = parsing.make_soup(load("nate_post"), parsing.NATE_POST)
+        self.assertIsNone(soup.find("script"), "Scripts outside the target subtrees should not be built.")
+        self.assertIsNone(soup.find("div", class_="cmt_list"))
+
+    def test_configure_parser(self):
+        self.assertIn(parsing.configure_parser("html.parser"), parsing.PARSERS)
+        self.assertEqual(parsing.get_parser(), "html.parser")
+        self.assertEqual(parsing.configure_parser("auto"), parsing.available_parsers()[0])
+        with self.assertRaises(ValueError):
+            parsing.configure_parser("no-such-parser")
+
+class TestPageParsers(unittest.TestCase):
+    def test_dcinside_list(self):
+        post_urls = parsing.parse_dcinside_list(load("dcinside_list"), "bench")
+        self.assertTrue(post_urls)
+        self.assertTrue(all(url.startswith("https://gall.dcinside.com/mgallery/board/view/?id=bench&no=") for url in post_urls))
+
+    def test_dcinside_post(self):
+        page = parsing.parse_dcinside_post(load("dcinside_post"))
+        self.assertTrue(page["complete"])
+        self.assertEqual((page["views"], page["recommendations"]), (12345, 321))
+        self.assertEqual(len(page["images"]), 8)
+        self.assertTrue(all(url.startswith("https://") for url in page["images"] + page["videos"]))
+
+    def test_nate_post(self):
+        page = parsing.parse_nate_post(load("nate_post"))
+        self.assertEqual(len(page["comments"]), 3, "Only the best comments should be parsed.")
+        self.assertNotEqual(page["title"], "No Title")
+        self.assertEqual(pickle.loads(pickle.dumps(page)), page, "Parsed pages should be plain picklable data.")
+
+    def test_nate_comments(self):
+        page = parsing.parse_nate_comments(load("nate_comments"))
+        self.assertEqual(len(page["comments"]), 20)
+        self.assertEqual(page["comments"][0]["id"], "cmt_5000")
+        self.assertEqual(page["pages"], 5)
+
+    def test_dcinside_comments(self):
+        page = parsing.parse_dcinside_comments({
+            "total_cnt": "201",
+            "comments": [{"no": "11", "name": "a", "memo": "m", "reg_date": "d"}, {"no": 0, "name": "ad"}],
+        })
+        self.assertEqual(page["comments"], [{"id": "11", "author": "a", "content": "m", "date": "d"}])
+        self.assertEqual((page["total"], page["pages"]), (201, 3))
+
+    def test_parse_pool_matches_inline(self):
+        pool = ParsePool(max_workers=2)
+        html = load("nate_list")
+        try:
+            async def parse():
+                return await asyncio.gather(pool.parse(parsing.parse_nate_list, html), pool.parse(parsing.parse_nate_list, html))
+            results = asyncio.run(parse())
+            self.assertEqual(results, [parsing.parse_nate_list(html)] * 2)
+            self.assertEqual(pool.run(parsing.parse_fmkorea_list, b"<tr><a href=\"/1\">t</a></tr>"), [{"title": "t", "url": "/1", "source": "fmkorea"}])
+        finally:
+            pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import re
+import unittest
+from src.crawlers.parse_pool import ParsePool
+from src.data_preprocessing.pipeline import VERSION, PreprocessJob
+from src.data_preprocessing.preprocess import clean_document, clean_text
+from src.db.mongo_client import MongoDBClient
+
+
+def clean_text_reference(text):
+    # The four passes clean_text used to make, which the fused pattern must match exactly
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'[\r\n]+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?\'"]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class TestCleanText(unittest.TestCase):
+    def test_matches_separate_passes(self):
+        samples = [
+            "<b>Hello</b> World! #Python",
+            "오늘 무대 <a href='x'>직캠</a>\r\n\r\n라이브 ㅋㅋ!! 😂",
+            "@</i>0-",
+            "<<b>>tag<",
+            "a　\x1c b c",
+            "  <p>\n</p>  ",
+            "",
+        ]
+        for text in samples:
+            self.assertEqual(clean_text(text), clean_text_reference(text), repr(text))
+
+    def test_clean_document(self):
+        document = {
+            "title": "<b>제목</b>!!",
+            "content": "본문 #태그",
+            "comments": [{"content": "<i>좋아요</i>"}, {}],
+            "best_comments": [{"content": "베댓 ♥"}],
+        }
+        self.assertEqual(clean_document(document), {
+            "title": "제목!!",
+            "content": "본문 태그",
+            "comments": ["좋아요", ""],
+            "best_comments": ["베댓"],
+        })
+
+
+class TestPreprocessJob(unittest.TestCase):
+    def setUp(self):
+        self.db_client = MongoDBClient(uri="mongodb://localhost:27017", db_name="test_db")
+        self.pool = ParsePool(max_workers=2)
+        self.job = PreprocessJob(self.db_client.db, self.pool, batch_size=7)
+
+    def tearDown(self):
+        self.pool.close()
+        self.db_client.client.drop_database("test_db")
+
+    def test_cleans_and_resumes(self):
+        collection = self.db_client.db["nate"]
+        collection.insert_many([{"url": f"u{i}", "title": f"<b>{i}</b>#", "content": "a\nb"} for i in range(30)])
+        self.assertEqual(self.job.run_collection("nate"), 30)
+        post = collection.find_one({"url": "u3"})
+        self.assertEqual(post["clean"], {"title": "3", "content": "a b"})
+        self.assertEqual(post["processed"], VERSION)
+        self.assertEqual(post["title"], "<b>3</b>#", "Raw fields should be kept")
+
+        collection.insert_many([{"url": f"v{i}", "title": "new"} for i in range(5)])
+        self.assertEqual(self.job.run_collection("nate"), 5, "A later run should only clean new posts")
+        self.assertEqual(collection.count_documents({"processed": VERSION}), 35)
+
+if __name__ == "__main__":
+    unittest.main()
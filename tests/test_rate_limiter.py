@@ -0,0 +1,90 @@
+import time
+import unittest
+from email.utils import formatdate
+from src.crawlers.rate_limiter import HostUnavailable, RateLimiter, parse_retry_after
+
+URL = "https://gall.dcinside.com/board/lists/?id=test"
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_paced(self):
+        limiter = RateLimiter(rate=20, burst=3)
+        waits = [limiter.host(URL).reserve(max_wait=10) for _ in range(5)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 0.05, delta=0.01)
+        self.assertAlmostEqual(waits[4], 0.10, delta=0.01)
+
+    def test_hosts_are_independent(self):
+        limiter = RateLimiter(rate=1, burst=1, host_rates={"pann.nate.com": 5})
+        limiter.acquire(URL)
+        self.assertEqual(limiter.host("https://pann.nate.com/talk/1").reserve(max_wait=10), 0)
+        self.assertEqual(limiter.host("https://pann.nate.com/talk/1").max_rate, 5)
+
+    def test_aimd(self):
+        limiter = RateLimiter(rate=4, increase=0.5, decrease=0.5)
+        limiter.record(URL, 429)
+        self.assertEqual(limiter.host(URL).rate, 2)
+        # Failures arriving together only shrink the rate once
+        limiter.record(URL, 503)
+        self.assertEqual(limiter.host(URL).rate, 2)
+        limiter.record(URL, 200)
+        limiter.record(URL, 404)
+        self.assertEqual(limiter.host(URL).rate, 3)
+        for _ in range(10):
+            limiter.record(URL, 200)
+        self.assertEqual(limiter.host(URL).rate, 4, "The rate should not grow past the configured one")
+
+    def test_retry_after(self):
+        limiter = RateLimiter(rate=100, max_wait=5)
+        limiter.record(URL, 429, retry_after="2")
+        self.assertAlmostEqual(limiter.host(URL).reserve(max_wait=5), 2, delta=0.1)
+        limiter.record(URL, 429, retry_after="120")
+        with self.assertRaises(HostUnavailable):
+            limiter.acquire(URL)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("30"), 30)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_circuit_breaker(self):
+        limiter = RateLimiter(rate=100, burst=100, breaker_failures=3, breaker_cooldown=0.2)
+        for _ in range(3):
+            limiter.acquire(URL)
+            limiter.record(URL, error=True)
+        self.assertEqual(limiter.stats()["gall.dcinside.com"]["state"], "open")
+        with self.assertRaises(HostUnavailable):
+            limiter.acquire(URL)
+
+        time.sleep(0.25)
+        limiter.acquire(URL)
+        # Only one probe goes through while the breaker is half open
+        with self.assertRaises(HostUnavailable):
+            limiter.acquire(URL)
+        limiter.record(URL, 200)
+        self.assertEqual(limiter.stats()["gall.dcinside.com"]["state"], "closed")
+        limiter.acquire(URL)
+
+    def test_failed_probe_reopens(self):
+        limiter = RateLimiter(rate=100, burst=100, breaker_failures=1, breaker_cooldown=0.1)
+        limiter.record(URL, 500)
+        time.sleep(0.15)
+        limiter.acquire(URL)
+        limiter.record(URL, 500)
+        with self.assertRaises(HostUnavailable):
+            limiter.acquire(URL)
+
+    def test_late_success_keeps_breaker_open(self):
+        limiter = RateLimiter(rate=100, burst=100, breaker_failures=2, breaker_cooldown=10)
+        for _ in range(3):
+            limiter.acquire(URL)
+        limiter.record(URL, 503)
+        limiter.record(URL, 503)
+        # The third request was sent before the breaker opened and answers after it
+        limiter.record(URL, 200)
+        self.assertEqual(limiter.stats()["gall.dcinside.com"]["state"], "open")
+        with self.assertRaises(HostUnavailable):
+            limiter.acquire(URL)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from datetime import datetime, timedelta
+from src.scheduler.revisit import RevisitPlanner
+
+START = datetime(2024, 1, 1)
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+class TestRevisitPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = RevisitPlanner(target_new=5, min_interval=60, max_interval=3600, horizon=3600)
+
+    def test_unknown_board_uses_default(self):
+        self.assertEqual(self.planner.interval("nate", "a", 600), 600)
+        self.planner.observe("nate", "a", 40, now=at(0))
+        self.assertEqual(self.planner.interval("nate", "a", 600), 600, "The first visit finds the backlog, not a rate")
+
+    def test_interval_targets_new_posts_per_visit(self):
+        self.planner.observe("nate", "a", 0, now=at(0))
+        rate = self.planner.observe("nate", "a", 10, now=at(10))
+        self.assertAlmostEqual(rate, 1 / 60)
+        self.assertAlmostEqual(self.planner.interval("nate", "a", 600), 300)
+
+    def test_interval_is_bounded(self):
+        self.planner.observe("nate", "hot", 0, now=at(0))
+        self.planner.observe("nate", "hot", 500, now=at(1))
+        self.planner.observe("nate", "dead", 0, now=at(0))
+        self.planner.observe("nate", "dead", 0, now=at(60))
+        self.assertEqual(self.planner.interval("nate", "hot", 600), 60)
+        self.assertEqual(self.planner.interval("nate", "dead", 600), 3600)
+
+    def test_rate_follows_changes(self):
+        self.planner.observe("nate", "a", 0, now=at(0))
+        self.planner.observe("nate", "a", 60, now=at(60))
+        # A short quiet visit barely moves a long-standing estimate
+        quiet = self.planner.observe("nate", "a", 0, now=at(61))
+        self.assertGreater(quiet, 0.9 / 60)
+        # A burst observed over a long visit dominates it
+        burst = self.planner.observe("nate", "a", 600, now=at(181))
+        self.assertGreater(burst, 4 / 60)
+
+    def test_budget_stretches_intervals(self):
+        planner = RevisitPlanner(target_new=5, min_interval=60, max_interval=36000, horizon=3600, budget=60)
+        for board in ("a", "b"):
+            planner.observe("nate", board, 0, now=at(0))
+            planner.observe("nate", board, 10, now=at(10))
+        # Two boards at one visit per 5 minutes want 24 visits per hour, within budget
+        self.assertAlmostEqual(planner.interval("nate", "a", 600), 300)
+        planner.budget = 12
+        self.assertAlmostEqual(planner.interval("nate", "a", 600), 600)
+        planner.forget("nate", "b")
+        self.assertAlmostEqual(planner.interval("nate", "a", 600), 300)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,8 @@
+import threading
+import time
 import unittest
+from datetime import timedelta
+from apscheduler.triggers.interval import IntervalTrigger
 from src.scheduler.task_scheduler import TaskScheduler
 from src.db.mongo_client import MongoDBClient
 from src.config.settings import Settings
@@ -31,5 +35,70 @@ class TestScheduler(unittest.TestCase):
         jobs = self.scheduler.scheduler.get_jobs()
         self.assertTrue(len(jobs) > 0, "Scheduler should start and contain tasks.")
 
+    def test_keyword_sync(self):
+        keywords = self.db_client.db["keywords"]
+        keywords.insert_one({"nate": ["a", "b"], "dcinside": ["g"]})
+        self.scheduler.register_tasks()
+        job = self.scheduler.scheduler.get_job("nate:a")
+
+        keywords.update_one({}, {"$set": {"nate": ["a", "c"]}})
+        added, removed = self.scheduler.sync_keywords()
+        self.assertEqual(added, [("nate", "c")])
+        self.assertEqual(removed, [("nate", "b")])
+        self.assertIsNone(self.scheduler.scheduler.get_job("nate:b"))
+        self.assertEqual(self.scheduler.scheduler.get_job("nate:a").next_run_time, job.next_run_time,
+                         "Jobs of unchanged keywords should not be rescheduled.")
+
+    def test_stop_past_timeout(self):
+        release = threading.Event()
+        self.scheduler.crawl_nate = lambda keyword: release.wait(10)
+        self.scheduler.start()
+        self.scheduler.scheduler.add_job(self.scheduler.run_crawler, args=["nate", "slow"], id="nate:slow")
+        deadline = time.monotonic() + 5
+        while self.scheduler.in_flight == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        started = time.monotonic()
+        drained = self.scheduler.stop(timeout=0.2)
+        release.set()
+        self.assertFalse(drained, "A crawl still running at the deadline should be reported.")
+        self.assertLess(time.monotonic() - started, 2, "stop() should return once the timeout passes.")
+
+    def test_interval_job_per_keyword(self):
+        self.db_client.db["keywords"].insert_one({"nate": ["a", "b"], "dcinside": ["g"], "unknown": ["z"]})
+        self.scheduler.register_tasks()
+        jobs = {job.id: job for job in self.scheduler.scheduler.get_jobs()}
+        self.assertEqual(sorted(jobs), ["dcinside:g", "media_worker", "nate:a", "nate:b"])
+        for job_id, setting in (("nate:a", "nate_interval"), ("dcinside:g", "dcinside_interval")):
+            minutes = getattr(self.scheduler.settings, setting)
+            self.assertEqual(jobs[job_id].trigger.interval, timedelta(minutes=minutes))
+            self.assertEqual(jobs[job_id].args, tuple(job_id.split(":")))
+
+    def test_overlapping_ticks_are_skipped(self):
+        release = threading.Event()
+        self.scheduler.crawl_nate = lambda keyword: release.wait(10)
+        self.scheduler.start()
+        self.scheduler.scheduler.add_job(self.scheduler.run_crawler, IntervalTrigger(seconds=0.1),
+                                         args=["nate", "slow"], id="nate:slow")
+        deadline = time.monotonic() + 5
+        while self.scheduler.stats().get("nate:slow", {}).get("skipped", 0) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.scheduler.in_flight, 1, "Ticks during a run should not start another one.")
+        release.set()
+        deadline = time.monotonic() + 5
+        while not self.scheduler.stats()["nate:slow"]["runs"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = self.scheduler.stats()["nate:slow"]
+        self.assertGreaterEqual(stats["skipped"], 2)
+        self.assertEqual((stats["runs"], stats["failures"]), (1, 0))
+
+    def test_stats(self):
+        self.scheduler.record_run("nate:a", 1.0)
+        self.scheduler.record_run("nate:a", 3.0, failed=True)
+        stats = self.scheduler.stats()["nate:a"]
+        self.assertEqual((stats["runs"], stats["failures"], stats["skipped"]), (2, 1, 0))
+        self.assertEqual((stats["last_seconds"], stats["max_seconds"], stats["total_seconds"]), (3.0, 3.0, 4.0))
+        self.assertEqual(stats["mean_seconds"], 2.0)
+        self.assertIn("last_run", stats)
+
 if __name__ == "__main__":
     unittest.main()
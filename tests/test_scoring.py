@@ -0,0 +1,99 @@
+import random
+import unittest
+import numpy as np
+from src.data_preprocessing.scoring import ScoringEngine, assign_scores, columns_of, round_scores
+
+
+def random_items(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "view_count": int(rng.lognormvariate(6, 2)),
+            "comment_count": int(rng.lognormvariate(2, 1.5)),
+            "sentiment_score": rng.uniform(-1.5, 1.5),
+            "source": rng.choice(("dcinside", "nate")),
+            "keyword": rng.choice(("a", "b", "c")),
+        }
+        for _ in range(count)
+    ]
+
+
+class TestScoringEngine(unittest.TestCase):
+    def test_matches_calculate_score(self):
+        items = random_items(20000)
+        items += [
+            {},
+            {"view_count": 1},
+            {"sentiment_score": 3},
+            {"view_count": 0.01, "comment_count": 0.05, "sentiment_score": -0.00025},
+            {"view_count": 10 ** 15, "comment_count": 3},
+            {"view_count": 2.675, "sentiment_score": 0.01},
+        ]
+        expected = [item["score"] for item in assign_scores([dict(item) for item in items])]
+        scored = ScoringEngine().assign_scores([dict(item) for item in items], batch_size=4096)
+        self.assertEqual([item["score"] for item in scored], expected)
+
+    def test_round_scores_matches_round(self):
+        values = np.array([0.125, 0.135, 2.675, 1.005, -0.125, 1e14 + 0.015, 0.0])
+        self.assertEqual(round_scores(values).tolist(), [round(value, 2) for value in values.tolist()])
+
+    def test_weights(self):
+        engine = ScoringEngine(weights={"view_count": 1.0, "comment_count": 2.0})
+        columns = columns_of([{"view_count": 3, "comment_count": 4, "sentiment_score": 1}])
+        self.assertEqual(engine.score(columns).tolist(), [11.0])
+
+    def test_log_normalization(self):
+        engine = ScoringEngine(weights={"view_count": 1.0}, normalize={"view_count": "log"})
+        columns = columns_of([{"view_count": 0}, {"view_count": np.e - 1}])
+        self.assertEqual(engine.score(columns).tolist(), [0.0, 1.0])
+
+    def test_percentile_per_source(self):
+        engine = ScoringEngine(weights={"view_count": 1.0}, normalize={"view_count": "percentile"})
+        items = [
+            {"view_count": 10, "source": "dcinside"},
+            {"view_count": 20, "source": "dcinside"},
+            {"view_count": 1000, "source": "nate"},
+            {"view_count": 5000, "source": "nate"},
+            {"view_count": 9000, "source": "nate"},
+            {"view_count": 9000, "source": "nate"},
+        ]
+        columns = columns_of(items)
+        self.assertEqual(engine.score(columns, columns["source"]).tolist(), [0.5, 1.0, 0.25, 0.5, 1.0, 1.0])
+
+    def test_unknown_normalization(self):
+        with self.assertRaises(ValueError):
+            ScoringEngine(normalize={"view_count": "zscore"})
+
+    def test_top_k_matches_sort(self):
+        items = random_items(5000, seed=1)
+        columns = columns_of(items)
+        engine = ScoringEngine()
+        scores = engine.score(columns)
+        selected = engine.top_k(scores, columns["keyword"], 10)
+        self.assertEqual(sorted(selected), ["a", "b", "c"])
+        for keyword, rows in selected.items():
+            expected = sorted((score for score, item in zip(scores.tolist(), items) if item["keyword"] == keyword),
+                              reverse=True)[:10]
+            self.assertEqual(scores[rows].tolist(), expected)
+            self.assertTrue(all(columns["keyword"][row] == keyword for row in rows))
+
+    def test_top_k_small_groups(self):
+        columns = columns_of([{"view_count": 2, "keyword": "a"}, {"view_count": 4, "keyword": "a"},
+                              {"view_count": 6, "keyword": "b"}])
+        engine = ScoringEngine()
+        selected = engine.top_k(engine.score(columns), columns["keyword"], 5)
+        self.assertEqual({keyword: rows.tolist() for keyword, rows in selected.items()}, {"a": [1, 0], "b": [2]})
+
+    def test_top_k_stream_matches_batch(self):
+        items = random_items(3000, seed=2)
+        engine = ScoringEngine()
+        columns = columns_of(items)
+        scores = engine.score(columns)
+        expected = {keyword: scores[rows].tolist() for keyword, rows in engine.top_k(scores, columns["keyword"], 7).items()}
+        streamed = engine.top_k_stream(iter(items), 7, batch_size=256)
+        self.assertEqual({keyword: [score for score, _ in best] for keyword, best in streamed.items()}, expected)
+        self.assertTrue(all(item["keyword"] == keyword for keyword, best in streamed.items() for _, item in best))
+
+
+if __name__ == "__main__":
+    unittest.main()
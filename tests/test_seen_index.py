@@ -0,0 +1,34 @@
+import unittest
+from src.db.seen_index import SeenUrlIndex, url_digest
+
+class TestSeenUrlIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SeenUrlIndex(capacity=1000, merge_threshold=16)
+
+    def test_add_and_lookup(self):
+        self.index.add("https://pann.nate.com/talk/1")
+        self.assertIn("https://pann.nate.com/talk/1", self.index)
+        self.assertNotIn("https://pann.nate.com/talk/2", self.index)
+
+    def test_lookup_after_merge(self):
+        urls = [f"https://pann.nate.com/talk/{no}" for no in range(100)]
+        for url in urls:
+            self.index.add(url)
+        self.assertEqual(len(self.index), 100, "Merges should keep every URL exactly once.")
+        self.assertTrue(all(url in self.index for url in urls), "Merged URLs should still be found.")
+
+    def test_bulk_load_deduplicates(self):
+        digests = [url_digest(f"https://gall.dcinside.com/{no % 50}") for no in range(200)]
+        self.index.load(iter(digests), chunk_size=30)
+        self.index.add("https://gall.dcinside.com/7")
+        self.assertEqual(len(self.index), 50, "Duplicate digests should be stored once.")
+        self.assertIn("https://gall.dcinside.com/49", self.index)
+
+    def test_no_false_positives(self):
+        for no in range(500):
+            self.index.add(f"https://www.fmkorea.com/{no}")
+        misses = sum(f"https://www.fmkorea.com/other/{no}" in self.index for no in range(5000))
+        self.assertEqual(misses, 0, "The exact digest set should reject Bloom filter false positives.")
+
+if __name__ == "__main__":
+    unittest.main()
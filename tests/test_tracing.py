@@ -0,0 +1,114 @@
+import asyncio
+import contextvars
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.crawlers.fetcher import AsyncFetcher
+from src.trace_summary import critical_path, percentile
+from src.tracing import Tracer, span
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "traces.jsonl")
+        self.tracer = Tracer(path=self.path, sample_rate=1.0)
+
+    def tearDown(self):
+        self.tracer.close()
+        self.directory.cleanup()
+
+    def records(self):
+        with open(self.path, encoding="utf-8") as log:
+            return [json.loads(line) for line in log]
+
+    def test_spans_nest_across_gather_and_threads(self):
+        fetcher = AsyncFetcher(max_per_host=2, max_workers=4)
+
+        def blocking_parse():
+            with span("parse"):
+                time.sleep(0.01)
+
+        async def post(number):
+            with self.tracer.trace("post", "test", str(number)):
+                with span("detail"):
+                    await fetcher.run_blocking(blocking_parse)
+
+        async def cycle():
+            with self.tracer.trace("cycle", "test", "board"):
+                with span("posts"):
+                    await asyncio.gather(*(post(number) for number in range(3)))
+
+        fetcher.run(cycle())
+        records = self.records()
+        cycle_record = next(record for record in records if record["name"] == "cycle")
+        posts = [record for record in records if record["name"] == "post"]
+        self.assertEqual(len(posts), 3)
+        for record in posts:
+            self.assertEqual(record["parent_id"], cycle_record["trace_id"])
+            names = {span["name"]: span for span in record["spans"]}
+            self.assertEqual(record["spans"][names["parse"]["parent"]]["name"], "detail",
+                             "A span opened on a fetch thread should nest under the awaiting span")
+        self.assertEqual([span["name"] for span in cycle_record["spans"]], ["posts"])
+
+    def test_sampling(self):
+        self.tracer.sample_rate = 0.0
+        with self.tracer.trace("cycle", "test", "board") as current:
+            self.assertIsNone(current)
+            with span("list_fetch"):
+                pass
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_error_recorded(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.trace("post", "test", "1"):
+                with span("parse_post"):
+                    raise ValueError("bad page")
+        record = self.records()[0]
+        self.assertIn("bad page", record["error"])
+        self.assertIsNotNone(record["spans"][0]["duration"], "Spans should close when the block raises")
+
+    def test_critical_path(self):
+        trace = {"duration": 10.0, "spans": [
+            {"name": "list_fetch", "parent": None, "start": 0.0, "duration": 2.0},
+            {"name": "posts", "parent": None, "start": 2.0, "duration": 7.0},
+            # Concurrent children of posts; only the one finishing last is on the critical path
+            {"name": "detail_fetch", "parent": 1, "start": 2.0, "duration": 3.0},
+            {"name": "detail_fetch", "parent": 1, "start": 2.0, "duration": 6.0},
+        ]}
+        path = critical_path(trace)
+        self.assertAlmostEqual(sum(path.values()), 10.0)
+        self.assertAlmostEqual(path["list_fetch"], 2.0)
+        self.assertAlmostEqual(path["detail_fetch"], 6.0)
+        self.assertAlmostEqual(path["posts"], 1.0)
+        self.assertAlmostEqual(path["other"], 1.0)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_concurrent_spans(self):
+        def stage(number):
+            with span(f"outer-{number}"):
+                for _ in range(50):
+                    with span(f"inner-{number}"):
+                        pass
+
+        with self.tracer.trace("post", "test", "1"):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                for number in range(8):
+                    pool.submit(contextvars.copy_context().run, stage, number)
+        spans = self.records()[0]["spans"]
+        self.assertEqual(len(spans), 8 * 51)
+        for record in spans:
+            if record["name"].startswith("inner-"):
+                self.assertEqual(spans[record["parent"]]["name"], record["name"].replace("inner", "outer"),
+                                 "Each span should point at the span it was opened in")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from src.config.settings import Settings
+from src.crawlers.rate_limiter import RateLimiter
+from src.crawlers.transport import ACCEPT_ENCODING, HttpTransport, close_transport, configure_transport, get_transport
+
+URL = "https://pann.nate.com/talk/1"
+
+
+class ScriptedAdapter(BaseAdapter):
+    """
+    Answer requests with the given statuses in turn, recording when each one was sent.
+    """
+
+    def __init__(self, statuses, retry_after=None):
+        super().__init__()
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.sent = 0
+        self.kwargs = None
+
+    def send(self, request, **kwargs):
+        self.kwargs = kwargs
+        response = requests.Response()
+        response.status_code = self.statuses[min(self.sent, len(self.statuses) - 1)]
+        response.url = request.url
+        response.request = request
+        response._content = b"body"
+        if self.retry_after and response.status_code in (429, 503):
+            response.headers["Retry-After"] = self.retry_after
+        self.sent += 1
+        return response
+
+    def close(self):
+        pass
+
+
+class TestHttpTransport(unittest.TestCase):
+    def transport(self, adapter, **kwargs):
+        transport = HttpTransport(backoff_factor=0, **kwargs)
+        transport.session.mount("https://", adapter)
+        return transport
+
+    def test_throttled_responses_are_retried_through_the_limiter(self):
+        adapter = ScriptedAdapter([503, 429, 200])
+        limiter = RateLimiter(rate=100, burst=10, decrease=0.5)
+        response = self.transport(adapter, limiter=limiter).request("GET", URL)
+        self.assertEqual((response.status_code, adapter.sent), (200, 3))
+        stats = limiter.stats()["pann.nate.com"]
+        self.assertEqual(stats["requests"], 3, "Every attempt should take a limiter slot.")
+        self.assertEqual(stats["throttled"], 2, "Every throttled attempt should reach the limiter.")
+
+    def test_retries_are_bounded(self):
+        adapter = ScriptedAdapter([502])
+        response = self.transport(adapter, max_retries=2).request("GET", URL)
+        self.assertEqual((response.status_code, adapter.sent), (502, 3))
+
+    def test_long_retry_after_stops_retrying(self):
+        adapter = ScriptedAdapter([429, 200], retry_after="120")
+        limiter = RateLimiter(max_wait=1)
+        response = self.transport(adapter, limiter=limiter).request("GET", URL)
+        self.assertEqual((response.status_code, adapter.sent), (429, 1),
+                         "A pause longer than the limiter waits should not be retried through.")
+
+    def test_pooled_adapter(self):
+        transport = HttpTransport(max_retries=2, backoff_factor=0.25, pool_connections=6, pool_maxsize=3)
+        for prefix in ("https://", "http://"):
+            adapter = transport.session.get_adapter(prefix + "example.com")
+            self.assertIsInstance(adapter, HTTPAdapter)
+            self.assertEqual((adapter._pool_connections, adapter._pool_maxsize), (6, 3))
+            self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 3)
+            retry = adapter.max_retries
+            self.assertEqual((retry.total, retry.connect, retry.read), (2, 2, 2))
+            self.assertEqual(retry.status, 0, "Responses should be retried through the limiter, not by urllib3.")
+            self.assertIsNone(retry.allowed_methods, "Read-only POSTs should be retried too.")
+            self.assertEqual(retry.backoff_factor, 0.25)
+        self.assertEqual(transport.session.headers["Accept-Encoding"], ACCEPT_ENCODING)
+
+    def test_default_timeouts(self):
+        adapter = ScriptedAdapter([200])
+        transport = self.transport(adapter, connect_timeout=2, read_timeout=7)
+        transport.request("GET", URL)
+        self.assertEqual(adapter.kwargs["timeout"], (2, 7))
+        transport.request("GET", URL, timeout=1)
+        self.assertEqual(adapter.kwargs["timeout"], 1, "An explicit timeout should win over the defaults.")
+
+    def test_configure_transport(self):
+        self.addCleanup(close_transport)
+        settings = Settings(http_pool_connections=4, http_pool_maxsize=2, http_max_per_host=5, http_max_retries=1)
+        transport = configure_transport(settings)
+        self.assertIs(get_transport(), transport, "Every crawler should share the configured transport.")
+        adapter = transport.session.get_adapter(URL)
+        self.assertEqual((adapter._pool_connections, adapter._pool_maxsize), (4, 5),
+                         "Each host should keep as many connections as it may use at once.")
+        self.assertEqual(adapter.max_retries.total, 1)
+        self.assertEqual(transport.timeout, (settings.http_connect_timeout, settings.http_read_timeout))
+        close_transport()
+        self.assertIsNot(get_transport(), transport)
+
+
+if __name__ == "__main__":
+    unittest.main()